@@ -0,0 +1,121 @@
+"""Budget allocation across the districts' unfinished houses.
+
+Every house still in a construction stage (or not yet started) can be
+finished for the share of its unit cost not yet spent. Finishing one house
+closes 100 / sanctioned percentage points of its district's gap to the SDG
+target, so the allocation that closes the most gap for a budget takes
+(district, stage) lots in order of gap closed per lakh: a fractional
+knapsack, solved exactly by a sort. `AllocationPlan` does the sort once;
+solving for a budget is a binary search into the cumulative cost, and a new
+budget only applies the lots between the previous solution and the new one.
+"""
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import traced
+from metrics_store import SDG_TARGET
+
+# Stage columns, nearest to completion first
+STAGES = ['roof', 'lintel', 'foundation', 'unstarted']
+
+# Share of a house's cost already spent once it has reached each stage
+SPENT_SHARE = {'roof': 0.8, 'lintel': 0.5, 'foundation': 0.25, 'unstarted': 0.0}
+
+# Cost of one house in lakh rupees (PMAY-U central assistance per house)
+UNIT_COST_LAKHS = float(os.getenv("DASHBOARD_UNIT_COST_LAKHS", "1.5"))
+
+
+class AllocationPlan:
+    """Lots of unfinished houses sorted by gap closed per lakh.
+
+    `stages` has one row per district (rows of the same district are
+    summed) with the `total`, `completed` and STAGES columns of pmay_data.
+    `unit_cost` is a scalar or a Series of lakhs per house indexed by
+    district. Houses beyond what a district needs to reach `target` are
+    never funded.
+    """
+
+    def __init__(self, stages, unit_cost=UNIT_COST_LAKHS, target=SDG_TARGET,
+                 region='district', total='beneficiary_selection', completed='completed'):
+        grouped = stages.groupby(region, sort=False)[[total, completed] + STAGES].sum()
+        self.regions = grouped.index
+        self.total = grouped[total].to_numpy(dtype=float)
+        self.completed = grouped[completed].to_numpy(dtype=float)
+        counts = grouped[STAGES].to_numpy(dtype=float)
+        size = len(grouped)
+
+        if isinstance(unit_cost, pd.Series):
+            unit_cost = unit_cost.reindex(self.regions).fillna(UNIT_COST_LAKHS).to_numpy(dtype=float)
+        unit_cost = np.broadcast_to(np.asarray(unit_cost, dtype=float), (size,))
+        share = np.array([SPENT_SHARE[stage] for stage in STAGES])
+        cost = unit_cost[:, None] * (1 - share)[None, :]
+        # What the houses built so far cost, the base for relative budgets
+        self.spent = float((unit_cost * (self.completed + counts @ share)).sum())
+        self._stage_cost = cost
+
+        # Houses each district still needs, funded nearest stage first
+        needed = np.clip(target / 100 * self.total - self.completed, 0, None)
+        before = np.cumsum(counts, axis=1) - counts
+        counts = np.clip(needed[:, None] - before, 0, counts)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            gain = np.where(self.total > 0, 100 / self.total, 0.0)
+            ratio = gain[:, None] / cost
+        lots = np.flatnonzero((counts > 0) & (cost > 0) & (ratio > 0))
+        order = lots[np.argsort(-ratio.ravel()[lots], kind='stable')]
+
+        self._lot = order
+        self._count = counts.ravel()[order]
+        self._cost = cost.ravel()[order]
+        self._cumulative = np.cumsum(self._count * self._cost)
+        self._lock = threading.Lock()
+        # Current solution: lots [0, _filled) taken whole plus a partial lot
+        self._houses = np.zeros(size * len(STAGES))
+        self._filled = 0
+        self._partial = None
+
+    @property
+    def capacity(self):
+        """Budget that finishes every house the targets call for."""
+        return float(self._cumulative[-1]) if len(self._cumulative) else 0.0
+
+    def _apply(self, start, stop, sign):
+        # Each lot is a distinct (district, stage) cell
+        self._houses[self._lot[start:stop]] += sign * self._count[start:stop]
+
+    @traced('allocation.solve')
+    def solve(self, budget):
+        """Allocation of `budget` lakhs as a frame indexed by district."""
+        with self._lock:
+            filled = int(np.searchsorted(self._cumulative, budget, side='right'))
+            if self._partial is not None:
+                self._houses[self._lot[self._partial[0]]] -= self._partial[1]
+                self._partial = None
+            # Warm start: only the lots between the two solutions change
+            if filled > self._filled:
+                self._apply(self._filled, filled, 1)
+            elif filled < self._filled:
+                self._apply(filled, self._filled, -1)
+            self._filled = filled
+            if filled < len(self._lot):
+                spent = self._cumulative[filled - 1] if filled else 0.0
+                amount = (budget - spent) / self._cost[filled]
+                if amount > 0:
+                    self._partial = (filled, amount)
+                    self._houses[self._lot[filled]] += amount
+            houses = self._houses.reshape(-1, len(STAGES)).copy()
+
+        budget_by_region = (houses * self._stage_cost).sum(axis=1)
+        finished = houses.sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            current = np.where(self.total > 0, self.completed / self.total * 100, 0.0)
+            simulated = np.where(self.total > 0, (self.completed + finished) / self.total * 100, 0.0)
+        return pd.DataFrame({
+            'budget': budget_by_region,
+            'houses_completed': finished,
+            'completion_rate': current,
+            'simulated_completion_rate': simulated,
+        }, index=self.regions)
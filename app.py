@@ -1,12 +1,31 @@
 import streamlit as st
-from sklearn.linear_model import LinearRegression, Ridge
 import numpy as np
 import datetime
-import snowflake.connector
+import time
 import pandas as pd
-import plotly.express as px
 from dotenv import load_dotenv
 import os
+from resources import get_connection_pool, get_figure_factory, get_query_cache
+from page_config import set_page_config
+from arrow_fetch import fetch_frame
+from datasets import DATASETS, section_datasets, load_section_data
+from query_builder import Query
+import metrics_store
+import forecast
+import snapshots
+import montecarlo
+import stage_flow
+from allocation import UNIT_COST_LAKHS, AllocationPlan
+from figure_factory import frame_version
+import lazy_imports
+import instrumentation
+from instrumentation import span
+
+# Only takes effect when the page is run on its own
+set_page_config(page_icon="📊")
+
+# Loaded by the first section that draws a chart, not on every cold start
+px = lazy_imports.lazy_import('plotly.express')
 
 # Define CSS animations at the beginning of your script
 
@@ -14,20 +33,111 @@ import os
 # Load environment variables from .env file
 load_dotenv()
 
-# Fetch Snowflake credentials from environment variables
 try:
-    conn = snowflake.connector.connect(
-        user=os.getenv("SNOWFLAKE_USER"),
-        password=os.getenv("SNOWFLAKE_PASSWORD"),
-        account=os.getenv("SNOWFLAKE_ACCOUNT"),
-        warehouse=os.getenv("SNOWFLAKE_WAREHOUSE"),
-        database=os.getenv("SNOWFLAKE_DATABASE"),
-        schema=os.getenv("SNOWFLAKE_SCHEMA")
-    )
+    pool = get_connection_pool()
 except Exception as e:
     st.error("Could not connect to Snowflake. Please check your credentials and connection settings.")
     st.stop()
 
+query_cache = get_query_cache()
+
+# Source table versions the materialized metrics tables were last refreshed at
+@st.cache_resource
+def get_refreshed_versions():
+    return {}
+
+refreshed_versions = get_refreshed_versions()
+
+figures = get_figure_factory()
+
+@instrumentation.traced('metrics.refresh')
+def refresh_metrics(conn, source):
+    # Recompute completion metrics once per source-table version, rewriting
+    # only the regions whose inputs changed
+    source_table = metrics_store.METRICS[source]['source_table']
+    version = query_cache.table_version(conn, source_table, pool.backend)
+    if refreshed_versions.get(source) != version:
+        if metrics_store.refresh_from_source(conn, source, version, pool.paramstyle):
+            query_cache.invalidate()
+        refreshed_versions[source] = version
+
+# Trend forecasts by history version; only the current one is kept
+@st.cache_resource
+def get_forecasts():
+    return {}
+
+forecasts = get_forecasts()
+
+def load_forecast(source):
+    # Fitted once per data version for every region at once, and persisted so
+    # a restart reuses the stored coefficients instead of refitting
+    with pool.connection() as conn:
+        refresh_metrics(conn, source)
+        # The newest snapshot identifies the history the forecast is fitted on
+        version = snapshots.latest(source)
+        model = forecasts.get((source, version))
+        if model is None:
+            model = forecast.load(conn, source, version, pool.paramstyle)
+            if model is None:
+                model = forecast.fit(forecast.snapshot_history(source))
+                forecast.save(conn, source, model, version, pool.paramstyle)
+            forecasts.clear()
+            forecasts[(source, version)] = model
+    return model, version
+
+# Stage pipelines by history version; only the current one is kept
+@st.cache_resource
+def get_stage_flows():
+    return {}
+
+stage_flows = get_stage_flows()
+
+def load_stage_flow(source):
+    # Throughput, bottlenecks and projections are computed for every
+    # district once per snapshot
+    with pool.connection() as conn:
+        refresh_metrics(conn, source)
+    version = snapshots.latest(source)
+    flow = stage_flows.get((source, version))
+    if flow is None:
+        flow = stage_flow.load(source)
+        stage_flows.clear()
+        stage_flows[(source, version)] = flow
+    return flow, version
+
+# Allocation plans keyed on the stage counts they were built from
+@st.cache_resource(max_entries=4)
+def get_allocation_plan(stages):
+    sql_names = {display: sql for sql, display in DATASETS['pmay']['columns'].items()}
+    return AllocationPlan(stages.rename(columns=sql_names))
+
+# Scenario worker processes and finished results, shared across sessions
+@st.cache_resource
+def get_scenario_executor():
+    return montecarlo.create_executor()
+
+@st.cache_resource
+def get_scenario_cache():
+    return montecarlo.ScenarioCache(max_entries=int(os.getenv("DASHBOARD_SIM_ENTRIES", "16")))
+
+scenarios = get_scenario_cache()
+
+def run_query(query, table, columns, dtypes=None, params=None):
+    with span('query', table=table), pool.connection() as conn:
+        source = metrics_store.source_for_table(table)
+        if source is not None:
+            refresh_metrics(conn, source)
+        version = query_cache.table_version(conn, table, pool.backend)
+
+        # Only a cache miss reaches the warehouse
+        def fetch():
+            with span('query.fetch', table=table):
+                return fetch_frame(conn.cursor(), query, columns, dtypes, params)
+
+        frame = query_cache.get_or_load(query, version, fetch, params=params)
+    # Shallow copy so derived columns added below never leak into the cache
+    return frame.copy(deep=False)
+
 # Initialize data variables
 pmay_data = None
 sanitation_data = None
@@ -41,11 +151,18 @@ section = st.sidebar.radio("Go to", [
     "🔮 Predictive Analysis", 
     "🆚 Comparative Analysis", 
     "🔧 Resource Allocation Simulation",
+    "🏗️ Construction Pipeline",
     "🎯 SDG Goal Tracker",
     "💡 Insights & Recommendations"
     # "🏠🚿 Combined Insights"
 ])
 
+# Everything below is timed as one rerun of the section (see ?debug=1)
+instrumentation.start_run(section, page='app')
+
+if st.sidebar.button("🔄 Refresh data"):
+    query_cache.invalidate()
+
 
 # Overview Section with icons and emojis
 if section == "🏠 Overview":
@@ -56,85 +173,76 @@ if section == "🏠 Overview":
         "showing completion rates and predicting future trends. Use the navigation on the left to explore."
     )
 
-# Data Overview Section
-if section in ["📊 Data Overview", "📈 Visualizations", "🔮 Predictive Analysis", "🆚 Comparative Analysis", "🔧 Resource Allocation Simulation", "🎯 SDG Goal Tracker"]:
+# Load only the datasets and columns the selected section declares in datasets.py
+section_timings = {}
+if section_datasets(section):
     try:
-        # Query PMAY Housing Data
-        pmay_query = "SELECT sl_no, district, beneficiary_selection, completed, foundation, lintel, roof, progress_total, unstarted FROM pmay_data;"
-        pmay_data = pd.DataFrame(
-            conn.cursor().execute(pmay_query).fetchall(),
-            columns=['Sl.No', 'District', 'Beneficiary Selection', 'Completed', 'Foundation', 'Lintel', 'Roof', 'Progress Total', 'Unstarted']
-        )
-        
-        # Calculate Completion Rate if data is available
-        if not pmay_data.empty:
-            pmay_data['Completion Rate (%)'] = (pmay_data['Completed'] / pmay_data['Beneficiary Selection']).fillna(0) * 100
-
-        # Display data in "Data Overview" section only
-        if section == "📊 Data Overview":
-            st.header("PMAY Housing Data 🏠")
-            if pmay_data.empty:
-                st.warning("PMAY Housing Data is empty.")
-            else:
-                st.write(pmay_data)
-
-        # Query Sanitation Data
-        sanitation_query = "SELECT state, sanctioned, completed, in_progress FROM sanitation_data;"
-        sanitation_data = pd.DataFrame(
-            conn.cursor().execute(sanitation_query).fetchall(),
-            columns=['State', 'Sanctioned', 'Completed', 'In Progress']
-        )
+        section_data = load_section_data(section, run_query, section_timings)
+    except Exception as e:
+        st.error(f"An error occurred while loading data: {e}")
+        st.stop()
 
-        # Calculate Completion Rate if data is available
-        if not sanitation_data.empty:
-            sanitation_data['Completion Rate (%)'] = (sanitation_data['Completed'] / sanitation_data['Sanctioned']).fillna(0) * 100
-
-        if section == "📊 Data Overview":
-            st.header("Sanitation Data 🚿")
-            if sanitation_data.empty:
-                st.warning("Sanitation Data is empty.")
-            else:
-                st.write(sanitation_data)
+    pmay_data = section_data.get('pmay')
+    sanitation_data = section_data.get('sanitation')
 
+# Aggregations, Top-N and filters run in the warehouse; only result rows come back
+def run_builder(query):
+    try:
+        return query.run(run_query, pool.paramstyle, section_timings)
     except Exception as e:
         st.error(f"An error occurred while loading data: {e}")
         st.stop()
 
-# Close Snowflake connection after data is fetched
-conn.close()
+# Data Overview Section
+if section == "📊 Data Overview":
+    st.header("PMAY Housing Data 🏠")
+    if pmay_data.empty:
+        st.warning("PMAY Housing Data is empty.")
+    else:
+        st.write(pmay_data)
+
+    st.header("Sanitation Data 🚿")
+    if sanitation_data.empty:
+        st.warning("Sanitation Data is empty.")
+    else:
+        st.write(sanitation_data)
 
 # Visualizations Section
-if section == "📈 Visualizations" and pmay_data is not None and sanitation_data is not None:
+if section == "📈 Visualizations":
     st.header("Visualizations 📊")
-    if not pmay_data.empty:
+    top_districts = run_builder(
+        Query('pmay_metrics').select('region', 'completion_rate').top(5, by='completion_rate')
+    )
+    if not top_districts.empty:
         st.subheader("Top 5 Districts by Housing Completion Rate")
-        top_districts = pmay_data[['District', 'Completion Rate (%)']].sort_values(by='Completion Rate (%)', ascending=False).head(5)
         st.write(top_districts)
         
-        fig_top_districts = px.bar(
+        fig_top_districts = figures.get('top_districts', frame_version(top_districts), lambda: px.bar(
             top_districts,
             x='District',
             y='Completion Rate (%)',
             title="Top 5 Districts by Housing Completion Rate",
             hover_data={'Completion Rate (%)': ':.2f'}
-        )
-        fig_top_districts.update_traces(marker_color='blue')
-        st.plotly_chart(fig_top_districts)
+        ).update_traces(marker_color='blue'))
+        with span('plotly_chart', chart='top_districts'):
+            st.plotly_chart(fig_top_districts)
 
-    if not sanitation_data.empty:
+    top_states = run_builder(
+        Query('sanitation_metrics').select('region', 'completion_rate').top(5, by='completion_rate')
+    )
+    if not top_states.empty:
         st.subheader("Top 5 States by Sanitation Completion Rate")
-        top_states = sanitation_data[['State', 'Completion Rate (%)']].sort_values(by='Completion Rate (%)', ascending=False).head(5)
         st.write(top_states)
         
-        fig_top_states = px.bar(
+        fig_top_states = figures.get('top_states', frame_version(top_states), lambda: px.bar(
             top_states,
             x='State',
             y='Completion Rate (%)',
             title="Top 5 States by Sanitation Completion Rate",
             hover_data={'Completion Rate (%)': ':.2f'}
-        )
-        fig_top_states.update_traces(marker_color='green')
-        st.plotly_chart(fig_top_states)
+        ).update_traces(marker_color='green'))
+        with span('plotly_chart', chart='top_states'):
+            st.plotly_chart(fig_top_states)
 
 # Predictive Analysis Section
 if section == "🔮 Predictive Analysis" and pmay_data is not None:
@@ -142,50 +250,61 @@ if section == "🔮 Predictive Analysis" and pmay_data is not None:
 
     # Filter by District for Prediction
     district_selected = st.selectbox("Select a District for Prediction:", pmay_data['District'].unique())
-    district_data = pmay_data[pmay_data['District'] == district_selected]
+    model, forecast_version = load_forecast('pmay')
 
-    
-    if not district_data.empty:
+    if district_selected in model:
         current_year = datetime.datetime.now().year
-        years = np.array([current_year, current_year + 1, current_year + 2, current_year + 3, current_year + 4]).reshape(-1, 1)
-        completion_rate = district_data['Completion Rate (%)'].values[0]
-
-        X = np.array([current_year]).reshape(-1, 1)
-        y = np.array([completion_rate])
-        model = LinearRegression().fit(X, y)
-
-        future_completion_rates = model.predict(years)
+        years = np.arange(current_year, current_year + 5)
+        predicted = model.predict(district_selected, years)
         prediction_data = pd.DataFrame({
-            'Year': years.flatten(),
-            'Predicted Completion Rate (%)': future_completion_rates.flatten()
+            'Year': years,
+            'Predicted Completion Rate (%)': predicted['prediction'].to_numpy(),
+            'Lower Bound (%)': predicted['lower'].to_numpy(),
+            'Upper Bound (%)': predicted['upper'].to_numpy(),
         })
 
         st.subheader(f"🔮 Predicted Completion Rates for {district_selected}")
+        observations = int(model.coefficients.at[district_selected, 'observations'])
+        if observations < 3:
+            st.info(f"Only {observations} month(s) of history recorded for {district_selected}; "
+                    f"the trend and its {model.confidence:.0%} band sharpen as snapshots accumulate.")
         st.write(prediction_data)
 
-        fig_pred = px.line(
-            prediction_data, 
-            x='Year', 
-            y='Predicted Completion Rate (%)', 
-            title=f"Predicted Completion Rates for {district_selected} (Next 5 Years)",
-            markers=True
-        )
-        fig_pred.update_traces(line=dict(color="orange", width=3))
-        st.plotly_chart(fig_pred)
+        def build_prediction():
+            fig = px.line(
+                prediction_data, 
+                x='Year', 
+                y='Predicted Completion Rate (%)', 
+                title=f"Predicted Completion Rates for {district_selected} (Next 5 Years)",
+                markers=True
+            ).update_traces(line=dict(color="orange", width=3))
+            fig.add_scatter(x=years, y=prediction_data['Upper Bound (%)'], mode='lines',
+                            line=dict(width=0), showlegend=False, hoverinfo='skip')
+            fig.add_scatter(x=years, y=prediction_data['Lower Bound (%)'], mode='lines',
+                            line=dict(width=0), fill='tonexty', fillcolor='rgba(255, 165, 0, 0.2)',
+                            name=f"{model.confidence:.0%} band", hoverinfo='skip')
+            return fig
+
+        fig_pred = figures.get('prediction', (district_selected, current_year, forecast_version), build_prediction)
+        with span('plotly_chart', chart='prediction'):
+            st.plotly_chart(fig_pred)
     else:
         st.write("No data available for the selected district.")
 
 # Comparative Analysis Section
-if section == "🆚 Comparative Analysis" and pmay_data is not None:
+if section == "🆚 Comparative Analysis":
     st.header("🆚 Comparative Analysis: Housing Completion Rates by Multiple States or Districts")
 
     # Multi-select for comparing multiple districts
-    selected_districts = st.multiselect("Select Districts for Comparison:", pmay_data['District'].unique())
-    comparison_data = pmay_data[pmay_data['District'].isin(selected_districts)]
+    districts = run_builder(Query('pmay_metrics').select('region').order_by('region'))
+    selected_districts = st.multiselect("Select Districts for Comparison:", districts['District'])
+    comparison_data = run_builder(
+        Query('pmay_metrics').select('region', 'completion_rate').where_in('region', selected_districts)
+    )
 
     if not comparison_data.empty:
         st.write("Comparing Housing Completion Rates for Selected Districts:")
-        fig_comparison = px.bar(
+        fig_comparison = figures.get('comparison', frame_version(comparison_data), lambda: px.bar(
             comparison_data,
             x='District',
             y='Completion Rate (%)',
@@ -193,8 +312,9 @@ if section == "🆚 Comparative Analysis" and pmay_data is not None:
             title="Housing Completion Rates by District",
             labels={'Completion Rate (%)': 'Completion Rate (%)'},
             hover_data={'Completion Rate (%)': ':.2f'}
-        )
-        st.plotly_chart(fig_comparison)
+        ))
+        with span('plotly_chart', chart='comparison'):
+            st.plotly_chart(fig_comparison)
     else:
         st.write("No data available for the selected districts.")
 
@@ -202,40 +322,170 @@ if section == "🆚 Comparative Analysis" and pmay_data is not None:
 if section == "🔧 Resource Allocation Simulation" and pmay_data is not None:
     st.header("🔧 Resource Allocation Simulation")
 
+    # The plan sorts every district's unfinished houses once per data version;
+    # each slider position re-solves from the previous solution
+    plan = get_allocation_plan(pmay_data)
     resource_increase = st.slider("Increase in Resources (%)", 0, 100, 10)
-    simulation_data = pmay_data.copy()
-    simulation_data['Simulated Completion Rate (%)'] = simulation_data['Completion Rate (%)'] * (1 + resource_increase / 100)
-
-    st.write(f"Simulated Completion Rates with {resource_increase}% Increase in Resources")
-    st.write(simulation_data[['District', 'Completion Rate (%)', 'Simulated Completion Rate (%)']])
-
-    fig_simulation = px.bar(
+    budget = plan.spent * resource_increase / 100
+    allocated = plan.solve(budget)
+    simulation_data = pd.DataFrame({
+        'District': allocated.index,
+        'Completion Rate (%)': allocated['completion_rate'].to_numpy(),
+        'Allocated Budget (₹ Lakh)': allocated['budget'].round(2).to_numpy(),
+        'Houses Completed': allocated['houses_completed'].round(1).to_numpy(),
+        'Simulated Completion Rate (%)': allocated['simulated_completion_rate'].to_numpy(),
+    })
+
+    st.write(f"Simulated Completion Rates with {resource_increase}% Increase in Resources "
+             f"(₹{budget:,.0f} lakh, allocated to close the most gap to the SDG target)")
+    st.caption(f"Assumes ₹{UNIT_COST_LAKHS} lakh per house; houses nearest completion "
+               "(Roof, then Lintel, Foundation, Unstarted) cost least to finish.")
+    st.write(simulation_data)
+
+    # The bars are built once per data version; moving the slider only
+    # replaces their heights
+    def set_simulated_rates(fig, resource_increase):
+        rates = dict(zip(simulation_data['District'], simulation_data['Simulated Completion Rate (%)']))
+        fig.for_each_trace(lambda trace: trace.update(y=[rates[trace.name]]))
+
+    fig_simulation = figures.get('simulation', frame_version(pmay_data), lambda: px.bar(
         simulation_data,
         x='District',
-        y='Simulated Completion Rate (%)',
+        y='Completion Rate (%)',
         title="Simulated Completion Rates with Resource Increase",
-        color='District'
-    )
-    st.plotly_chart(fig_simulation)
+        color='District',
+        labels={'Completion Rate (%)': 'Simulated Completion Rate (%)'}
+    ), set_simulated_rates, resource_increase=resource_increase)
+    with span('plotly_chart', chart='simulation'):
+        st.plotly_chart(fig_simulation)
+
+# Construction Pipeline Section
+if section == "🏗️ Construction Pipeline":
+    st.header("🏗️ Construction Pipeline: Projected Completion by District")
+    st.write("Houses move from Unstarted through Foundation, Lintel and Roof to Completed. Each stage's "
+             "throughput is measured between a district's first and last snapshot; the slowest stage "
+             "relative to the houses queued before it sets the projected completion date.")
+
+    flow, flow_version = load_stage_flow('pmay')
+    if flow.estimated == 0:
+        st.info("Stage throughput needs at least two snapshots of the construction stages; "
+                "projections appear once the PMAY data has been refreshed again.")
+    else:
+        ranking = flow.ranking()
+        stage_names = {stage: stage.title() for stage in flow.stages}
+        pipeline_data = pd.DataFrame({
+            'District': ranking.index,
+            'Projected Completion': ranking['completion_date'].dt.date.to_numpy(),
+            'Years to Clear': ranking['years_to_clear'].round(1).to_numpy(),
+            'Bottleneck Stage': ranking['bottleneck'].map(stage_names).to_numpy(),
+            'Bottleneck Throughput (houses/yr)': ranking['bottleneck_throughput'].round(1).to_numpy(),
+            'Houses in Pipeline': ranking['in_pipeline'].to_numpy(),
+        })
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Districts Projected", f"{flow.estimated:,}")
+        col2.metric("Stalled (no throughput)", f"{int(np.isinf(ranking['years_to_clear']).sum()):,}")
+        col3.metric("Median Years to Clear",
+                    f"{ranking['years_to_clear'][np.isfinite(ranking['years_to_clear'])].median():.1f}")
+
+        st.subheader("Districts by Projected Completion")
+        st.dataframe(pipeline_data, hide_index=True)
+
+        bottlenecks = pipeline_data['Bottleneck Stage'].value_counts().reindex(stage_names.values(), fill_value=0)
+        fig_bottlenecks = figures.get('bottlenecks', flow_version, lambda: px.bar(
+            x=bottlenecks.index,
+            y=bottlenecks.to_numpy(),
+            labels={'x': 'Bottleneck Stage', 'y': 'Districts'},
+            title="Districts by Bottleneck Stage"
+        ))
+        with span('plotly_chart', chart='bottlenecks'):
+            st.plotly_chart(fig_bottlenecks)
 
 # SDG Goal Tracker Section
 if section == "🎯 SDG Goal Tracker" and pmay_data is not None:
     st.header("🎯 Progress Toward UN Sustainable Development Goals (SDGs)")
 
-    sdg_target = 100
-    pmay_data['Gap to SDG Target (%)'] = sdg_target - pmay_data['Completion Rate (%)']
-    
     st.write("Gap to SDG Target")
     st.write(pmay_data[['District', 'Completion Rate (%)', 'Gap to SDG Target (%)']])
 
-    fig_sdg = px.bar(
+    fig_sdg = figures.get('sdg_gap', frame_version(pmay_data), lambda: px.bar(
         pmay_data,
         x='District',
         y='Gap to SDG Target (%)',
         title="Gap to SDG Target by District",
         color='District'
-    )
-    st.plotly_chart(fig_sdg)
+    ))
+    with span('plotly_chart', chart='sdg_gap'):
+        st.plotly_chart(fig_sdg)
+
+    st.subheader("🎲 Scenario Simulation")
+    st.write("Likelihood of each district reaching the SDG target under uncertain "
+             "completion velocity and funding.")
+    col1, col2 = st.columns(2)
+    with col1:
+        target_year = st.number_input("Target Year", datetime.date.today().year + 1, 2050, 2030)
+        trials = st.select_slider("Trials", [10_000, 100_000, 1_000_000], 100_000)
+    with col2:
+        velocity_cv = st.slider("Velocity Uncertainty (%)", 0, 100, 30)
+        funding_cv = st.slider("Funding Uncertainty (%)", 0, 100, 20)
+    st.caption(f"Each district keeps its average pace since {montecarlo.SCHEME_START}, scaled per trial "
+               "by its own velocity draw and a national funding draw.")
+
+    today = datetime.date.today()
+    horizon = montecarlo.years_between(today, f"{target_year}-12-31")
+    scenario_key = (frame_version(pmay_data), today, target_year, trials, velocity_cv, funding_cv)
+
+    def scenario_table(result):
+        summary = result.summary()
+        return pd.DataFrame({
+            'District': summary.index,
+            'Completion Rate (%)': summary['current'].round(2).to_numpy(),
+            'P10 (%)': summary['p10'].to_numpy(),
+            'Median (%)': summary['p50'].to_numpy(),
+            'P90 (%)': summary['p90'].to_numpy(),
+            'Chance of Target (%)': (summary['probability'] * 100).round(1).to_numpy(),
+        }).sort_values('Chance of Target (%)', ascending=False)
+
+    def scenario_chart(table):
+        return px.scatter(
+            table,
+            x='District',
+            y='Median (%)',
+            error_y=table['P90 (%)'] - table['Median (%)'],
+            error_y_minus=table['Median (%)'] - table['P10 (%)'],
+            color='Chance of Target (%)',
+            range_color=[0, 100],
+            title=f"Completion Rate by End of {target_year} (median, 10th-90th percentile)"
+        )
+
+    progress, chart, table = st.empty(), st.empty(), st.empty()
+    redrawn = [0.0]
+
+    # Bands are redrawn from the chunks merged so far, at most twice a second
+    def show_scenario(result):
+        progress.progress(result.done / result.chunks, text=f"{result.trials:,} of {trials:,} trials")
+        if time.perf_counter() - redrawn[0] >= 0.5:
+            scenario = scenario_table(result)
+            with span('plotly_chart', chart='sdg_scenarios', partial=True):
+                chart.plotly_chart(scenario_chart(scenario), key=f"sdg_scenarios_{result.done}")
+            table.dataframe(scenario, hide_index=True)
+            redrawn[0] = time.perf_counter()
+
+    result = scenarios.get(scenario_key)
+    if result is None:
+        result = montecarlo.run(
+            pmay_data['District'], pmay_data['Completion Rate (%)'],
+            montecarlo.baseline_velocity(pmay_data['Completion Rate (%)'], today),
+            horizon, trials, velocity_cv / 100, funding_cv / 100,
+            executor=get_scenario_executor(), on_progress=show_scenario
+        )
+        scenarios.put(scenario_key, result)
+    progress.empty()
+    scenario = scenario_table(result)
+    with span('plotly_chart', chart='sdg_scenarios'):
+        chart.plotly_chart(figures.get('sdg_scenarios', scenario_key, lambda: scenario_chart(scenario)),
+                           key="sdg_scenarios")
+    table.dataframe(scenario, hide_index=True)
 
 # Insights & Recommendations Section
 if section == "💡 Insights & Recommendations":
@@ -313,7 +563,7 @@ if section == "🏠🚿 Combined Insights":
 
         # Scatter Plot
         st.subheader("📊 Comparison of Housing and Sanitation Completion Rates by Region")
-        fig_combined = px.scatter(
+        fig_combined = figures.get('combined', frame_version(combined_data), lambda: px.scatter(
             combined_data,
             x='Completion Rate (%)_Housing',
             y='Completion Rate (%)_Sanitation',
@@ -321,8 +571,9 @@ if section == "🏠🚿 Combined Insights":
             color='Region',
             hover_name='Region',
             title="Housing vs Sanitation Completion Rates by Region"
-        )
-        st.plotly_chart(fig_combined)
+        ))
+        with span('plotly_chart', chart='combined'):
+            st.plotly_chart(fig_combined)
 
         # Classification of Regions
         st.subheader("📍 Classification of Regions Based on Completion Rates")
@@ -340,14 +591,47 @@ if section == "🏠🚿 Combined Insights":
         st.write(combined_data[['Region', 'Completion Rate (%)_Housing', 'Completion Rate (%)_Sanitation', 'Category']])
 
         # Bar Chart for Category Distribution
-        fig_category = px.bar(
+        fig_category = figures.get('category', frame_version(combined_data), lambda: px.bar(
             combined_data,
             x='Region',
             y='Infrastructure Completion Index (%)',
             color='Category',
             title="Regional Categories Based on Housing and Sanitation Completion Rates",
             labels={'Infrastructure Completion Index (%)': 'Completion Index (%)'}
-        )
-        st.plotly_chart(fig_category)
-        
-        
+        ))
+        with span('plotly_chart', chart='category'):
+            st.plotly_chart(fig_category)
+
+instrumentation.end_run()
+instrumentation.debug_panel()
+
+# Pool and cache metrics, rendered last so they include this rerun's activity
+with st.sidebar.expander("Connection Pool"):
+    st.json(pool.stats())
+
+if section_timings:
+    section_timings['total'] = sum(section_timings.values())
+    st.session_state.setdefault('section_timings', {})[section] = section_timings
+
+with st.sidebar.expander("Section Load Timings"):
+    timings = st.session_state.get('section_timings', {})
+    if timings:
+        st.dataframe(pd.DataFrame(timings).T.mul(1000).round(2).add_suffix(' (ms)'))
+    else:
+        st.write("No data loaded yet.")
+
+with st.sidebar.expander("Query Cache"):
+    cache_stats = query_cache.stats()
+    st.metric("Hit Rate", f"{cache_stats['hit_rate'] * 100:.0f}%",
+              f"{cache_stats['hits']} hits / {cache_stats['misses']} misses")
+    st.metric("Warehouse Time Saved", f"{cache_stats['saved_seconds']:.2f}s")
+    st.json(cache_stats)
+
+with st.sidebar.expander("Figure Cache"):
+    st.json(figures.stats())
+
+with st.sidebar.expander("Scenario Cache"):
+    st.json(scenarios.stats())
+
+with st.sidebar.expander("Lazy Imports"):
+    st.json(lazy_imports.stats())
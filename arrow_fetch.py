@@ -0,0 +1,81 @@
+import pandas as pd
+
+from schema import load_schemas
+
+
+def column_dtypes(sql_columns, dataset=None):
+    """Pandas dtypes for `sql_columns`, taken from data_schema.yaml.
+
+    Looks in the `dataset` section when given, otherwise in every section.
+    Columns the schema does not describe are left to pandas (None).
+    """
+    schemas = load_schemas()
+    sections = [schemas[dataset]] if dataset in schemas else list(schemas.values())
+    dtypes = []
+    for column in sql_columns:
+        found = [schema.dtypes[column] for schema in sections if column in schema.dtypes]
+        dtypes.append(found[0] if found else None)
+    return dtypes
+
+
+def _apply_dtypes(frame, columns, dtypes):
+    frame.columns = columns
+    if dtypes:
+        casts = {column: dtype for column, dtype in zip(columns, dtypes) if dtype is not None}
+        if casts:
+            frame = frame.astype(casts, copy=False)
+    return frame
+
+
+def _empty_frame(columns, dtypes):
+    frame = pd.DataFrame({column: pd.Series(dtype=object) for column in columns})
+    return _apply_dtypes(frame, columns, dtypes)
+
+
+def fetch_frame(cursor, query, columns, dtypes=None, params=None):
+    """Run `query` and return the full result as a DataFrame.
+
+    Uses the Snowflake connector's Arrow result batches when the cursor
+    supports them, so no per-row Python tuples are created. Other DB-API
+    cursors (e.g. sqlite3) fall back to `fetchall()`.
+    """
+    if params is None:
+        cursor.execute(query)
+    else:
+        cursor.execute(query, params)
+
+    if hasattr(cursor, 'fetch_arrow_all'):
+        table = cursor.fetch_arrow_all()
+        # The connector returns None for an empty result set
+        if table is None:
+            return _empty_frame(columns, dtypes)
+        return _apply_dtypes(table.to_pandas(), columns, dtypes)
+
+    rows = cursor.fetchall()
+    if not rows:
+        return _empty_frame(columns, dtypes)
+    return _apply_dtypes(pd.DataFrame.from_records(rows), columns, dtypes)
+
+
+def iter_frames(cursor, query, columns, dtypes=None, params=None, batch_size=100000):
+    """Yield the result of `query` as a sequence of DataFrame batches.
+
+    Only one batch is materialised at a time, so arbitrarily large tables can
+    be aggregated in bounded memory. Arrow-capable cursors yield the
+    connector's own result batches; others are read with `fetchmany`.
+    """
+    if params is None:
+        cursor.execute(query)
+    else:
+        cursor.execute(query, params)
+
+    if hasattr(cursor, 'fetch_arrow_batches'):
+        for table in cursor.fetch_arrow_batches():
+            yield _apply_dtypes(table.to_pandas(), columns, dtypes)
+        return
+
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield _apply_dtypes(pd.DataFrame.from_records(rows), columns, dtypes)
@@ -0,0 +1,91 @@
+"""Time allocation.AllocationPlan on synthetic districts and check it
+against scipy's LP solver.
+
+    python benchmarks/bench_allocation.py --districts 5000
+
+Reports the one-off plan build, a cold solve, the average re-solve while
+sweeping the app's 0-100% slider in 1% steps, and the same LP solved from
+scratch by HiGHS for one budget.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import linprog
+from scipy.sparse import csr_matrix, vstack
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from allocation import SPENT_SHARE, STAGES, AllocationPlan  # noqa: E402
+
+
+def synthetic_stages(districts):
+    rng = np.random.default_rng(0)
+    total = rng.integers(500, 50000, districts).astype(float)
+    parts = np.floor(rng.dirichlet(np.ones(len(STAGES) + 1), districts) * total[:, None])
+    frame = pd.DataFrame(parts[:, 1:], columns=STAGES)
+    frame.insert(0, 'completed', parts[:, 0])
+    frame.insert(0, 'beneficiary_selection', total)
+    frame.insert(0, 'district', [f"District_{i}" for i in range(districts)])
+    unit_cost = pd.Series(rng.uniform(1.2, 2.5, districts), index=frame['district'])
+    return frame, unit_cost
+
+
+def solve_lp(stages, unit_cost, budget, target=100):
+    # Maximize the gap closed subject to the budget and each district's need
+    districts = len(stages)
+    total = stages['beneficiary_selection'].to_numpy()
+    counts = stages[STAGES].to_numpy()
+    cost = unit_cost.to_numpy()[:, None] * (1 - np.array([SPENT_SHARE[stage] for stage in STAGES]))
+    needed = np.clip(target / 100 * total - stages['completed'].to_numpy(), 0, None)
+    per_district = csr_matrix((np.ones(counts.size), np.repeat(np.arange(districts), len(STAGES)),
+                               np.arange(counts.size + 1))).T
+    result = linprog(
+        -np.repeat(100 / total, len(STAGES)),
+        A_ub=vstack([csr_matrix(cost.ravel()), per_district]),
+        b_ub=np.concatenate([[budget], needed]),
+        bounds=np.column_stack([np.zeros(counts.size), counts.ravel()]),
+        method='highs',
+    )
+    return -result.fun
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--districts', type=int, default=5000)
+    args = parser.parse_args()
+
+    stages, unit_cost = synthetic_stages(args.districts)
+
+    started = time.perf_counter()
+    plan = AllocationPlan(stages, unit_cost)
+    build = time.perf_counter() - started
+
+    budget = plan.spent * 0.25
+    started = time.perf_counter()
+    result = plan.solve(budget)
+    cold = time.perf_counter() - started
+
+    sweep = np.concatenate([np.arange(0, 101), np.arange(100, -1, -1)]) / 100 * plan.spent
+    started = time.perf_counter()
+    for step in sweep:
+        plan.solve(step)
+    warm = (time.perf_counter() - started) / len(sweep)
+
+    started = time.perf_counter()
+    optimum = solve_lp(stages, unit_cost, budget)
+    lp = time.perf_counter() - started
+    closed = (plan.solve(budget)['simulated_completion_rate'] - result['completion_rate']).sum()
+    assert np.isclose(closed, optimum, rtol=1e-6), (closed, optimum)
+
+    print(f"{args.districts:,} districts x {len(STAGES)} stages")
+    print(f"  plan build           : {build * 1000:8.2f} ms")
+    print(f"  cold solve           : {cold * 1000:8.2f} ms")
+    print(f"  slider re-solve (avg): {warm * 1000:8.2f} ms")
+    print(f"  HiGHS LP, one budget : {lp * 1000:8.2f} ms  (same optimum: {optimum:,.2f} points)")
+
+
+if __name__ == '__main__':
+    main()
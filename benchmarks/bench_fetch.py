@@ -0,0 +1,148 @@
+"""Compare the fetchall() -> DataFrame path with the Arrow fetch paths.
+
+Uses fake cursors that simulate the Snowflake connector's result batches, so
+no warehouse is needed. Each mode runs in a fresh interpreter so peak RSS is
+measured independently:
+
+    python benchmarks/bench_fetch.py --rows 1000000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from arrow_fetch import column_dtypes, fetch_frame, iter_frames  # noqa: E402
+
+SQL_COLUMNS = ['sl_no', 'district', 'beneficiary_selection', 'completed', 'foundation',
+               'lintel', 'roof', 'progress_total', 'unstarted']
+COLUMNS = ['Sl.No', 'District', 'Beneficiary Selection', 'Completed', 'Foundation',
+           'Lintel', 'Roof', 'Progress Total', 'Unstarted']
+MODES = ['fetchall', 'arrow', 'stream']
+
+
+def _result_batches(rows, batch_rows):
+    # Simulates the server-side result chunks the connector downloads
+    rng = np.random.default_rng(0)
+    districts = np.array([f"District_{i}" for i in range(700)], dtype=object)
+    for start in range(0, rows, batch_rows):
+        n = min(batch_rows, rows - start)
+        selection = rng.integers(100, 20000, n).astype(np.float64)
+        yield pa.table({
+            'SL_NO': np.arange(start + 1, start + n + 1, dtype=np.int64),
+            'DISTRICT': districts[rng.integers(0, len(districts), n)],
+            'BENEFICIARY_SELECTION': selection,
+            'COMPLETED': np.floor(selection * rng.random(n)),
+            'FOUNDATION': rng.integers(0, 1000, n).astype(np.float64),
+            'LINTEL': rng.integers(0, 1000, n).astype(np.float64),
+            'ROOF': rng.integers(0, 1000, n).astype(np.float64),
+            'PROGRESS_TOTAL': rng.integers(0, 3000, n).astype(np.float64),
+            'UNSTARTED': rng.integers(0, 10000, n).astype(np.float64),
+        })
+
+
+class FakeRowCursor:
+    """Cursor with only the DB-API row interface (fetchall/fetchmany)."""
+
+    def __init__(self, rows, batch_rows):
+        self.rows = rows
+        self.batch_rows = batch_rows
+
+    def execute(self, query, params=None):
+        self._batches = _result_batches(self.rows, self.batch_rows)
+        self._pending = []
+
+    def fetchall(self):
+        out = []
+        for table in self._batches:
+            out.extend(zip(*(column.to_pylist() for column in table.columns)))
+        return out
+
+    def fetchmany(self, size):
+        while len(self._pending) < size:
+            table = next(self._batches, None)
+            if table is None:
+                break
+            self._pending.extend(zip(*(column.to_pylist() for column in table.columns)))
+        out, self._pending = self._pending[:size], self._pending[size:]
+        return out
+
+
+class FakeArrowCursor(FakeRowCursor):
+    """Adds the connector's Arrow result-batch interface."""
+
+    def fetch_arrow_all(self):
+        return pa.concat_tables(list(self._batches))
+
+    def fetch_arrow_batches(self):
+        yield from self._batches
+
+
+def _peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_mode(mode, rows, batch_rows):
+    dtypes = column_dtypes(SQL_COLUMNS)
+    query = f"SELECT {', '.join(SQL_COLUMNS)} FROM pmay_data"
+    baseline = _peak_rss_mb()
+    started = time.perf_counter()
+
+    if mode == 'fetchall':
+        cursor = FakeRowCursor(rows, batch_rows)
+        cursor.execute(query)
+        frame = pd.DataFrame(cursor.fetchall(), columns=COLUMNS)
+        checksum = frame['Completed'].sum()
+    elif mode == 'arrow':
+        frame = fetch_frame(FakeArrowCursor(rows, batch_rows), query, COLUMNS, dtypes)
+        checksum = frame['Completed'].sum()
+    else:
+        # Aggregate per district batch by batch, never holding the full table
+        totals = None
+        for batch in iter_frames(FakeArrowCursor(rows, batch_rows), query, COLUMNS, dtypes):
+            sums = batch.groupby('District')['Completed'].sum()
+            totals = sums if totals is None else totals.add(sums, fill_value=0)
+        checksum = totals.sum()
+
+    elapsed = time.perf_counter() - started
+    return {
+        'mode': mode,
+        'rows': rows,
+        'seconds': round(elapsed, 3),
+        'rows_per_sec': round(rows / elapsed),
+        'peak_rss_mb': round(_peak_rss_mb() - baseline, 1),
+        'checksum': float(checksum),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--batch-rows', type=int, default=100000)
+    parser.add_argument('--mode', choices=MODES)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.rows, args.batch_rows)))
+        return
+
+    print(f"{'mode':<10}{'rows/sec':>14}{'seconds':>10}{'peak RSS (MB)':>16}")
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, __file__, '--mode', mode, '--rows', str(args.rows),
+             '--batch-rows', str(args.batch_rows)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output)
+        print(f"{mode:<10}{result['rows_per_sec']:>14,}{result['seconds']:>10}{result['peak_rss_mb']:>16}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Compare fitting one scikit-learn LinearRegression per district with the
+batched forecast.fit, and the cost of a single district's prediction.
+
+    python benchmarks/bench_forecast.py --districts 5000 --snapshots 24
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import forecast  # noqa: E402
+
+
+def synthetic_history(districts, snapshots):
+    rng = np.random.default_rng(0)
+    periods = 2020 + np.arange(snapshots) / 4
+    slopes = rng.uniform(0, 8, districts)
+    return pd.DataFrame({
+        'region': np.repeat([f"District_{i}" for i in range(districts)], snapshots),
+        'period': np.tile(periods, districts),
+        'value': (rng.uniform(10, 60, districts)[:, None] + slopes[:, None] * (periods - 2020)
+                  + rng.normal(0, 3, (districts, snapshots))).ravel(),
+    })
+
+
+def per_district(history, years):
+    predictions = {}
+    for region, group in history.groupby('region', sort=False):
+        model = LinearRegression().fit(group[['period']].to_numpy(), group['value'].to_numpy())
+        predictions[region] = model.predict(years.reshape(-1, 1))
+    return predictions
+
+
+def timed(func, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--districts', type=int, default=5000)
+    parser.add_argument('--snapshots', type=int, default=24)
+    args = parser.parse_args()
+
+    history = synthetic_history(args.districts, args.snapshots)
+    years = np.arange(2026, 2031, dtype=float)
+
+    slow, expected = timed(per_district, history, years, repeat=1)
+    fast, model = timed(lambda: forecast.fit(history, alpha=0.0))
+    for region in list(expected)[:100]:
+        assert np.allclose(model.predict(region, years, -np.inf, np.inf)['prediction'], expected[region])
+
+    region = history['region'].iloc[-1]
+    lookup, _ = timed(model.predict, region, years, repeat=100)
+
+    print(f"{args.districts:,} districts x {args.snapshots} snapshots")
+    print(f"  per-district LinearRegression : {slow * 1000:10.1f} ms")
+    print(f"  batched fit                   : {fast * 1000:10.1f} ms  ({slow / fast:,.0f}x)")
+    print(f"  one district's prediction     : {lookup * 1e6:10.1f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Time montecarlo.run in process and across worker processes.
+
+    python benchmarks/bench_montecarlo.py --districts 700 --trials 100000 --workers 2 4
+
+A per-trial Python loop over the same model is timed on 1,000 trials and
+scaled up for comparison. Every run must give identical bands, whatever the
+number of workers.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import montecarlo  # noqa: E402
+
+
+def per_trial(current, velocity, horizon, trials, velocity_cv=0.3, funding_cv=0.2, seed=0):
+    rng = np.random.default_rng(seed)
+    sigma_v = np.sqrt(np.log1p(velocity_cv ** 2))
+    sigma_f = np.sqrt(np.log1p(funding_cv ** 2))
+    outcomes = []
+    for _ in range(trials):
+        funding = rng.lognormal(-sigma_f ** 2 / 2, sigma_f)
+        outcomes.append([
+            min(max(rate + pace * horizon * funding * rng.lognormal(-sigma_v ** 2 / 2, sigma_v), 0), 100)
+            for rate, pace in zip(current, velocity)
+        ])
+    return np.percentile(outcomes, [10, 50, 90], axis=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--districts', type=int, default=700)
+    parser.add_argument('--trials', type=int, default=100_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    regions = [f"District_{i}" for i in range(args.districts)]
+    current = rng.uniform(5, 95, args.districts)
+    velocity = montecarlo.baseline_velocity(current)
+    horizon = 5.0
+
+    started = time.perf_counter()
+    per_trial(current, velocity, horizon, 1000)
+    loop = (time.perf_counter() - started) * args.trials / 1000
+
+    started = time.perf_counter()
+    baseline = montecarlo.run(regions, current, velocity, horizon, args.trials).summary()
+    vectorized = time.perf_counter() - started
+
+    print(f"{args.districts:,} districts x {args.trials:,} trials ({os.cpu_count()} CPUs)")
+    print(f"  per-trial loop (scaled): {loop:8.2f} s")
+    print(f"  vectorized, in process : {vectorized:8.2f} s")
+    for workers in [count for count in args.workers if count > 1]:
+        executor = montecarlo.create_executor(workers)
+        # Start the workers before timing; the dashboard keeps them alive
+        list(executor.map(abs, range(workers)))
+        started = time.perf_counter()
+        summary = montecarlo.run(regions, current, velocity, horizon, args.trials, executor=executor).summary()
+        elapsed = time.perf_counter() - started
+        executor.shutdown()
+        assert summary.equals(baseline)
+        print(f"  {workers} worker processes    : {elapsed:8.2f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Compare the per-state list comprehension dashboard2.py used for its
+"Performance Metrics" tab with the indexed performance_metrics table.
+
+    python benchmarks/bench_performance.py --regions 10000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from performance_metrics import RADAR_CATEGORIES, performance_table, select_states  # noqa: E402
+
+
+def synthetic_frames(regions):
+    rng = np.random.default_rng(0)
+    states = [f"Region_{i}" for i in range(regions)]
+    sanctioned = rng.integers(1000, 2000000, regions).astype(float)
+    pmay = pd.DataFrame({
+        'State': states,
+        'Houses_Sanctioned': sanctioned,
+        'Houses_Completed': np.floor(sanctioned * rng.random(regions)),
+        'Fund_Utilized_Cr': rng.integers(100, 30000, regions).astype(float),
+        'Average_Construction_Time_Days': rng.integers(120, 240, regions),
+        'Cost_Per_Unit_Lakhs': rng.uniform(2.5, 4.5, regions),
+    })
+    sanitation = pd.DataFrame({'State': states})
+    for category in RADAR_CATEGORIES:
+        sanitation[category] = rng.integers(50, 100, regions)
+    return pmay, sanitation
+
+
+def per_state(pmay, sanitation, completion_rate, selected):
+    # The original implementation: two boolean masks per selected state for
+    # the table and one more per state for the radar chart
+    metrics = pd.DataFrame({
+        'State': selected,
+        'Implementation_Efficiency': completion_rate.reindex(selected).to_numpy(),
+        'Fund_Utilization_Rate': [
+            (pmay[pmay['State'] == state]['Fund_Utilized_Cr'].iloc[0] /
+             pmay[pmay['State'] == state]['Houses_Sanctioned'].iloc[0] * 100)
+            for state in selected
+        ]
+    })
+    radar = [sanitation[sanitation['State'] == state][RADAR_CATEGORIES].iloc[0].tolist() for state in selected]
+    return metrics, radar
+
+
+def indexed(pmay, sanitation, completion_rate, selected):
+    selection = select_states(performance_table(pmay, sanitation, completion_rate), selected)
+    metrics = selection[['Implementation_Efficiency', 'Fund_Utilization_Rate']].reset_index()
+    return metrics, selection[RADAR_CATEGORIES].to_numpy().tolist()
+
+
+def timed(func, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--regions', type=int, default=10000)
+    args = parser.parse_args()
+
+    pmay, sanitation = synthetic_frames(args.regions)
+    completion_rate = pmay.set_index('State')['Houses_Completed'] / pmay.set_index('State')['Houses_Sanctioned'] * 100
+    selected = list(pmay['State'])
+
+    slow, (slow_metrics, slow_radar) = timed(per_state, pmay, sanitation, completion_rate, selected, repeat=1)
+    fast, (fast_metrics, fast_radar) = timed(indexed, pmay, sanitation, completion_rate, selected)
+    pd.testing.assert_frame_equal(slow_metrics, fast_metrics, check_dtype=False)
+    assert np.allclose(slow_radar, fast_radar)
+
+    print(f"{args.regions:,} regions, all selected")
+    print(f"  per-state masks : {slow * 1000:10.1f} ms")
+    print(f"  indexed table   : {fast * 1000:10.1f} ms  ({slow / fast:,.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
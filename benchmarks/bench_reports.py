@@ -0,0 +1,95 @@
+"""Time the report charts rendered the way graph.py drew them against
+reports.render_all with reused figures, worker processes and skipping.
+
+    python benchmarks/bench_reports.py --states 36 --quarters 12 --workers 2 4
+
+Inputs are synthetic: the allocation of synthetic.py's PMAY districts and a
+quarterly sanitation history for `--states` states. The baseline creates a
+new figure for every chart and renders them one after another.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import reports  # noqa: E402
+import graph  # noqa: E402
+import synthetic  # noqa: E402
+from allocation import AllocationPlan  # noqa: E402
+from schema import get_schema  # noqa: E402
+from matplotlib import pyplot as plt  # noqa: E402
+
+
+def synthetic_inputs(districts, states, quarters):
+    stages = get_schema('pmay').normalize_columns(synthetic.generate('pmay', districts))
+    plan = AllocationPlan(stages)
+    allocation = plan.solve(plan.spent * graph.BUDGET_INCREASE).nlargest(graph.TOP_REGIONS, 'budget')
+    allocation = pd.DataFrame({
+        'Allocated Resources': allocation['budget'],
+        'Completion Rate (%)': allocation['completion_rate'],
+    }, index=pd.Index(allocation.index, name='Region'))
+
+    rng = np.random.default_rng(0)
+    dates = pd.date_range('2022-01-01', periods=quarters, freq='QS')
+    total = np.repeat(rng.integers(100, 100_000, states), quarters).astype(float)
+    completed = np.floor(total * np.tile(np.linspace(0.1, 0.9, quarters), states))
+    history = pd.DataFrame({
+        'region': np.repeat(synthetic.region_names(states), quarters),
+        'date': np.tile(dates, states),
+        'completed': completed,
+        'total': total,
+        'completion_rate': completed / total * 100,
+    })
+    history['quarter'] = history['date'].dt.to_period('Q').astype(str)
+    return allocation, history
+
+
+def fresh_figures(jobs, out, formats):
+    for chart, scope, data in jobs:
+        fig, ax = plt.subplots(figsize=graph.CHARTS[chart][0])
+        graph.CHARTS[chart][1](ax, data)
+        for fmt in formats:
+            path = os.path.join(out, reports.output_path(chart, scope, fmt))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fig.savefig(path, bbox_inches='tight')
+        plt.close(fig)
+
+
+def timed(func, *args, **kwargs):
+    started = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--districts', type=int, default=700)
+    parser.add_argument('--states', type=int, default=36)
+    parser.add_argument('--quarters', type=int, default=12)
+    parser.add_argument('--formats', nargs='+', default=['png'])
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4])
+    args = parser.parse_args()
+
+    jobs = reports.jobs(*synthetic_inputs(args.districts, args.states, args.quarters))
+    out = tempfile.mkdtemp(prefix='dashboard-reports-')
+    try:
+        print(f"{len(jobs)} charts x {len(args.formats)} formats")
+        print(f"  new figure per chart : {timed(fresh_figures, jobs, out, args.formats):8.2f} s")
+        for workers in [1] + args.workers:
+            shutil.rmtree(out)
+            seconds = timed(reports.render_all, jobs, out, args.formats, workers)
+            print(f"  render_all, {workers} worker{'s' if workers > 1 else ' '} : {seconds:8.2f} s")
+        seconds = timed(reports.render_all, jobs, out, args.formats, 1)
+        print(f"  rerun, data unchanged : {seconds:8.2f} s")
+    finally:
+        shutil.rmtree(out, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
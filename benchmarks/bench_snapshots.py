@@ -0,0 +1,66 @@
+"""Time snapshot history queries as the history grows.
+
+    python benchmarks/bench_snapshots.py --regions 700 --snapshots 100 1000
+
+For each history size, a fresh store gets that many daily snapshots of
+`--regions` regions; the query reads three regions' raw series over the
+last 90 days and their full yearly rollup.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import snapshots  # noqa: E402
+
+
+def fill(path, regions, count):
+    rng = np.random.default_rng(0)
+    names = [f"Region_{i}" for i in range(regions)]
+    total = rng.integers(1000, 100000, regions).astype(float)
+    for day in pd.date_range('2015-01-01', periods=count, freq='D'):
+        completed = np.floor(total * rng.random(regions))
+        metrics = pd.DataFrame({
+            'completed': completed,
+            'total': total,
+            'completion_rate': completed / total * 100,
+        }, index=names)
+        snapshots.record('bench', metrics, taken_at=day.isoformat(timespec='seconds'), path=path)
+    return names, day
+
+
+def timed(func, repeat=20):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--regions', type=int, default=700)
+    parser.add_argument('--snapshots', type=int, nargs='+', default=[100, 1000])
+    args = parser.parse_args()
+
+    print(f"{args.regions:,} regions per snapshot; 3 regions queried")
+    with tempfile.TemporaryDirectory() as directory:
+        for count in args.snapshots:
+            path = os.path.join(directory, f"history_{count}.db")
+            names, last = fill(path, args.regions, count)
+            selected = names[:3]
+            start = last - pd.Timedelta(days=89)
+            raw = timed(lambda: snapshots.series('bench', selected, start=start, end=last, path=path))
+            yearly = timed(lambda: snapshots.series('bench', selected, grain='year', path=path))
+            print(f"  {count * args.regions:>10,} rows: last 90 days {raw * 1000:6.2f} ms, "
+                  f"yearly rollup {yearly * 1000:6.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Compare a per-district loop with the vectorized stage_flow.StageFlow.
+
+    python benchmarks/bench_stage_flow.py --districts 5000 --snapshots 12
+
+Both compute each district's stage throughput, bottleneck and years to
+clear from the same synthetic stage history and must agree.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import stage_flow  # noqa: E402
+
+STAGES = ['unstarted', 'foundation', 'lintel', 'roof']
+
+
+def synthetic_history(districts, snapshots):
+    rng = np.random.default_rng(0)
+    counts = rng.integers(0, 5000, (districts, len(STAGES) + 1)).astype(float)
+    rates = rng.uniform(0, 0.05, (districts, len(STAGES)))
+    frames = []
+    for date in pd.date_range('2024-01-01', periods=snapshots, freq='MS'):
+        frames.append(pd.DataFrame(counts, columns=STAGES + ['completed']).assign(
+            region=[f"District_{i}" for i in range(districts)], date=date))
+        moved = np.floor(counts[:, :-1] * rates)
+        counts[:, :-1] -= moved
+        counts[:, 1:] += moved
+    return pd.concat(frames, ignore_index=True)
+
+
+def per_district(history):
+    results = {}
+    for region, group in history.sort_values('date').groupby('region'):
+        first, last = group.iloc[0], group.iloc[-1]
+        years = (last['date'] - first['date']).total_seconds() / (stage_flow.DAYS_PER_YEAR * 86400)
+        # Houses leaving each stage: the growth of every stage after it
+        downstream, throughput = 0.0, {}
+        for stage, following in reversed(list(zip(STAGES, STAGES[1:] + ['completed']))):
+            downstream += last[following] - first[following]
+            throughput[stage] = max(downstream, 0) / years
+        queued, clearing = 0.0, []
+        for stage in STAGES:
+            queued += last[stage]
+            if queued == 0:
+                clearing.append(0.0)
+            else:
+                clearing.append(queued / throughput[stage] if throughput[stage] > 0 else np.inf)
+        results[region] = max(clearing)
+    return pd.Series(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--districts', type=int, default=5000)
+    parser.add_argument('--snapshots', type=int, default=12)
+    args = parser.parse_args()
+
+    history = synthetic_history(args.districts, args.snapshots)
+
+    started = time.perf_counter()
+    looped = per_district(history)
+    loop = time.perf_counter() - started
+
+    started = time.perf_counter()
+    flow = stage_flow.StageFlow(history, STAGES)
+    build = time.perf_counter() - started
+
+    started = time.perf_counter()
+    flow.ranking()
+    rank = time.perf_counter() - started
+
+    assert np.allclose(looped.reindex(flow.regions).to_numpy(), flow.years_to_clear.to_numpy())
+    print(f"{args.districts:,} districts x {args.snapshots} snapshots")
+    print(f"  per-district loop : {loop * 1000:9.2f} ms")
+    print(f"  StageFlow build   : {build * 1000:9.2f} ms")
+    print(f"  ranking           : {rank * 1000:9.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Import-time budgets for the entry points.
+
+    python benchmarks/importtime.py            # check every entry point
+    python benchmarks/importtime.py app.py -v  # one entry point, heaviest imports
+
+Runs each entry point's top-level imports (not the script itself) in a fresh
+interpreter under `python -X importtime` and sums the cumulative time of the
+top-level modules. Exits non-zero when an entry point is over its budget or
+imports a module that should only load on first use, so it can gate changes
+the same way a test would.
+"""
+import argparse
+import ast
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Milliseconds, best of --repeat runs; about 1.5x the time measured when set
+BUDGETS_MS = {
+    'streamlit_app.py': 600,
+    'app.py': 1200,
+    'dashboard.py': 1300,
+    'dashboard2.py': 1300,
+    'ingest.py': 800,
+    'build_map.py': 800,
+}
+
+# Modules that must stay out of startup: lazy_imports or function-level
+# imports load them where they are used
+DEFERRED = {
+    'sklearn', 'scipy', 'seaborn', 'snowflake.connector',
+}
+DEFERRED_BY_ENTRY = {
+    'streamlit_app.py': {'plotly.express'},
+    'app.py': {'plotly.express'},
+}
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)")
+
+
+def startup_imports(path):
+    """The entry point's module-level import statements as source."""
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def measure(entry):
+    """(total seconds, {module: cumulative seconds}) of one cold import run."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', startup_imports(os.path.join(ROOT, entry))],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode:
+        raise RuntimeError(f"{entry}: importing failed\n{result.stderr[-2000:]}")
+    modules, total = {}, 0
+    for match in LINE.finditer(result.stderr):
+        _, cumulative, indent, name = match.groups()
+        modules[name] = int(cumulative) / 1e6
+        if len(indent) == 1:
+            total += int(cumulative)
+    return total / 1e6, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('entries', nargs='*', default=list(BUDGETS_MS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('-v', '--verbose', action='store_true', help="list the ten heaviest imports")
+    args = parser.parse_args()
+
+    failures = []
+    for entry in args.entries:
+        runs = [measure(entry) for _ in range(args.repeat)]
+        total, modules = min(runs, key=lambda run: run[0])
+        budget = BUDGETS_MS.get(entry)
+        deferred = sorted(
+            name for name in modules
+            if any(name == module or name.startswith(module + '.')
+                   for module in DEFERRED | DEFERRED_BY_ENTRY.get(entry, set()))
+        )
+        over = budget is not None and total * 1000 > budget
+        status = 'FAIL' if over or deferred else 'ok'
+        print(f"{status:4} {entry:18} {total * 1000:8.1f} ms"
+              + (f" (budget {budget} ms)" if budget is not None else ""))
+        if deferred:
+            print(f"     imports deferred modules at startup: {', '.join(deferred[:5])}")
+        if args.verbose:
+            for name, seconds in sorted(modules.items(), key=lambda item: -item[1])[:10]:
+                print(f"     {seconds * 1000:8.1f} ms  {name}")
+        if status == 'FAIL':
+            failures.append(entry)
+
+    if failures:
+        sys.exit(f"over budget or importing deferred modules: {', '.join(failures)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,307 @@
+"""Time and peak memory of the dashboard's data paths at growing sizes.
+
+    python benchmarks/suite.py                                # 10^3..10^5 rows
+    python benchmarks/suite.py --sizes 1e3 1e4 1e5 1e6 1e7    # national scale
+    python benchmarks/suite.py load forecast --sizes 1e6      # some benchmarks
+    python benchmarks/suite.py --compare HEAD~1               # against a commit
+
+Every benchmark runs on synthetic data from synthetic.py: the PMAY and
+sanitation tables at each size, one row per district (or state). Time is the
+best of --repeat runs, peak memory the largest traced allocation of one
+more run under tracemalloc (NumPy and pandas buffers included, SQLite's
+own memory not). Results are appended to a JSON lines file with the commit
+they were measured at, so `--compare REV` reports the change against the
+latest results recorded for REV and exits non-zero when a benchmark is
+slower or larger than --threshold times that.
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Snapshots that ingest.py records go to a scratch database, not the app's
+WORKDIR = tempfile.mkdtemp(prefix='dashboard-bench-')
+SNAPSHOT_DB = os.environ['DASHBOARD_SNAPSHOT_DB'] = os.path.join(WORKDIR, 'snapshots.db')
+
+import plotly.express as px  # noqa: E402
+
+import forecast  # noqa: E402
+import synthetic  # noqa: E402
+from arrow_fetch import fetch_frame  # noqa: E402
+from database import connect  # noqa: E402
+from figure_factory import FigureFactory, frame_version  # noqa: E402
+from ingest import ingest_csv  # noqa: E402
+from metrics_store import compute_metrics  # noqa: E402
+from query_builder import Query  # noqa: E402
+from schema import get_schema  # noqa: E402
+
+RESULTS_PATH = os.path.join(ROOT, 'benchmarks', 'results.jsonl')
+
+# Snapshots per district in the forecast history
+FORECAST_PERIODS = 12
+
+
+class Data:
+    """Synthetic inputs of one size, generated on first use and shared by
+    every benchmark at that size."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self._cache = {}
+
+    def _get(self, name, build):
+        if name not in self._cache:
+            self._cache[name] = build()
+        return self._cache[name]
+
+    def table(self, dataset):
+        """The dataset with its SQL column names, as loaded from the database."""
+        return self._get(dataset, lambda: get_schema(dataset).normalize_columns(
+            synthetic.generate(dataset, self.rows)))
+
+    def csv(self, dataset):
+        def build():
+            path = os.path.join(WORKDIR, f"{dataset}_{self.rows}.csv")
+            synthetic.write_csv(dataset, self.rows, path)
+            return path
+        return self._get(f"{dataset}.csv", build)
+
+    def database(self):
+        """A connection to the PMAY table loaded as bench_load loads it,
+        with its materialized metrics."""
+        def build():
+            path = os.path.join(WORKDIR, f"housing_{self.rows}.db")
+            ingest_csv('pmay', self.csv('pmay'), path)
+            return connect(path)
+        return self._get('database', build)
+
+    def displayed(self, dataset):
+        """The dataset as app.py shows it: display names and completion rate."""
+        def build():
+            metrics = compute_metrics(self.table(dataset), dataset)
+            return metrics.reset_index().rename(columns={
+                'region': {'pmay': 'District', 'sanitation': 'State'}[dataset],
+                'completion_rate': 'Completion Rate (%)',
+                'gap_to_target': 'Gap to SDG Target (%)',
+            })
+        return self._get(f"{dataset}.displayed", build)
+
+    def history(self):
+        def build():
+            rng = np.random.default_rng(0)
+            regions = max(self.rows // FORECAST_PERIODS, 1)
+            start = rng.uniform(0, 60, regions)
+            speed = rng.uniform(0, 2, regions)
+            period = np.tile(np.arange(FORECAST_PERIODS, dtype=float), regions)[:self.rows]
+            codes = np.repeat(np.arange(regions), FORECAST_PERIODS)[:self.rows]
+            value = start[codes] + speed[codes] * period + rng.normal(0, 1, len(codes))
+            return pd.DataFrame({
+                'region': synthetic.region_names(regions)[codes],
+                'period': period,
+                'value': np.clip(value, 0, 100),
+            })
+        return self._get('history', build)
+
+
+# Each benchmark takes the Data of one size and returns the call to measure;
+# whatever it does before returning is setup and is not measured
+
+def bench_load(data):
+    # CSV export -> schema validation -> SQLite, then the metrics refresh
+    path, db = data.csv('pmay'), os.path.join(WORKDIR, 'housing.db')
+
+    def load():
+        # Every run starts from an empty history, as the first load would
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(SNAPSHOT_DB + suffix):
+                os.remove(SNAPSHOT_DB + suffix)
+        return ingest_csv('pmay', path, db)
+    return load
+
+
+def bench_derive(data):
+    pmay = data.table('pmay')
+    return lambda: compute_metrics(pmay, 'pmay')
+
+
+def run_query(conn):
+    # app.py's run_query on a cache miss
+    def run(sql, table, columns, dtypes=None, params=None):
+        return fetch_frame(conn.cursor(), sql, columns, dtypes, params)
+    return run
+
+
+def bench_filter(data):
+    # The Comparative Analysis query for a selection of districts
+    conn = data.database()
+    selected = data.table('pmay')['district'].iloc[::100].tolist()
+    query = Query('pmay_metrics').select('region', 'completion_rate').where_in('region', selected)
+    return lambda: query.run(run_query(conn))
+
+
+def bench_merge(data):
+    # The Combined Insights join of housing and sanitation completion rates
+    pmay = data.displayed('pmay')[['District', 'Completion Rate (%)']]
+    sanitation = data.displayed('sanitation')[['State', 'Completion Rate (%)']]
+
+    def merge():
+        combined = pd.merge(
+            pmay.rename(columns={'District': 'Region'}), sanitation.rename(columns={'State': 'Region'}),
+            on='Region', suffixes=('_Housing', '_Sanitation'), how='inner'
+        )
+        rates = ['Completion Rate (%)_Housing', 'Completion Rate (%)_Sanitation']
+        combined['Infrastructure Completion Index (%)'] = combined[rates].mean(axis=1)
+        return combined
+    return merge
+
+
+def bench_top_n(data):
+    # The Top 5 districts by completion rate
+    conn = data.database()
+    query = Query('pmay_metrics').select('region', 'completion_rate').top(5, by='completion_rate')
+    return lambda: query.run(run_query(conn))
+
+
+def bench_forecast(data):
+    history = data.history()
+    # scipy.stats is imported on first use; load it here so the first size
+    # measured is not charged for it
+    forecast.stats.t
+    return lambda: forecast.fit(history)
+
+
+def bench_figure(data):
+    # The SDG Goal Tracker's gap chart, one trace per district, through a
+    # cold FigureFactory so every run builds and compacts it
+    pmay = data.displayed('pmay')
+    return lambda: FigureFactory().get('sdg_gap', frame_version(pmay), lambda: px.bar(
+        pmay, x='District', y='Gap to SDG Target (%)', title="Gap to SDG Target by District", color='District'
+    ))
+
+
+BENCHMARKS = {
+    'load': bench_load,
+    'derive': bench_derive,
+    'filter': bench_filter,
+    'merge': bench_merge,
+    'top_n': bench_top_n,
+    'forecast': bench_forecast,
+    'figure': bench_figure,
+}
+
+# Largest size a benchmark runs at. The gap chart draws a bar trace per
+# district, about 3.5 ms each, so 10^4 districts already take over 30 s a run
+MAX_ROWS = {
+    'figure': 1_000,
+}
+
+
+def measure(call, repeat, budget):
+    """(best seconds, peak bytes): up to `repeat` timed runs, fewer once they
+    have taken `budget` seconds, then one run under tracemalloc."""
+    best, spent = float('inf'), 0.0
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        call()
+        elapsed = time.perf_counter() - started
+        best, spent = min(best, elapsed), spent + elapsed
+        if spent >= budget:
+            break
+    gc.collect()
+    tracemalloc.start()
+    try:
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def git_commit(rev='HEAD'):
+    result = subprocess.run(['git', 'rev-parse', '--short', rev], cwd=ROOT, capture_output=True, text=True)
+    return result.stdout.strip() or None
+
+
+def recorded(path, commit):
+    """Latest (seconds, peak bytes) per (benchmark, rows) recorded for `commit`."""
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            if record['commit'] == commit:
+                results[(record['benchmark'], record['rows'])] = (record['seconds'], record['peak_bytes'])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('benchmarks', nargs='*', help=f"any of {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument('--sizes', nargs='+', type=float, default=[1e3, 1e4, 1e5])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=2.0, help="seconds of timed runs per benchmark and size")
+    parser.add_argument('--output', default=RESULTS_PATH)
+    parser.add_argument('--no-record', action='store_true', help="do not append the results to --output")
+    parser.add_argument('--compare', metavar='REV', help="compare with the results recorded at this commit")
+    parser.add_argument('--threshold', type=float, default=1.5)
+    args = parser.parse_args()
+    unknown = sorted(set(args.benchmarks) - set(BENCHMARKS))
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+    names = args.benchmarks or list(BENCHMARKS)
+
+    commit = git_commit()
+    baseline = recorded(args.output, git_commit(args.compare)) if args.compare else {}
+    if args.compare and not baseline:
+        sys.exit(f"no results recorded for {args.compare} in {args.output}")
+
+    measured_at = datetime.datetime.now().isoformat(timespec='seconds')
+    regressions = []
+    print(f"commit {commit or 'unknown'}, {platform.python_implementation()} {platform.python_version()}"
+          f" on {platform.machine()}")
+    for rows in sorted(int(size) for size in args.sizes):
+        data = Data(rows)
+        for name in names:
+            if rows > MAX_ROWS.get(name, rows):
+                print(f"{name:10} {rows:>10,} rows  skipped (over {MAX_ROWS[name]:,})")
+                continue
+            seconds, peak = measure(BENCHMARKS[name](data), args.repeat, args.budget)
+            line = f"{name:10} {rows:>10,} rows {seconds * 1000:12.2f} ms {peak / 2 ** 20:10.2f} MiB"
+            before = baseline.get((name, rows))
+            if before is not None:
+                time_ratio, memory_ratio = seconds / before[0], peak / max(before[1], 1)
+                line += f"  {time_ratio:5.2f}x time {memory_ratio:5.2f}x memory"
+                if time_ratio > args.threshold or memory_ratio > args.threshold:
+                    line += "  REGRESSED"
+                    regressions.append(f"{name}@{rows:,}")
+            print(line)
+
+            if not args.no_record:
+                with open(args.output, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps({
+                        'commit': commit, 'measured_at': measured_at, 'machine': platform.node(),
+                        'python': platform.python_version(), 'benchmark': name, 'rows': rows,
+                        'seconds': seconds, 'peak_bytes': peak,
+                    }) + "\n")
+
+    if regressions:
+        sys.exit(f"slower or larger than {args.threshold}x {args.compare}: {', '.join(regressions)}")
+
+
+if __name__ == '__main__':
+    main()
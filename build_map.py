@@ -0,0 +1,249 @@
+"""Build map.html from the PMAY and sanitation tables.
+
+    python build_map.py [--db housing_sanitation.db] [--force]
+
+The page itself is small and static; data goes to map/data/ as compact
+GeoJSON of the state boundaries (with the sanitation metrics), one file per
+bundled resolution, and marker tiles of TILE_DEGREES x TILE_DEGREES.
+map/map.js draws the coarsest boundaries that look exact at the current
+zoom and loads marker tiles only when they enter the viewport. Leaflet is vendored under map/vendor/, so the map works
+offline when the repository is served over HTTP, e.g.
+
+    python -m http.server  # then open http://localhost:8000/map.html
+
+The build is skipped when the tables' data versions match the last build.
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import shutil
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from datasets import ratio_percent
+from india_geo import DISTRICT_STATES, RESOLUTIONS, boundary_path, load_boundaries, match_regions, match_states
+from metrics_store import LOCAL_DB, read, refresh_from_source
+from query_cache import probe_table_version
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+MAP_HTML = os.path.join(ROOT, "map.html")
+DATA_DIR = os.path.join(ROOT, "map", "data")
+TILE_DEGREES = 4
+
+# Bumped whenever the output format changes, to force a rebuild
+FORMAT_VERSION = 3
+
+# Leaflet's tile size; at zoom z a pixel spans 360 / (TILE_PIXELS * 2^z)
+# degrees of longitude
+TILE_PIXELS = 256
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8"/>
+    <meta name="viewport" content="width=device-width, initial-scale=1.0"/>
+    <title>India Housing &amp; Sanitation Map</title>
+    <link rel="stylesheet" href="map/vendor/leaflet/leaflet.css"/>
+    <style>
+        html, body, #map {{ width: 100%; height: 100%; margin: 0; padding: 0; }}
+        .legend {{ background: white; padding: 6px 8px; font: 12px sans-serif; line-height: 18px; }}
+        .legend i {{ width: 14px; height: 14px; float: left; margin-right: 6px; opacity: 0.8; }}
+        .unplaced {{ max-height: 40vh; max-width: 260px; overflow-y: auto; }}
+        .unplaced hr {{ margin: 4px 0; border: 0; border-top: 1px solid #ddd; }}
+    </style>
+</head>
+<body>
+    <div id="map" data-version="{version}"></div>
+    <script src="map/vendor/leaflet/leaflet.js"></script>
+    <script src="map/map.js"></script>
+</body>
+</html>
+"""
+
+
+def file_digest(path):
+    # Content rather than mtime, which differs in every checkout
+    with open(path, 'rb') as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+
+def data_version(conn):
+    tables = {table: list(probe_table_version(conn, table, "sqlite")) for table in ('pmay_data', 'sanitation_data')}
+    return {
+        'format': FORMAT_VERSION,
+        'boundaries': {resolution: file_digest(boundary_path('state', resolution)) for resolution in sorted(RESOLUTIONS)},
+        'district_states': file_digest(DISTRICT_STATES),
+        'tables': tables,
+    }
+
+
+def _centroid(geometry):
+    # Area-weighted centroid of the exterior rings
+    total = cx = cy = 0.0
+    for polygon in geometry['coordinates']:
+        ring = np.asarray(polygon[0], dtype=float)
+        x, y = ring[:, 0], ring[:, 1]
+        cross = x[:-1] * y[1:] - x[1:] * y[:-1]
+        area = cross.sum() / 2
+        if area == 0:
+            continue
+        total += area
+        cx += ((x[:-1] + x[1:]) * cross).sum() / 6
+        cy += ((y[:-1] + y[1:]) * cross).sum() / 6
+    return (cx / total, cy / total) if total else tuple(np.asarray(geometry['coordinates'][0][0][0]))
+
+
+def region_layer(boundaries, sanitation):
+    """State boundaries with the sanitation metrics as feature properties."""
+    ids = dict(zip(match_regions(sanitation.index), sanitation.itertuples()))
+    features = []
+    for feature in boundaries['features']:
+        row = ids.get(feature['id'])
+        properties = {'name': feature['properties']['name']}
+        if row is not None:
+            properties.update(completed=row.completed, total=row.total, rate=round(row.completion_rate, 2))
+        features.append({'type': 'Feature', 'properties': properties, 'geometry': feature['geometry']})
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def _marker(row):
+    return [row.name, row.dataset, row.completed, row.total, round(row.completion_rate, 2), int(row.districts)]
+
+
+def marker_tiles(boundaries, frames):
+    """Markers grouped into viewport tiles; returns (tiles, unplaced).
+
+    Each marker is [lat, lon, name, dataset, completed, total, rate,
+    districts], placed on the centroid of the region's boundary. Districts,
+    which have no boundary of their own, are summed into one marker on their
+    state's centroid (india_geo.match_states) with `districts` counting
+    them; it is 0 for a region's own marker. Regions placed neither way are
+    returned as the same rows without lat and lon.
+    """
+    centroids = {feature['id']: _centroid(feature['geometry']) for feature in boundaries['features']}
+    names = {feature['id']: feature['properties']['name'] for feature in boundaries['features']}
+    placed, districts, unplaced = [], [], []
+    for dataset, metrics in frames.items():
+        rows = metrics[['completed', 'total', 'completion_rate']].assign(
+            name=metrics.index, dataset=dataset, districts=0,
+            region_id=match_regions(metrics.index), state_id=match_states(metrics.index),
+        )
+        own = rows['region_id'].isin(centroids)
+        on_state = ~own & rows['state_id'].isin(centroids)
+        placed.append(rows[own])
+        districts.append(rows[on_state])
+        unplaced.extend(_marker(row) for row in rows[~own & ~on_state].itertuples())
+
+    districts = pd.concat(districts)
+    if not districts.empty:
+        states = districts.groupby(['dataset', 'state_id'], sort=False).agg(
+            completed=('completed', 'sum'), total=('total', 'sum'), districts=('name', 'size')
+        ).reset_index()
+        states['completion_rate'] = ratio_percent(states['completed'], states['total'])
+        states['region_id'] = states['state_id']
+        states['name'] = states['state_id'].map(names)
+        # Drawn first, under a state's own marker at the same point
+        placed.insert(0, states)
+
+    tiles = {}
+    for row in pd.concat(placed).itertuples():
+        lon, lat = centroids[row.region_id]
+        key = f"{math.floor(lat / TILE_DEGREES)}_{math.floor(lon / TILE_DEGREES)}"
+        tiles.setdefault(key, []).append([round(lat, 4), round(lon, 4)] + _marker(row))
+    return tiles, unplaced
+
+
+def max_zoom(tolerance):
+    """Deepest Leaflet zoom at which boundaries simplified with `tolerance`
+    degrees are off by at most a pixel; None when they are unsimplified."""
+    if tolerance <= 0:
+        return None
+    return math.floor(math.log2(360 / (TILE_PIXELS * tolerance)))
+
+
+def _write_json(path, value):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(value, file, separators=(',', ':'))
+
+
+def build_map(db_path=LOCAL_DB, force=False):
+    """Regenerate map.html and map/data/; returns a summary dict, with
+    `rebuilt` False when the data version is unchanged."""
+    conn = sqlite3.connect(db_path)
+    try:
+        version = data_version(conn)
+        version_path = os.path.join(DATA_DIR, 'version.json')
+        if not force and os.path.exists(version_path) and os.path.exists(MAP_HTML):
+            with open(version_path, encoding='utf-8') as file:
+                if json.load(file) == version:
+                    return {'rebuilt': False, 'version': version}
+
+        frames = {}
+        for source in ('pmay', 'sanitation'):
+            # Same version format as app.py, so the two never fight over it
+            refresh_from_source(conn, source, tuple(version['tables'][f"{source}_data"]))
+            frames[source] = read(conn, source).set_index('region')
+    finally:
+        conn.close()
+
+    # Coarsest first, so map.js takes the first one good enough for its zoom
+    resolutions = sorted(RESOLUTIONS, key=RESOLUTIONS.get, reverse=True)
+    tiles, unplaced = marker_tiles(load_boundaries('state', 'high'), frames)
+
+    # Write into a fresh directory and swap it in, so a browser never mixes
+    # files from two builds
+    staging = DATA_DIR + '.tmp'
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(os.path.join(staging, 'markers'))
+    for resolution in resolutions:
+        _write_json(
+            os.path.join(staging, f"regions_{resolution}.geojson"),
+            region_layer(load_boundaries('state', resolution), frames['sanitation'])
+        )
+    _write_json(os.path.join(staging, 'regions.json'), [
+        {'resolution': resolution, 'max_zoom': max_zoom(RESOLUTIONS[resolution])} for resolution in resolutions
+    ])
+    for key, markers in tiles.items():
+        _write_json(os.path.join(staging, 'markers', f"{key}.json"), markers)
+    _write_json(os.path.join(staging, 'markers', 'index.json'), {'tile_degrees': TILE_DEGREES, 'tiles': sorted(tiles)})
+    # Listed beside the map rather than dropped
+    _write_json(os.path.join(staging, 'unplaced.json'), unplaced)
+    _write_json(os.path.join(staging, 'version.json'), version)
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+    os.replace(staging, DATA_DIR)
+
+    with open(MAP_HTML, 'w', encoding='utf-8') as file:
+        tag = hashlib.sha1(json.dumps(version, sort_keys=True).encode()).hexdigest()[:12]
+        file.write(PAGE.format(version=tag))
+
+    return {
+        'rebuilt': True,
+        'version': version,
+        'markers': sum(len(markers) for markers in tiles.values()),
+        'tiles': len(tiles),
+        'unplaced': unplaced,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build map.html from the PMAY and sanitation tables.")
+    parser.add_argument('--db', default=LOCAL_DB)
+    parser.add_argument('--force', action='store_true', help="rebuild even if the data version is unchanged")
+    args = parser.parse_args()
+
+    summary = build_map(args.db, args.force)
+    if not summary['rebuilt']:
+        print("map.html is up to date")
+        return
+    print(f"Built map.html: {summary['markers']} markers in {summary['tiles']} tiles")
+    if summary['unplaced']:
+        print(f"{len(summary['unplaced'])} regions have no boundary in geo/ and are listed beside the map: "
+              f"{', '.join(row[0] for row in summary['unplaced'])}")
+
+
+if __name__ == '__main__':
+    main()
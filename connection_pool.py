@@ -0,0 +1,217 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class _PooledConnection:
+    def __init__(self, raw):
+        self.raw = raw
+        self.last_used = time.monotonic()
+
+
+class ConnectionPool:
+    """Thread-safe pool of pre-warmed database connections.
+
+    `connect` is a zero-argument callable returning a DB-API connection.
+    Connections idle for longer than `validate_after` seconds are
+    health-checked with `health_query` before being handed out and are
+    transparently replaced when the check fails.
+    """
+
+    def __init__(self, connect, size=4, warm=2, validate_after=60.0,
+                 checkout_timeout=30.0, health_query="SELECT 1",
+                 backend="generic", paramstyle="qmark"):
+        self._connect = connect
+        self.size = size
+        self.validate_after = validate_after
+        self.checkout_timeout = checkout_timeout
+        self.health_query = health_query
+        self.backend = backend
+        self.paramstyle = paramstyle
+
+        self._idle = []
+        self._open = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_seconds': 0.0,
+            'created': 0,
+            'reconnects': 0,
+            'health_checks': 0,
+            'failed_health_checks': 0,
+        }
+
+        # Pre-warm so the first rerun does not pay for the login handshake
+        for _ in range(min(warm, size)):
+            self._idle.append(self._create())
+            self._open += 1
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _create(self):
+        conn = _PooledConnection(self._connect())
+        self._count('created')
+        return conn
+
+    def _is_healthy(self, conn):
+        self._count('health_checks')
+        try:
+            is_closed = getattr(conn.raw, 'is_closed', None)
+            if callable(is_closed) and is_closed():
+                raise ConnectionError("connection closed")
+            cursor = conn.raw.cursor()
+            try:
+                cursor.execute(self.health_query)
+                cursor.fetchall()
+            finally:
+                cursor.close()
+            return True
+        except Exception:
+            self._count('failed_health_checks')
+            return False
+
+    def _replace(self, conn):
+        try:
+            conn.raw.close()
+        except Exception:
+            pass
+        self._count('reconnects')
+        return self._create()
+
+    def _acquire(self):
+        deadline = time.monotonic() + self.checkout_timeout
+        waited = False
+        wait_started = None
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    conn = None
+                    break
+                if not waited:
+                    waited = True
+                    wait_started = time.monotonic()
+                    self._count('waits')
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(
+                        f"No connection available after {self.checkout_timeout:.0f}s")
+                self._cond.wait(remaining)
+            self._count('checkouts')
+            if waited:
+                self._count('wait_seconds', time.monotonic() - wait_started)
+
+        # Connecting and health checks happen outside the lock
+        try:
+            if conn is None:
+                conn = self._create()
+            elif time.monotonic() - conn.last_used > self.validate_after and not self._is_healthy(conn):
+                conn = self._replace(conn)
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        return conn
+
+    def _release(self, conn, broken=False):
+        with self._cond:
+            if broken or self._closed:
+                self._open -= 1
+                try:
+                    conn.raw.close()
+                except Exception:
+                    pass
+            else:
+                conn.last_used = time.monotonic()
+                self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the duration of the `with` block."""
+        conn = self._acquire()
+        broken = False
+        try:
+            yield conn.raw
+        except Exception:
+            # Errors may leave the session unusable, so validate before reuse
+            broken = not self._is_healthy(conn)
+            raise
+        finally:
+            self._release(conn, broken=broken)
+
+    def stats(self):
+        with self._cond, self._stats_lock:
+            stats = dict(self._stats)
+            stats['open'] = self._open
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._open - len(self._idle)
+            stats['size'] = self.size
+        return stats
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            try:
+                conn.raw.close()
+            except Exception:
+                pass
+
+
+def snowflake_connect():
+    # Imported here so the local backend works without the connector installed
+    import snowflake.connector
+
+    return snowflake.connector.connect(
+        user=os.getenv("SNOWFLAKE_USER"),
+        password=os.getenv("SNOWFLAKE_PASSWORD"),
+        account=os.getenv("SNOWFLAKE_ACCOUNT"),
+        warehouse=os.getenv("SNOWFLAKE_WAREHOUSE"),
+        database=os.getenv("SNOWFLAKE_DATABASE"),
+        schema=os.getenv("SNOWFLAKE_SCHEMA"),
+        client_session_keep_alive=True
+    )
+
+
+def sqlite_connect(path):
+    def connect():
+        # Streamlit runs each session in its own thread
+        return sqlite3.connect(path, check_same_thread=False)
+    return connect
+
+
+def create_pool_from_env():
+    """Build a pool for the backend named by DASHBOARD_BACKEND.
+
+    `snowflake` (default) uses the SNOWFLAKE_* credentials; `sqlite` uses the
+    local database at DASHBOARD_SQLITE_PATH, handy for offline development.
+    """
+    backend = os.getenv("DASHBOARD_BACKEND", "snowflake").lower()
+    size = int(os.getenv("DASHBOARD_POOL_SIZE", "4"))
+    if backend == "sqlite":
+        path = os.getenv("DASHBOARD_SQLITE_PATH", "housing_sanitation.db")
+        return ConnectionPool(sqlite_connect(path), size=size, backend="sqlite", paramstyle="qmark")
+    if backend == "snowflake":
+        return ConnectionPool(snowflake_connect, size=size, backend="snowflake", paramstyle="pyformat")
+    raise ValueError(f"Unsupported DASHBOARD_BACKEND: {backend}")
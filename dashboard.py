@@ -6,13 +6,22 @@ from datetime import datetime
 import numpy as np
 from io import StringIO
 import os
-# Set page configuration
-st.set_page_config(
-    page_title="India Housing & Sanitation Dashboard",
-    page_icon="🏠",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
+from figure_factory import frame_version
+from resources import get_figure_factory
+from page_config import in_multipage_app, set_page_config
+import instrumentation
+from instrumentation import span
+from india_geo import choropleth
+from metrics_store import local_metrics
+from schema import SCHEMA_PATH
+from upload_cache import UploadCache, file_digest
+from upload_stream import UploadRejected, stream_upload
+
+# Only takes effect when the page is run on its own
+set_page_config(page_icon="🏠")
+
+# Timed as one rerun of the page (see ?debug=1)
+instrumentation.start_run("India Overview", page='dashboard')
 
 # Enhanced Custom CSS
 st.markdown("""
@@ -54,10 +63,58 @@ st.sidebar.header("Data Upload")
 pmay_file = st.sidebar.file_uploader("Upload PMAY Data (CSV)", type=['csv'])
 sanitation_file = st.sidebar.file_uploader("Upload Sanitation Data (CSV)", type=['csv'])
 
-@st.cache_data
-def load_data(pmay_file, sanitation_file):
+# Parsed uploads are kept on disk as Parquet, keyed on their content digest
+@st.cache_resource
+def get_upload_cache():
+    return UploadCache()
+
+def upload_key(upload, dataset):
+    # Digest each uploaded file once per session instead of on every rerun
+    if upload is None:
+        return None
+    digests = st.session_state.setdefault('upload_digests', {})
+    if upload.file_id not in digests:
+        digests[upload.file_id] = file_digest(upload)
+    return f"{dataset}-{os.stat(SCHEMA_PATH).st_mtime_ns}-{digests[upload.file_id]}"
+
+def read_upload(upload, key, dataset, problems):
+    cache = get_upload_cache()
+    cached = cache.get(key)
+    if cached is not None:
+        clean, metadata = cached
+        rejected = pd.Series(metadata['rejected'], dtype=object)
+        rejected.index = rejected.index.astype(int)
+        problems[upload.name] = (None, rejected, metadata['rejected_count'], metadata['aggregated'])
+        return clean
+
+    # Uploads are parsed in chunks and checked against data_schema.yaml;
+    # a file without the required columns is rejected after the first chunk
+    progress = st.sidebar.progress(0.0, text=f"Reading {upload.name}")
+    try:
+        result = stream_upload(upload, dataset, progress=progress.progress)
+    except UploadRejected as exc:
+        problems[upload.name] = (str(exc), None, 0, False)
+        return None
+    finally:
+        progress.empty()
+
+    clean = result.frame
+    clean['State'] = clean['State'].astype('category')
+    problems[upload.name] = (None, result.rejected, result.rejected_count, result.aggregated)
+    cache.put(key, clean, {
+        'rejected': {str(line): reason for line, reason in result.rejected.items()},
+        'rejected_count': result.rejected_count,
+        'aggregated': result.aggregated,
+    })
+    return clean
+
+# Only the digests are hashed; the file objects are passed through unhashed
+@st.cache_data(max_entries=8)
+def load_data(pmay_key, sanitation_key, _pmay_file, _sanitation_file):
+    problems = {}
+    pmay_file, sanitation_file = _pmay_file, _sanitation_file
     if pmay_file is not None:
-        pmay_data = pd.read_csv(pmay_file)
+        pmay_data = read_upload(pmay_file, pmay_key, 'pmay_state', problems)
     else:
         # Sample PMAY data
         pmay_data = pd.DataFrame({
@@ -70,7 +127,7 @@ def load_data(pmay_file, sanitation_file):
         })
     
     if sanitation_file is not None:
-        sanitation_data = pd.read_csv(sanitation_file)
+        sanitation_data = read_upload(sanitation_file, sanitation_key, 'sanitation_state', problems)
     else:
         # Sample sanitation data
         sanitation_data = pd.DataFrame({
@@ -82,10 +139,47 @@ def load_data(pmay_file, sanitation_file):
             'Water_Connection_Percentage': [75, 68, 82, 80, 72]
         })
     
-    return pmay_data, sanitation_data
+    return pmay_data, sanitation_data, problems
+
+# Completion metrics of the session's data, computed in memory so uploads
+# are never mixed across sessions (metrics_store.py)
+@st.cache_data
+def load_completion_metrics(pmay_data):
+    return local_metrics('dashboard_pmay', pmay_data)
+
+figures = get_figure_factory()
+
+def state_choropleth(map_data, map_metric):
+    fig = choropleth(
+        map_data[map_metric].rename(map_metric),
+        title=f'Housing Progress: {map_metric} Across Indian States',
+        colorbar_title=map_metric,
+        hover=map_data.drop(columns=map_metric),
+    )
+    fig.update_layout(title_font_size=20, title_x=0.5)
+    return fig
+
+def set_color_scale(fig, color_scale):
+    fig.update_traces(selector=dict(name='values'), colorscale=color_scale)
 
 # Load data
-pmay_data, sanitation_data = load_data(pmay_file, sanitation_file)
+with span('data.load'):
+    pmay_data, sanitation_data, upload_problems = load_data(
+        upload_key(pmay_file, 'pmay_state'), upload_key(sanitation_file, 'sanitation_state'),
+        pmay_file, sanitation_file
+    )
+for file_name, (error, rejected, rejected_count, aggregated) in upload_problems.items():
+    if error:
+        st.error(f"{file_name} {error}")
+        st.stop()
+    if rejected_count:
+        st.sidebar.warning(f"Dropped {rejected_count:,} invalid rows from {file_name}")
+        with st.sidebar.expander("Rejected rows"):
+            st.dataframe(rejected.rename('reason').to_frame())
+    if aggregated:
+        st.sidebar.info(f"{file_name} is larger than the upload memory cap and was summarized per state")
+with span('metrics.load'):
+    completion_metrics = load_completion_metrics(pmay_data)
 
 # Sidebar filters
 st.sidebar.header("Filters")
@@ -98,6 +192,10 @@ selected_states = st.sidebar.multiselect(
 # Filter data based on selection
 filtered_pmay = pmay_data[pmay_data['State'].isin(selected_states)]
 filtered_sanitation = sanitation_data[sanitation_data['State'].isin(selected_states)]
+filtered_metrics = completion_metrics[completion_metrics.index.isin(selected_states)]
+pmay_version = frame_version(filtered_pmay)
+sanitation_version = frame_version(filtered_sanitation)
+overall_completion = filtered_metrics['completed'].sum() / filtered_metrics['total'].sum() * 100
 
 # Main dashboard
 st.title("🏠 India Housing & Sanitation Analysis Dashboard")
@@ -118,12 +216,10 @@ with tab1:
         )
     
     with col2:
-        completion_rate = (filtered_pmay['Houses_Completed'].sum() / 
-                         filtered_pmay['Houses_Sanctioned'].sum() * 100)
         st.metric(
             "Completion Rate",
-            f"{completion_rate:.1f}%",
-            f"{completion_rate - 75:.1f}% vs target"
+            f"{overall_completion:.1f}%",
+            f"{overall_completion - 75:.1f}% vs target"
         )
     
     with col3:
@@ -144,12 +240,11 @@ with tab1:
    # Enhanced Interactive Map of Houses Completed
     st.markdown("### State-wise Housing Completion Analysis")
     
-    # Prepare map data
+    # Prepare map data: one row per state, from the materialized metrics
     map_data = pd.DataFrame({
-        'State': filtered_pmay['State'],
-        'Houses Completed': filtered_pmay['Houses_Completed'],
-        'Total Sanctioned': filtered_pmay['Houses_Sanctioned'],
-        'Completion Rate': (filtered_pmay['Houses_Completed'] / filtered_pmay['Houses_Sanctioned'] * 100).round(2)
+        'Houses Completed': filtered_metrics['completed'],
+        'Total Sanctioned': filtered_metrics['total'],
+        'Completion Rate': filtered_metrics['completion_rate'].round(2)
     })
     
     # Map visualization options
@@ -174,39 +269,12 @@ with tab1:
         ]
     )
     
-    # Create enhanced choropleth map
-    fig = px.choropleth(
-        map_data,
-        locations='State',
-        locationmode='country names',
-        color=map_metric,
-        hover_name='State',
-        hover_data={
-            'State': True,
-            'Houses Completed': ':.0f',
-            'Total Sanctioned': ':.0f',
-            'Completion Rate': ':.2f%',
-            map_metric: ':.2f'
-        },
-        color_continuous_scale=color_scale,
-        scope='asia',
-        title=f'Housing Progress: {map_metric} Across Indian States',
-        labels={
-            'Houses Completed': 'Houses Completed',
-            'Total Sanctioned': 'Total Sanctioned Houses',
-            'Completion Rate': 'Completion Rate (%)'
-        }
-    )
-    
-    # Customize map layout
-    fig.update_layout(
-        title_font_size=20,
-        title_x=0.5,
-        geo=dict(
-            showframe=False,
-            showcoastlines=True,
-            projection_type='equirectangular'
-        )
+    # Create enhanced choropleth map over the bundled India boundaries;
+    # a palette change only restyles the map built for the metric
+    fig = figures.get(
+        'state_choropleth', (map_metric, frame_version(map_data)),
+        lambda: state_choropleth(map_data, map_metric),
+        set_color_scale, color_scale=color_scale
     )
     
     # Add detailed annotations
@@ -221,7 +289,8 @@ with tab1:
     col1, col2 = st.columns([3, 1])
     
     with col1:
-        st.plotly_chart(fig, use_container_width=True)
+        with span('plotly_chart', chart='state_choropleth'):
+            st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         st.markdown(annotation_text)
@@ -243,48 +312,57 @@ with tab2:
         state_data = filtered_pmay[filtered_pmay['State'] == selected_state].iloc[0]
         
         # Fund utilization gauge
-        fig = go.Figure(go.Indicator(
-            mode = "gauge+number+delta",
-            value = state_data['Fund_Utilized_Cr'],
-            delta = {'reference': state_data['Fund_Utilized_Cr'] * 0.8},
-            title = {'text': "Fund Utilization (Cr ₹)"},
-            gauge = {
-                'axis': {'range': [None, state_data['Fund_Utilized_Cr'] * 1.5]},
-                'steps': [
-                    {'range': [0, state_data['Fund_Utilized_Cr'] * 0.6], 'color': "lightgray"},
-                    {'range': [state_data['Fund_Utilized_Cr'] * 0.6, state_data['Fund_Utilized_Cr'] * 0.8], 'color': "gray"}
-                ],
-                'threshold': {
-                    'line': {'color': "red", 'width': 4},
-                    'thickness': 0.75,
-                    'value': state_data['Fund_Utilized_Cr'] * 0.8
+        def build_gauge():
+            return go.Figure(go.Indicator(
+                mode = "gauge+number+delta",
+                value = state_data['Fund_Utilized_Cr'],
+                delta = {'reference': state_data['Fund_Utilized_Cr'] * 0.8},
+                title = {'text': "Fund Utilization (Cr ₹)"},
+                gauge = {
+                    'axis': {'range': [None, state_data['Fund_Utilized_Cr'] * 1.5]},
+                    'steps': [
+                        {'range': [0, state_data['Fund_Utilized_Cr'] * 0.6], 'color': "lightgray"},
+                        {'range': [state_data['Fund_Utilized_Cr'] * 0.6, state_data['Fund_Utilized_Cr'] * 0.8], 'color': "gray"}
+                    ],
+                    'threshold': {
+                        'line': {'color': "red", 'width': 4},
+                        'thickness': 0.75,
+                        'value': state_data['Fund_Utilized_Cr'] * 0.8
+                    }
                 }
-            }
-        ))
-        st.plotly_chart(fig)
+            ))
+
+        fig = figures.get('fund_gauge', (selected_state, pmay_version), build_gauge)
+        with span('plotly_chart', chart='fund_gauge'):
+            st.plotly_chart(fig)
     
     with col2:
         # Timeline analysis
-        progress_data = pd.DataFrame({
-            'Month': pd.date_range(start='2023-01', end=state_data['Target_Completion_Date'], freq='M'),
-            'Target': np.linspace(state_data['Houses_Completed'], 
-                                state_data['Houses_Sanctioned'], 
-                                len(pd.date_range(start='2023-01', 
-                                                end=state_data['Target_Completion_Date'], 
-                                                freq='M')))
-        })
-        
-        fig = px.line(
-            progress_data,
-            x='Month',
-            y='Target',
-            title=f'Project Timeline - {selected_state}',
-            labels={'Target': 'Houses to Complete'}
-        )
-        fig.add_hline(y=state_data['Houses_Completed'], 
-                     line_dash="dash", 
-                     annotation_text="Current Progress")
-        st.plotly_chart(fig)
+        def build_timeline():
+            progress_data = pd.DataFrame({
+                'Month': pd.date_range(start='2023-01', end=state_data['Target_Completion_Date'], freq='M'),
+                'Target': np.linspace(state_data['Houses_Completed'], 
+                                    state_data['Houses_Sanctioned'], 
+                                    len(pd.date_range(start='2023-01', 
+                                                    end=state_data['Target_Completion_Date'], 
+                                                    freq='M')))
+            })
+            
+            fig = px.line(
+                progress_data,
+                x='Month',
+                y='Target',
+                title=f'Project Timeline - {selected_state}',
+                labels={'Target': 'Houses to Complete'}
+            )
+            fig.add_hline(y=state_data['Houses_Completed'], 
+                         line_dash="dash", 
+                         annotation_text="Current Progress")
+            return fig
+
+        fig = figures.get('timeline', (selected_state, pmay_version), build_timeline)
+        with span('plotly_chart', chart='timeline'):
+            st.plotly_chart(fig)
 
 with tab3:
     st.markdown("### Sanitation Progress Monitoring")
@@ -297,55 +375,63 @@ with tab3:
     
     if viz_type == "Coverage Analysis":
         # Sanitation coverage comparison with water connection
-        fig = go.Figure()
-        fig.add_trace(go.Bar(
-            name='Sanitation Coverage',
-            x=filtered_sanitation['State'],
-            y=filtered_sanitation['Coverage_Percentage'],
-        ))
-        fig.add_trace(go.Bar(
-            name='Water Connection',
-            x=filtered_sanitation['State'],
-            y=filtered_sanitation['Water_Connection_Percentage'],
-        ))
-        fig.update_layout(
-            barmode='group',
-            title='Sanitation Coverage vs Water Connection by State',
-            yaxis_title='Percentage (%)'
-        )
-        st.plotly_chart(fig)
+        def build_coverage():
+            fig = go.Figure()
+            fig.add_trace(go.Bar(
+                name='Sanitation Coverage',
+                x=filtered_sanitation['State'],
+                y=filtered_sanitation['Coverage_Percentage'],
+            ))
+            fig.add_trace(go.Bar(
+                name='Water Connection',
+                x=filtered_sanitation['State'],
+                y=filtered_sanitation['Water_Connection_Percentage'],
+            ))
+            fig.update_layout(
+                barmode='group',
+                title='Sanitation Coverage vs Water Connection by State',
+                yaxis_title='Percentage (%)'
+            )
+            return fig
+
+        fig = figures.get('coverage', sanitation_version, build_coverage)
+        with span('plotly_chart', chart='coverage'):
+            st.plotly_chart(fig)
         
     elif viz_type == "ODF Status":
         col1, col2 = st.columns(2)
         
         with col1:
-            fig = px.pie(
+            fig = figures.get('odf_pie', sanitation_version, lambda: px.pie(
                 filtered_sanitation,
                 values='ODF_Villages',
                 names='State',
                 title='Distribution of ODF Villages'
-            )
-            st.plotly_chart(fig)
+            ))
+            with span('plotly_chart', chart='odf_pie'):
+                st.plotly_chart(fig)
         
         with col2:
-            fig = px.scatter(
+            fig = figures.get('odf_scatter', sanitation_version, lambda: px.scatter(
                 filtered_sanitation,
                 x='Coverage_Percentage',
                 y='ODF_Villages',
                 size='Toilets_Built',
                 color='State',
                 title='Correlation: Coverage vs ODF Villages'
-            )
-            st.plotly_chart(fig)
+            ))
+            with span('plotly_chart', chart='odf_scatter'):
+                st.plotly_chart(fig)
             
     else:  # Water Connection Analysis
-        fig = px.scatter_matrix(
+        fig = figures.get('sanitation_matrix', sanitation_version, lambda: px.scatter_matrix(
             filtered_sanitation,
             dimensions=['Coverage_Percentage', 'Water_Connection_Percentage', 'ODF_Villages'],
             color='State',
             title='Multi-dimensional Analysis of Sanitation Parameters'
-        )
-        st.plotly_chart(fig)
+        ))
+        with span('plotly_chart', chart='sanitation_matrix'):
+            st.plotly_chart(fig)
 
 with tab4:
     st.markdown("### Trends & Insights")
@@ -354,8 +440,6 @@ with tab4:
     st.markdown("#### Key Performance Indicators")
     
     # Calculate KPIs
-    overall_completion = (filtered_pmay['Houses_Completed'].sum() / 
-                        filtered_pmay['Houses_Sanctioned'].sum() * 100)
     avg_fund_utilization = filtered_pmay['Fund_Utilized_Cr'].mean()
     sanitation_coverage = filtered_sanitation['Coverage_Percentage'].mean()
     
@@ -396,13 +480,14 @@ with tab4:
     merged_data = pd.merge(filtered_pmay, filtered_sanitation, on='State')
     correlation_vars = ['Houses_Completed', 'Fund_Utilized_Cr', 'Coverage_Percentage', 'Water_Connection_Percentage']
     
-    fig = px.imshow(
+    fig = figures.get('key_correlation', (pmay_version, sanitation_version), lambda: px.imshow(
         merged_data[correlation_vars].corr(),
         title='Correlation Matrix of Key Metrics',
         labels=dict(color="Correlation Coefficient"),
         color_continuous_scale='RdBu'
-    )
-    st.plotly_chart(fig)
+    ))
+    with span('plotly_chart', chart='key_correlation'):
+        st.plotly_chart(fig)
 
 # Footer with data timestamp and download buttons
 st.markdown("---")
@@ -431,8 +516,13 @@ with col3:
         )
         
 with tab5:
-    if st.button("Go to Next Page"):
-        os.system("streamlit run dashboard2.py")
-    
-    if st.button("Comparative Data Analysis"):
-        os.system("streamlit run app.py")
\ No newline at end of file
+    # Pages of streamlit_app.py run in this session and share its caches; a
+    # page run on its own has no other pages to link to
+    if in_multipage_app():
+        st.page_link("dashboard2.py", label="Go to Next Page", icon="🏘️")
+        st.page_link("app.py", label="Comparative Data Analysis", icon="📊")
+    else:
+        st.caption("Run `streamlit run streamlit_app.py` to move between the dashboards.")
+
+instrumentation.end_run()
+instrumentation.debug_panel()
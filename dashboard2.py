@@ -5,16 +5,21 @@ import plotly.graph_objects as go
 import numpy as np
 from datetime import datetime
 import io
-import seaborn as sns
-from scipy import stats
-
-# Set page configuration
-st.set_page_config(
-    page_title="India Housing & Sanitation Dashboard",
-    page_icon="🏘️",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
+import snapshots
+from metrics_store import local_metrics
+from selection_cache import SelectionCache
+from performance_metrics import COST_COLUMNS, RADAR_CATEGORIES, performance_table, select_states
+from figure_factory import frame_version
+from resources import get_figure_factory
+from page_config import set_page_config
+import instrumentation
+from instrumentation import span
+
+# Only takes effect when the page is run on its own
+set_page_config(page_icon="🏘️")
+
+# Timed as one rerun of the page (see ?debug=1)
+instrumentation.start_run("State Analysis", page='dashboard2')
 
 # Custom CSS for better styling
 st.markdown("""
@@ -70,8 +75,36 @@ def load_data():
     
     return pmay_data, sanitation_data
 
+# Completion metrics of the bundled data, also recorded in the history the
+# Trends tab reads whenever they change (metrics_store.py)
+@st.cache_data
+def load_completion_metrics(pmay_data):
+    return local_metrics('dashboard2_pmay', pmay_data, record=True)
+
+# Per-state performance metrics, indexed once and shared by the sections below
+@st.cache_data
+def load_performance_table(pmay_data, sanitation_data, completion_rate):
+    return performance_table(pmay_data, sanitation_data, completion_rate)
+
 # Load data
-pmay_data, sanitation_data = load_data()
+with span('data.load'):
+    pmay_data, sanitation_data = load_data()
+with span('metrics.load'):
+    completion_metrics = load_completion_metrics(pmay_data)
+    performance = load_performance_table(pmay_data, sanitation_data, completion_metrics['completion_rate'])
+
+# Filtered views shared across reruns; one LRU entry per selection tuple
+@st.cache_resource
+def get_selection_cache(pmay_data, sanitation_data, completion_metrics):
+    return SelectionCache({
+        'pmay': (pmay_data, 'State'),
+        'sanitation': (sanitation_data, 'State'),
+        'metrics': (completion_metrics, None),
+    })
+
+selection_cache = get_selection_cache(pmay_data, sanitation_data, completion_metrics)
+
+figures = get_figure_factory()
 
 # Sidebar configuration
 st.sidebar.header("Dashboard Controls")
@@ -82,6 +115,7 @@ selected_state = st.sidebar.multiselect(
     options=pmay_data['State'].unique(),
     default=pmay_data['State'].unique()[:3]
 )
+selection = selection_cache.select(selected_state)
 
 analysis_year = st.sidebar.selectbox(
     "Select Analysis Year",
@@ -104,7 +138,7 @@ def export_data(df, name):
     return df.to_csv(index=False).encode('utf-8')
 
 if st.sidebar.button("Export PMAY Data"):
-    csv_pmay = export_data(pmay_data[pmay_data['State'].isin(selected_state)], "pmay")
+    csv_pmay = export_data(selection['pmay'], "pmay")
     st.sidebar.download_button(
         label="Download PMAY CSV",
         data=csv_pmay,
@@ -113,7 +147,7 @@ if st.sidebar.button("Export PMAY Data"):
     )
 
 if st.sidebar.button("Export Sanitation Data"):
-    csv_sanitation = export_data(sanitation_data[sanitation_data['State'].isin(selected_state)], "sanitation")
+    csv_sanitation = export_data(selection['sanitation'], "sanitation")
     st.sidebar.download_button(
         label="Download Sanitation CSV",
         data=csv_sanitation,
@@ -128,8 +162,11 @@ st.markdown("---")
 # Enhanced Key Metrics Display
 col1, col2, col3, col4 = st.columns(4)
 
+selected_metrics = selection['metrics']
+selected_performance = select_states(performance, selected_state)
+
 with col1:
-    total_sanctioned = pmay_data[pmay_data['State'].isin(selected_state)]['Houses_Sanctioned'].sum()
+    total_sanctioned = int(selected_metrics['total'].sum())
     st.metric(
         "Total Houses Sanctioned",
         f"{total_sanctioned:,}",
@@ -137,7 +174,7 @@ with col1:
     )
 
 with col2:
-    total_completed = pmay_data[pmay_data['State'].isin(selected_state)]['Houses_Completed'].sum()
+    total_completed = int(selected_metrics['completed'].sum())
     st.metric(
         "Total Houses Completed",
         f"{total_completed:,}",
@@ -153,7 +190,7 @@ with col3:
     )
 
 with col4:
-    avg_cost = pmay_data[pmay_data['State'].isin(selected_state)]['Cost_Per_Unit_Lakhs'].mean()
+    avg_cost = selection['pmay']['Cost_Per_Unit_Lakhs'].mean()
     st.metric(
         "Avg Cost Per Unit",
         f"₹{avg_cost:.2f}L",
@@ -163,23 +200,28 @@ with col4:
 # New Section: Scheme-wise Analysis
 st.header("Scheme-wise Implementation Analysis")
 scheme_cols = ['BLC_Houses', 'CLSS_Beneficiaries', 'AHP_Houses', 'ISSR_Houses']
-scheme_data = pmay_data[pmay_data['State'].isin(selected_state)][['State'] + scheme_cols]
+scheme_data = selection['pmay'][['State'] + scheme_cols]
 
 # Stacked bar chart for scheme distribution
-fig_schemes = go.Figure()
-for scheme in scheme_cols:
-    fig_schemes.add_trace(go.Bar(
-        name=scheme.replace('_', ' '),
-        x=scheme_data['State'],
-        y=scheme_data[scheme],
-    ))
+def build_schemes():
+    fig_schemes = go.Figure()
+    for scheme in scheme_cols:
+        fig_schemes.add_trace(go.Bar(
+            name=scheme.replace('_', ' '),
+            x=scheme_data['State'],
+            y=scheme_data[scheme],
+        ))
 
-fig_schemes.update_layout(
-    barmode='stack',
-    title='Scheme-wise Housing Distribution by State',
-    height=500
-)
-st.plotly_chart(fig_schemes, use_container_width=True)
+    fig_schemes.update_layout(
+        barmode='stack',
+        title='Scheme-wise Housing Distribution by State',
+        height=500
+    )
+    return fig_schemes
+
+fig_schemes = figures.get('schemes', frame_version(scheme_data), build_schemes)
+with span('plotly_chart', chart='schemes'):
+    st.plotly_chart(fig_schemes, use_container_width=True)
 
 # Statistical Analysis Section
 st.header("Statistical Analysis")
@@ -190,50 +232,48 @@ with tab1:
     correlation_data = sanitation_data[['Toilet_Coverage', 'ODF_Villages', 'Water_Connection', 'Water_Quality_Index']]
     correlation_matrix = correlation_data.corr()
     
-    fig_correlation = px.imshow(
+    fig_correlation = figures.get('correlation', frame_version(correlation_matrix), lambda: px.imshow(
         correlation_matrix,
         labels=dict(color="Correlation"),
         color_continuous_scale="RdBu",
         title="Correlation Matrix of Sanitation Metrics"
-    )
-    st.plotly_chart(fig_correlation, use_container_width=True)
+    ))
+    with span('plotly_chart', chart='correlation'):
+        st.plotly_chart(fig_correlation, use_container_width=True)
 
 with tab2:
     # Performance metrics calculation
-    performance_metrics = pd.DataFrame({
-        'State': selected_state,
-        'Implementation_Efficiency': [
-            (pmay_data[pmay_data['State'] == state]['Houses_Completed'].iloc[0] /
-             pmay_data[pmay_data['State'] == state]['Houses_Sanctioned'].iloc[0] * 100)
-            for state in selected_state
-        ],
-        'Fund_Utilization_Rate': [
-            (pmay_data[pmay_data['State'] == state]['Fund_Utilized_Cr'].iloc[0] /
-             pmay_data[pmay_data['State'] == state]['Houses_Sanctioned'].iloc[0] * 100)
-            for state in selected_state
-        ]
-    })
+    performance_metrics = selected_performance[['Implementation_Efficiency', 'Fund_Utilization_Rate']].reset_index()
     
     st.dataframe(performance_metrics.style.highlight_max(axis=0), use_container_width=True)
 
 with tab3:
-    # Trend analysis visualization
-    fig_trends = go.Figure()
-    
-    for state in selected_state:
-        fig_trends.add_trace(go.Scatter(
-            x=['2021', '2022', '2023'],
-            y=np.random.normal(80, 10, 3),  # Replace with actual trend data
-            name=state,
-            mode='lines+markers'
-        ))
-    
-    fig_trends.update_layout(
-        title='Year-wise Implementation Progress',
-        xaxis_title='Year',
-        yaxis_title='Implementation Progress (%)'
-    )
-    st.plotly_chart(fig_trends, use_container_width=True)
+    # Year-end completion rates from the snapshot history (snapshots.py)
+    trends = snapshots.series('dashboard2_pmay', selected_state, grain='year')
+    if trends['date'].nunique() < 2:
+        st.info("Trends appear once completion metrics have been recorded in more than one year.")
+
+    def build_trends():
+        fig_trends = go.Figure()
+
+        for state, history in trends.groupby('region', sort=False):
+            fig_trends.add_trace(go.Scatter(
+                x=history['date'].dt.year.astype(str),
+                y=history['completion_rate'],
+                name=state,
+                mode='lines+markers'
+            ))
+
+        fig_trends.update_layout(
+            title='Year-wise Implementation Progress',
+            xaxis_title='Year',
+            yaxis_title='Implementation Progress (%)'
+        )
+        return fig_trends
+
+    fig_trends = figures.get('trends', frame_version(trends), build_trends)
+    with span('plotly_chart', chart='trends'):
+        st.plotly_chart(fig_trends, use_container_width=True)
 
 # Enhanced Sanitation Analysis
 st.header("Enhanced Sanitation Analysis")
@@ -241,44 +281,51 @@ col1, col2 = st.columns(2)
 
 with col1:
     # Radar chart for sanitation metrics
-    categories = ['Toilet_Coverage', 'ODF_Villages', 'Water_Connection', 'Waste_Management_Score']
-    
-    fig_radar = go.Figure()
-    
-    for state in selected_state:
-        values = sanitation_data[sanitation_data['State'] == state][categories].iloc[0].tolist()
-        values.append(values[0])  # Complete the radar by connecting back to first point
-        
-        fig_radar.add_trace(go.Scatterpolar(
-            r=values,
-            theta=categories + [categories[0]],
-            name=state
-        ))
-    
-    fig_radar.update_layout(
-        polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
-        showlegend=True,
-        title='Sanitation Metrics Comparison'
-    )
-    st.plotly_chart(fig_radar, use_container_width=True)
+    categories = RADAR_CATEGORIES
+    radar_data = selected_performance[categories]
+
+    def build_radar():
+        fig_radar = go.Figure()
+
+        for state, row in zip(selected_state, radar_data.to_numpy()):
+            values = row.tolist()
+            values.append(values[0])  # Complete the radar by connecting back to first point
+
+            fig_radar.add_trace(go.Scatterpolar(
+                r=values,
+                theta=categories + [categories[0]],
+                name=state
+            ))
+
+        fig_radar.update_layout(
+            polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
+            showlegend=True,
+            title='Sanitation Metrics Comparison'
+        )
+        return fig_radar
+
+    fig_radar = figures.get('radar', frame_version(radar_data), build_radar)
+    with span('plotly_chart', chart='radar'):
+        st.plotly_chart(fig_radar, use_container_width=True)
 
 with col2:
     # Water quality analysis
-    fig_water = px.scatter(
-        sanitation_data[sanitation_data['State'].isin(selected_state)],
+    fig_water = figures.get('water', frame_version(selection['sanitation']), lambda: px.scatter(
+        selection['sanitation'],
         x='Water_Quality_Index',
         y='Water_Connection',
         size='Sewage_Treatment_Capacity_MLD',
         color='State',
         title='Water Quality vs Connection Coverage'
-    )
-    st.plotly_chart(fig_water, use_container_width=True)
+    ))
+    with span('plotly_chart', chart='water'):
+        st.plotly_chart(fig_water, use_container_width=True)
 
 # Cost Analysis Section
 st.header("Cost and Efficiency Analysis")
-cost_data = pmay_data[pmay_data['State'].isin(selected_state)]
+cost_data = selected_performance[COST_COLUMNS].reset_index()
 
-fig_cost = px.scatter(
+fig_cost = figures.get('cost', frame_version(cost_data), lambda: px.scatter(
     cost_data,
     x='Average_Construction_Time_Days',
     y='Cost_Per_Unit_Lakhs',
@@ -290,8 +337,9 @@ fig_cost = px.scatter(
         'Cost_Per_Unit_Lakhs': 'Cost Per Unit (Lakhs)',
         'Houses_Completed': 'Houses Completed'
     }
-)
-st.plotly_chart(fig_cost, use_container_width=True)
+))
+with span('plotly_chart', chart='cost'):
+    st.plotly_chart(fig_cost, use_container_width=True)
 
 # Footer with additional information
 st.markdown("---")
@@ -301,4 +349,7 @@ st.markdown("""
         <p>Last Updated: {}</p>
         <p>For more information, visit the official PMAY and Swachh Bharat Mission websites</p>
     </div>
-""".format(datetime.now().strftime("%Y-%m-%d")), unsafe_allow_html=True)
\ No newline at end of file
+""".format(datetime.now().strftime("%Y-%m-%d")), unsafe_allow_html=True)
+
+instrumentation.end_run()
+instrumentation.debug_panel()
@@ -1,20 +1,29 @@
+import re
 import sqlite3
 import yaml
 
+DB_PATH = "housing_sanitation.db"
+
 def load_schema(file_path):
     # Load schema from YAML file
     with open(file_path, 'r') as file:
         schema = yaml.safe_load(file)
     return schema
 
-def init_db(schema):
-    # Connect to SQLite database (creates it if it doesn't exist)
-    conn = sqlite3.connect("housing_sanitation.db")
-    cursor = conn.cursor()
+def sql_name(field):
+    # Schema field -> SQL column name, e.g. "Sl.No" -> "sl_no"
+    return re.sub(r'[^0-9a-z]+', '_', field.strip().lower()).strip('_')
 
-    # Define table creation based on schema
+def connect(path=DB_PATH):
+    # WAL lets the dashboards keep reading while an ingestion is writing
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+def column_definitions(fields):
     columns = []
-    for field, properties in schema.items():
+    for field, properties in fields.items():
         # Map the YAML data types to SQLite data types
         if properties['type'] == 'numeric':
             field_type = "REAL"  # SQLite uses REAL for floating-point numbers
@@ -27,19 +36,51 @@ def init_db(schema):
 
         # Check if NULL values are allowed
         allow_null = "" if properties.get('allow_null', True) else "NOT NULL"
-        
+
         # Add to columns list
-        columns.append(f"{field} {field_type} {allow_null}")
+        columns.append(f"{sql_name(field)} {field_type} {allow_null}".strip())
+    return columns
+
+def create_table(conn, table, fields):
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(column_definitions(fields))});")
+
+def bump_load_version(conn, table):
+    # A reload can reuse the same rowids, so every load advances a counter the
+    # version probe reads (query_cache.probe_table_version)
+    conn.execute("CREATE TABLE IF NOT EXISTS table_versions (table_name TEXT PRIMARY KEY, load_version INTEGER NOT NULL)")
+    conn.execute(
+        "INSERT INTO table_versions VALUES (?, 1) "
+        "ON CONFLICT (table_name) DO UPDATE SET load_version = load_version + 1",
+        (table,)
+    )
+
+def load_version(conn, table):
+    # None for tables never loaded through ingest.py
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'table_versions'"
+    ).fetchone()
+    if not exists:
+        return None
+    row = conn.execute("SELECT load_version FROM table_versions WHERE table_name = ?", (table,)).fetchone()
+    return row[0] if row else None
+
+def init_db(schema):
+    # Connect to SQLite database (creates it if it doesn't exist)
+    conn = connect()
 
-    # Generate the CREATE TABLE statement
-    create_table_query = f"CREATE TABLE IF NOT EXISTS housing_sanitation ({', '.join(columns)});"
-    cursor.execute(create_table_query)
+    # One table per dataset section that names a table
+    tables = []
+    for dataset in schema['datasets'].values():
+        if dataset.get('table'):
+            create_table(conn, dataset['table'], dataset['fields'])
+            tables.append(dataset['table'])
 
     # Commit changes and close connection
     conn.commit()
     conn.close()
-    print("Database initialized with table 'housing_sanitation'.")
+    print(f"Database initialized with tables: {', '.join(tables)}.")
 
-# Load schema and initialize the database
-schema = load_schema("data_schema.yaml")
-init_db(schema)
+if __name__ == "__main__":
+    # Load schema and initialize the database
+    schema = load_schema("data_schema.yaml")
+    init_db(schema)
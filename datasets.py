@@ -0,0 +1,147 @@
+import time
+
+from arrow_fetch import column_dtypes
+from instrumentation import span
+
+# Datasets app.py can load: source table, SQL column -> display column, and
+# derived ratio columns as (numerator, denominator) SQL columns.
+DATASETS = {
+    'pmay': {
+        'table': 'pmay_data',
+        'columns': {
+            'sl_no': 'Sl.No',
+            'district': 'District',
+            'beneficiary_selection': 'Beneficiary Selection',
+            'completed': 'Completed',
+            'foundation': 'Foundation',
+            'lintel': 'Lintel',
+            'roof': 'Roof',
+            'progress_total': 'Progress Total',
+            'unstarted': 'Unstarted',
+        },
+        'derived': {
+            'Completion Rate (%)': ('completed', 'beneficiary_selection'),
+        },
+    },
+    'sanitation': {
+        'table': 'sanitation_data',
+        'columns': {
+            'state': 'State',
+            'sanctioned': 'Sanctioned',
+            'completed': 'Completed',
+            'in_progress': 'In Progress',
+        },
+        'derived': {
+            'Completion Rate (%)': ('completed', 'sanctioned'),
+        },
+    },
+    # Materialized by metrics_store from pmay_data / sanitation_data
+    'pmay_metrics': {
+        'table': 'pmay_metrics',
+        'columns': {
+            'region': 'District',
+            'completed': 'Completed',
+            'total': 'Beneficiary Selection',
+            'completion_rate': 'Completion Rate (%)',
+            'gap_to_target': 'Gap to SDG Target (%)',
+        },
+        'derived': {},
+    },
+    'sanitation_metrics': {
+        'table': 'sanitation_metrics',
+        'columns': {
+            'region': 'State',
+            'completed': 'Completed',
+            'total': 'Sanctioned',
+            'completion_rate': 'Completion Rate (%)',
+            'gap_to_target': 'Gap to SDG Target (%)',
+        },
+        'derived': {},
+    },
+}
+
+# What each app.py section needs: name -> (dataset, SQL columns or None for
+# all columns, derived columns to compute). Sections not listed load nothing
+# up front; Visualizations and Comparative Analysis push their aggregation
+# into SQL through query_builder instead.
+SECTION_DATASETS = {
+    "📊 Data Overview": {
+        'pmay': ('pmay', None, ['Completion Rate (%)']),
+        'sanitation': ('sanitation', None, ['Completion Rate (%)']),
+    },
+    "🔮 Predictive Analysis": {
+        'pmay': ('pmay_metrics', ['region', 'completion_rate'], []),
+    },
+    "🔧 Resource Allocation Simulation": {
+        'pmay': ('pmay', ['district', 'beneficiary_selection', 'completed',
+                          'foundation', 'lintel', 'roof', 'unstarted'], []),
+    },
+    "🎯 SDG Goal Tracker": {
+        'pmay': ('pmay_metrics', ['region', 'completion_rate', 'gap_to_target'], []),
+    },
+}
+
+
+def ratio_percent(numerator, denominator):
+    # Matches the SQL COALESCE(100.0 * n / NULLIF(d, 0), 0) used by query_builder
+    return (100.0 * numerator / denominator.where(denominator != 0)).fillna(0)
+
+
+def section_datasets(section):
+    return SECTION_DATASETS.get(section, {})
+
+
+def resolve_columns(name, columns, derived):
+    """SQL columns to select for `columns` plus whatever `derived` needs."""
+    dataset = DATASETS[name]
+    if columns is None:
+        return list(dataset['columns'])
+    wanted = set(columns)
+    for column in derived:
+        wanted.update(dataset['derived'][column])
+    # Keep the table's column order so the SQL text is stable for caching
+    return [column for column in dataset['columns'] if column in wanted]
+
+
+def build_query(name, sql_columns):
+    return f"SELECT {', '.join(sql_columns)} FROM {DATASETS[name]['table']};"
+
+
+def load_dataset(name, columns, derived, run_query, timings=None):
+    """Fetch the pruned columns of dataset `name` and add derived columns.
+
+    `run_query(query, table, columns, dtypes)` performs the fetch. When
+    `timings` is a dict, fetch and derive durations are recorded in it.
+    """
+    dataset = DATASETS[name]
+    sql_columns = resolve_columns(name, columns, derived)
+
+    started = time.perf_counter()
+    with span(f"{name}.fetch", table=dataset['table'], columns=len(sql_columns)):
+        frame = run_query(
+            build_query(name, sql_columns),
+            dataset['table'],
+            [dataset['columns'][column] for column in sql_columns],
+            column_dtypes(sql_columns, name)
+        )
+    fetched = time.perf_counter()
+
+    with span(f"{name}.derive", columns=len(derived)):
+        if not frame.empty:
+            for column in derived:
+                numerator, denominator = dataset['derived'][column]
+                frame[column] = ratio_percent(frame[dataset['columns'][numerator]],
+                                              frame[dataset['columns'][denominator]])
+
+    if timings is not None:
+        timings[f"{name}.fetch"] = fetched - started
+        timings[f"{name}.derive"] = time.perf_counter() - fetched
+    return frame
+
+
+def load_section_data(section, run_query, timings=None):
+    """Load only the datasets and columns `section` declares it needs."""
+    return {
+        name: load_dataset(dataset, columns, derived, run_query, timings)
+        for name, (dataset, columns, derived) in section_datasets(section).items()
+    }
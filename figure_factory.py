@@ -0,0 +1,158 @@
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from instrumentation import span
+
+# Trace properties holding data arrays; only these are sent as typed buffers
+ARRAY_KEYS = frozenset({
+    'x', 'y', 'z', 'r', 'values', 'lat', 'lon', 'base', 'width', 'size', 'color', 'customdata',
+})
+
+# Shorter arrays are smaller as plain JSON than as base64 plus the wrapper
+COMPACT_MIN_LENGTH = 16
+
+_INT32 = np.iinfo(np.int32)
+
+
+def typed_array(values):
+    """plotly.js typed-array spec ({dtype, bdata, shape}) for a numeric array,
+    or None when `values` is not numeric."""
+    try:
+        array = np.asarray(values)
+    except ValueError:
+        # Ragged nested lists
+        return None
+    if array.dtype.kind not in 'iuf' or array.ndim not in (1, 2) or array.size < COMPACT_MIN_LENGTH:
+        return None
+    if array.dtype.kind == 'f' or (array.size and (array.min() < _INT32.min or array.max() > _INT32.max)):
+        array, dtype = array.astype('<f8'), 'f8'
+    else:
+        array, dtype = array.astype('<i4'), 'i4'
+    return {
+        'dtype': dtype,
+        'bdata': base64.b64encode(np.ascontiguousarray(array).tobytes()).decode('ascii'),
+        'shape': ','.join(str(n) for n in array.shape),
+    }
+
+
+def _compact(value):
+    # Walk a trace dict, replacing numeric data arrays in place. GeoJSON
+    # coordinates are left alone: plotly.js reads them as nested lists.
+    for key, item in value.items():
+        if key == 'geojson':
+            continue
+        if isinstance(item, dict):
+            _compact(item)
+        elif key in ARRAY_KEYS and isinstance(item, (list, tuple, np.ndarray)):
+            spec = typed_array(item)
+            if spec is not None:
+                value[key] = spec
+
+
+def compact_dict(figure_dict):
+    """Figure dict with numeric trace arrays encoded as base64 typed buffers."""
+    for trace in figure_dict.get('data', ()):
+        _compact(trace)
+    return figure_dict
+
+
+class CompactFigure(go.Figure):
+    """go.Figure whose to_dict() emits typed buffers.
+
+    st.plotly_chart serializes figures through to_dict(), so these charts
+    reach the browser as base64 arrays instead of decimal JSON. Figures
+    handed out by FigureFactory are frozen: their dict is built once and
+    reused, so they must not be modified afterwards.
+    """
+
+    _frozen = None
+
+    def to_dict(self):
+        if self._frozen is not None:
+            return self._frozen
+        return compact_dict(super().to_dict())
+
+    def freeze(self):
+        self._frozen = compact_dict(super().to_dict())
+        return self
+
+
+def frame_version(*frames):
+    """Content digest of one or more frames, used as a figure's data version."""
+    digest = hashlib.blake2b(digest_size=16)
+    for frame in frames:
+        digest.update(repr(list(frame.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _freeze(options):
+    return tuple(sorted((key, tuple(value) if isinstance(value, list) else value)
+                        for key, value in options.items()))
+
+
+class FigureFactory:
+    """LRU cache of finished figures keyed on (kind, data version, options).
+
+    `build()` is called only when no figure exists yet for `kind` at
+    `version`; the result is kept as the base figure. Each distinct set of
+    visual `options` gets a copy of the base with `style(figure, **options)`
+    applied, so changing a palette patches the affected traces or layout
+    instead of rebuilding the chart from the data.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._bases = OrderedDict()
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'restyles': 0, 'builds': 0, 'evictions': 0}
+
+    def _store(self, entries, key, value):
+        entries[key] = value
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def get(self, kind, version, build, style=None, **options):
+        key = (kind, version, _freeze(options))
+        with self._lock:
+            figure = self._figures.get(key)
+            if figure is not None:
+                self._figures.move_to_end(key)
+                self._stats['hits'] += 1
+                return figure
+            base = self._bases.get((kind, version))
+            if base is not None:
+                self._bases.move_to_end((kind, version))
+
+        if base is None:
+            with span('figure.build', kind=kind):
+                base = build()
+            with self._lock:
+                self._stats['builds'] += 1
+                self._store(self._bases, (kind, version), base)
+        else:
+            with self._lock:
+                self._stats['restyles'] += 1
+
+        with span('figure.compact', kind=kind):
+            figure = CompactFigure(base)
+            if style is not None:
+                style(figure, **options)
+            figure.freeze()
+        with self._lock:
+            self._store(self._figures, key, figure)
+        return figure
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._figures)
+        return stats
@@ -0,0 +1,176 @@
+"""Linear trend forecasts of completion rates, fitted for every region at once.
+
+`fit` takes a long history frame (region, period, value), such as the
+monthly snapshot rollups from `snapshot_history`, and solves all the
+per-region least-squares lines in one vectorized pass over grouped sums;
+the result is a `Forecast` whose predictions are a row lookup plus a few
+multiplications. Coefficients are persisted per data version with `save`
+and `load`, next to the materialized metrics.
+"""
+import datetime
+
+import numpy as np
+import pandas as pd
+
+import snapshots
+from arrow_fetch import fetch_frame
+from instrumentation import traced
+from lazy_imports import lazy_import
+
+# Only needed when fitting; a stored forecast loads without it
+stats = lazy_import('scipy.stats')
+
+COEFFICIENTS_TABLE = 'forecast_coefficients'
+
+# Stored with the data version; bump it when fit changes so coefficients
+# fitted by the old code are not loaded
+FIT_VERSION = 2
+
+# Per region: the line passes through (mean_period, mean_value); sxx and
+# sigma give the prediction band, quantile is the t quantile for its width
+COEFFICIENT_COLUMNS = ['mean_period', 'mean_value', 'slope', 'sxx', 'observations', 'sigma', 'quantile']
+
+_PLACEHOLDERS = {'qmark': '?', 'pyformat': '%s', 'format': '%s'}
+
+
+def to_period(dates):
+    """Dates as fractional years, e.g. 2023-07-02 -> 2023.5."""
+    dates = pd.DatetimeIndex(pd.to_datetime(dates))
+    return (dates.year + (dates.dayofyear - 1) / np.where(dates.is_leap_year, 366, 365)).to_numpy(dtype=float)
+
+
+class Forecast:
+    """Fitted trend lines indexed by region."""
+
+    def __init__(self, coefficients, confidence=0.95):
+        self.coefficients = coefficients
+        self.confidence = confidence
+        self._rows = {region: i for i, region in enumerate(coefficients.index)}
+        self._values = coefficients[COEFFICIENT_COLUMNS].to_numpy(dtype=float)
+
+    def __contains__(self, region):
+        return region in self._rows
+
+    def predict(self, region, periods, lower=0.0, upper=100.0):
+        """Predictions and band for `region` at `periods`, clipped to
+        [lower, upper]. The band is NaN for regions with fewer than three
+        observations."""
+        mean_period, mean_value, slope, sxx, observations, sigma, quantile = self._values[self._rows[region]]
+        periods = np.asarray(periods, dtype=float)
+        prediction = mean_value + slope * (periods - mean_period)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            spread = quantile * sigma * np.sqrt(1 + 1 / observations + (periods - mean_period) ** 2 / sxx)
+        return pd.DataFrame({
+            'period': periods,
+            'prediction': np.clip(prediction, lower, upper),
+            'lower': np.clip(prediction - spread, lower, upper),
+            'upper': np.clip(prediction + spread, lower, upper),
+        })
+
+
+@traced('forecast.fit')
+def fit(history, alpha=0.1, confidence=0.95, region='region', period='period', value='value'):
+    """Fit one trend line per region of `history`.
+
+    `alpha` is a ridge penalty on the slope, which keeps regions with only a
+    couple of close snapshots from extrapolating wildly. It is scaled by the
+    square of each region's spacing between observations, so it damps a
+    short series the same whether periods are months or years, and barely
+    touches a series of a dozen snapshots or more.
+    """
+    codes, regions = pd.factorize(history[region])
+    t = history[period].to_numpy(dtype=float)
+    y = history[value].to_numpy(dtype=float)
+    size = len(regions)
+
+    observations = np.bincount(codes, minlength=size).astype(float)
+    mean_period = np.bincount(codes, t, size) / observations
+    mean_value = np.bincount(codes, y, size) / observations
+    dt = t - mean_period[codes]
+    dy = y - mean_value[codes]
+    sxx = np.bincount(codes, dt * dt, size)
+    extent = pd.Series(t).groupby(codes).agg(['min', 'max']).to_numpy()
+    spacing = (extent[:, 1] - extent[:, 0]) / np.maximum(observations - 1, 1)
+    penalty = alpha * spacing * spacing
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.bincount(codes, dt * dy, size) / (sxx + penalty)
+    slope[sxx + penalty == 0] = 0.0
+
+    residuals = dy - slope[codes] * dt
+    dof = observations - 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma = np.where(dof > 0, np.sqrt(np.bincount(codes, residuals * residuals, size) / dof), np.nan)
+    quantile = np.where(dof > 0, stats.t.ppf((1 + confidence) / 2, np.maximum(dof, 1)), np.nan)
+
+    coefficients = pd.DataFrame({
+        'mean_period': mean_period,
+        'mean_value': mean_value,
+        'slope': slope,
+        'sxx': sxx,
+        'observations': observations,
+        'sigma': sigma,
+        'quantile': quantile,
+    }, index=pd.Index(regions, name='region'))
+    return Forecast(coefficients, confidence)
+
+
+def snapshot_history(source='pmay', grain='month'):
+    """Recorded completion rates of `source` from the snapshot history, one
+    observation per region and `grain` period."""
+    frame = snapshots.series(source, grain=grain)
+    return pd.DataFrame({
+        'region': frame['region'],
+        'period': to_period(frame['date']),
+        'value': frame['completion_rate'].astype(float),
+    })
+
+
+def _stored_version(data_version):
+    return f"{FIT_VERSION}:{data_version}"
+
+
+def ensure_table(conn):
+    cursor = conn.cursor()
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {COEFFICIENTS_TABLE} (name TEXT, region TEXT, "
+        + ", ".join(f"{column} REAL" for column in COEFFICIENT_COLUMNS)
+        + ", confidence REAL, data_version TEXT, fitted_at TEXT)"
+    )
+    cursor.close()
+
+
+def save(conn, name, forecast, data_version, paramstyle='qmark'):
+    """Replace the stored coefficients of forecast `name`."""
+    ensure_table(conn)
+    p = _PLACEHOLDERS[paramstyle]
+    columns = ['name', 'region'] + COEFFICIENT_COLUMNS + ['confidence', 'data_version', 'fitted_at']
+    fitted_at = datetime.datetime.now().isoformat(timespec='seconds')
+    rows = [
+        (name, str(region)) + tuple(None if np.isnan(value) else float(value) for value in values)
+        + (forecast.confidence, _stored_version(data_version), fitted_at)
+        for region, values in zip(forecast.coefficients.index, forecast._values)
+    ]
+    cursor = conn.cursor()
+    cursor.execute(f"DELETE FROM {COEFFICIENTS_TABLE} WHERE name = {p}", (name,))
+    cursor.executemany(
+        f"INSERT INTO {COEFFICIENTS_TABLE} ({', '.join(columns)}) VALUES ({', '.join([p] * len(columns))})",
+        rows
+    )
+    cursor.close()
+    conn.commit()
+
+
+def load(conn, name, data_version, paramstyle='qmark'):
+    """The stored forecast `name` if it was fitted at `data_version`, else None."""
+    ensure_table(conn)
+    p = _PLACEHOLDERS[paramstyle]
+    columns = ['region'] + COEFFICIENT_COLUMNS + ['confidence']
+    frame = fetch_frame(
+        conn.cursor(),
+        f"SELECT {', '.join(columns)} FROM {COEFFICIENTS_TABLE} WHERE name = {p} AND data_version = {p}",
+        columns, ['string'] + ['float64'] * (len(columns) - 1),
+        params=(name, _stored_version(data_version))
+    )
+    if frame.empty:
+        return None
+    return Forecast(frame.set_index('region')[COEFFICIENT_COLUMNS], float(frame['confidence'].iloc[0]))
@@ -1,71 +1,134 @@
+"""Resource allocation charts: allocation vs. completion rate, utilization
+efficiency, sanitation time series and gap to target.
+
+    python graph.py      # show the charts
+    python reports.py    # render them to files instead (see reports.py)
+
+Each chart is a `draw_*(ax, data)` function drawing on an existing axes, so
+the same code serves the interactive windows here and the headless reports.
+"""
 import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
+import sqlite3
+
+import snapshots
+from allocation import AllocationPlan
+from metrics_store import LOCAL_DB, SDG_TARGET
+
+# The allocation charts show the districts receiving the most of a 10%
+# budget increase
+TOP_REGIONS = 8
+BUDGET_INCREASE = 0.10
+
+
+def load_allocation(db_path=LOCAL_DB):
+    """Allocated resources and completion rate of the TOP_REGIONS districts
+    receiving the most of the budget increase (allocation.py), from the
+    district stage counts in the local database (see ingest.py)."""
+    conn = sqlite3.connect(db_path)
+    try:
+        stages = pd.read_sql_query(
+            "SELECT district, beneficiary_selection, completed, foundation, lintel, roof, unstarted FROM pmay_data", conn
+        )
+    finally:
+        conn.close()
+    if stages.empty:
+        raise ValueError("pmay_data is empty; load it with ingest.py first.")
+
+    plan = AllocationPlan(stages)
+    allocation = plan.solve(plan.spent * BUDGET_INCREASE).nlargest(TOP_REGIONS, 'budget')
+    return pd.DataFrame({
+        'Allocated Resources': allocation['budget'],
+        'Completion Rate (%)': allocation['completion_rate'],
+    }, index=pd.Index(allocation.index, name='Region'))
+
+
+def load_history(path=snapshots.SNAPSHOT_DB):
+    """Quarter-end snapshots of the sanitation metrics (see snapshots.py)."""
+    history = snapshots.series('sanitation', grain='quarter', path=path)
+    history['quarter'] = history['date'].dt.to_period('Q').astype(str)
+    return history
 
-# Sample data creation
-np.random.seed(0)
-regions = ['Orissa', 'Karnataka', 'Tamil Nadu','Maharashtra', 'Gujrat', 'Bihar', 'UP', 'MP']
-allocated_resources = np.random.randint(100, 800, size=8)
-completion_rates = np.random.uniform(20, 100, size=8)
-target_completion_rates = [90, 80, 85, 75, 70, 65, 60, 55]  # Target rates for demonstration
 
 # 1. Resource vs. Completion Rate Bar Chart
-fig, ax = plt.subplots(figsize=(10, 9))
-ax.bar(regions, allocated_resources, color='skyblue', label='Allocated Resources')
-ax.plot(regions, completion_rates, color='orange', marker='o', label='Completion Rate (%)')
-ax.set_title("Resource Allocation vs. Completion Rate per Region")
-ax.set_ylabel("Resources & Completion Rate (%)")
-ax.legend()
+def draw_allocation(ax, allocation):
+    regions = allocation.index.tolist()
+    ax.bar(regions, allocation['Allocated Resources'], color='skyblue', label='Allocated Resources')
+    ax.plot(regions, allocation['Completion Rate (%)'], color='orange', marker='o', label='Completion Rate (%)')
+    ax.set_title("Resource Allocation vs. Completion Rate per Region")
+    ax.set_ylabel("Resources (₹ Lakh) & Completion Rate (%)")
+    ax.legend()
 
-# Display the chart for Resource vs. Completion Rate Bar Chart
-plt.show()
 
 # 2. Resource Utilization Efficiency Heatmap
-# Calculate efficiency as completion per unit resource for simplicity
-efficiency = [c / r for c, r in zip(completion_rates, allocated_resources)]
-efficiency_df = pd.DataFrame({'Region': regions, 'Efficiency': efficiency})
-efficiency_df.set_index('Region', inplace=True)
-
-fig, ax = plt.subplots(figsize=(8, 4))
-sns.heatmap(efficiency_df.T, annot=True, fmt=".2f", cmap="YlGnBu", ax=ax)
-ax.set_title("Resource Utilization Efficiency Heatmap (Completion per Unit Resource)")
-plt.show()
-
-# 3. Time-Series Analysis for Allocation and Completion Rates (Simulated over 5 periods)
-time_periods = ['Q1', 'Q2', 'Q3', 'Q4', 'Q5', 'Q6', 'Q7', 'Q8']
-resource_allocation_trend = [allocated_resources + np.random.randint(-40, 40, size=8) for _ in time_periods]
-completion_trend = [completion_rates + np.random.uniform(-8, 8, size=8) for _ in time_periods]
-
-resource_df = pd.DataFrame(resource_allocation_trend, columns=regions, index=time_periods)
-completion_df = pd.DataFrame(completion_trend, columns=regions, index=time_periods)
-
-fig, ax = plt.subplots(figsize=(10, 6))
-resource_df.plot(ax=ax, linestyle='--', marker='o')
-ax.set_title("Time-Series Analysis of Resource Allocation per Region")
-ax.set_ylabel("Resources Allocated")
-ax.set_xlabel("Time Period")
-plt.legend(loc='upper right')
-plt.show()
-
-fig, ax = plt.subplots(figsize=(10, 6))
-completion_df.plot(ax=ax, linestyle='-', marker='o')
-ax.set_title("Time-Series Analysis of Completion Rate per Region")
-ax.set_ylabel("Completion Rate (%)")
-ax.set_xlabel("Time Period")
-plt.legend(loc='upper right')
-plt.show()
+def draw_efficiency(ax, allocation):
+    # Calculate efficiency as completion per unit resource for simplicity
+    efficiency_df = pd.DataFrame({
+        'Efficiency': allocation['Completion Rate (%)'] / allocation['Allocated Resources']
+    })
+    sns.heatmap(efficiency_df.T, annot=True, fmt=".2f", cmap="YlGnBu", ax=ax)
+    ax.set_title("Resource Utilization Efficiency Heatmap (Completion per Unit Resource)")
+
+
+# 3. Time-Series Analysis for Allocation and Completion Rates
+def draw_resource_series(ax, history):
+    resource_df = history.pivot(index='quarter', columns='region', values='total')
+    resource_df.plot(ax=ax, linestyle='--', marker='o')
+    ax.set_title("Time-Series Analysis of Resource Allocation per Region")
+    ax.set_ylabel("Toilets Sanctioned")
+    ax.set_xlabel("Time Period")
+    ax.legend(loc='upper right')
+
+
+def draw_completion_series(ax, history):
+    completion_df = history.pivot(index='quarter', columns='region', values='completion_rate')
+    completion_df.plot(ax=ax, linestyle='-', marker='o')
+    ax.set_title("Time-Series Analysis of Completion Rate per Region")
+    ax.set_ylabel("Completion Rate (%)")
+    ax.set_xlabel("Time Period")
+    ax.legend(loc='upper right')
+
 
 # 4. Gap Analysis Visualization
-gap_to_target = np.array(target_completion_rates) - np.array(completion_rates)
-gap_df = pd.DataFrame({'Region': regions, 'Gap to Target (%)': gap_to_target, 'Allocated Resources': allocated_resources})
-gap_df.set_index('Region', inplace=True)
-
-fig, ax1 = plt.subplots(figsize=(10, 6))
-gap_df['Gap to Target (%)'].plot(kind='bar', color='salmon', ax=ax1, position=0.5, width=0.4, label='Gap to Target (%)')
-gap_df['Allocated Resources'].plot(kind='bar', color='lightblue', ax=ax1, position=-0.5, width=0.4, label='Allocated Resources')
-ax1.set_title("Gap to Target Completion Rate and Resource Allocation per Region")
-ax1.set_ylabel("Gap to Target (%) & Allocated Resources")
-ax1.legend()
-
-plt.show()
+def draw_gap(ax, allocation):
+    gap_df = pd.DataFrame({
+        'Gap to Target (%)': SDG_TARGET - allocation['Completion Rate (%)'],
+        'Allocated Resources': allocation['Allocated Resources'],
+    })
+    gap_df['Gap to Target (%)'].plot(kind='bar', color='salmon', ax=ax, position=0.5, width=0.4, label='Gap to Target (%)')
+    gap_df['Allocated Resources'].plot(kind='bar', color='lightblue', ax=ax, position=-0.5, width=0.4, label='Allocated Resources')
+    ax.set_title("Gap to Target Completion Rate and Resource Allocation per Region")
+    ax.set_ylabel("Gap to Target (%) & Allocated Resources")
+    ax.legend()
+
+
+# Chart name -> (figure size, draw function, input: 'allocation' or 'history')
+CHARTS = {
+    'allocation': ((10, 9), draw_allocation, 'allocation'),
+    'efficiency': ((8, 4), draw_efficiency, 'allocation'),
+    'resource_series': ((10, 6), draw_resource_series, 'history'),
+    'completion_series': ((10, 6), draw_completion_series, 'history'),
+    'gap': ((10, 6), draw_gap, 'allocation'),
+}
+
+
+def main():
+    try:
+        inputs = {'allocation': load_allocation(), 'history': load_history()}
+    except ValueError as e:
+        raise SystemExit(str(e))
+    if inputs['history'].empty:
+        print("No sanitation snapshots recorded yet; run ingest.py to start the history.")
+
+    for figsize, draw, source in CHARTS.values():
+        data = inputs[source]
+        if data.empty:
+            continue
+        fig, ax = plt.subplots(figsize=figsize)
+        draw(ax, data)
+        plt.show()
+
+
+if __name__ == '__main__':
+    main()
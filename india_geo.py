@@ -0,0 +1,318 @@
+"""India admin boundaries for the dashboards' choropleths.
+
+The bundled files in geo/ are built from a source GeoJSON with
+
+    python india_geo.py build India.js --level state
+
+which writes one file per resolution in RESOLUTIONS. The state source is
+the India map of the ECharts country maps (MIT, derived from Natural
+Earth); ECharts' compressed encoding is decoded transparently. A district
+source can be built the same way with `--level district`. Until district
+boundaries are bundled, district data is placed on its state through
+geo/india_district_states.csv.
+"""
+import argparse
+import csv
+import functools
+import json
+import os
+import re
+
+import numpy as np
+import plotly.graph_objects as go
+
+GEO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "geo")
+DISTRICT_STATES = os.path.join(GEO_DIR, "india_district_states.csv")
+
+# Douglas-Peucker tolerance in degrees for each bundled resolution
+RESOLUTIONS = {
+    'high': 0.0,
+    'medium': 0.02,
+    'low': 0.08,
+}
+
+# Former and alternative names seen in the source data, by normalized name
+NAME_ALIASES = {
+    'orissa': 'odisha',
+    'pondicherry': 'puducherry',
+    'uttaranchal': 'uttarakhand',
+    'nctofdelhi': 'delhi',
+    'andamannicobar': 'andamanandnicobarislands',
+    'andamanandnicobar': 'andamanandnicobarislands',
+    'jammukashmir': 'jammuandkashmir',
+    'dadranagarhaveli': 'dadraandnagarhaveli',
+}
+
+
+def normalize_name(name):
+    """Join key for region names: 'West Bengal ', 'west_bengal' -> 'westbengal'."""
+    key = re.sub(r'[^a-z]', '', str(name).lower())
+    return NAME_ALIASES.get(key, key)
+
+
+def _decode_ring(encoded, offset, scale):
+    # ECharts zigzag/delta encoding: two characters per point
+    codes = np.frombuffer(encoded.encode('utf-16-le'), dtype=np.uint16).astype(np.int64) - 64
+    codes = (codes >> 1) ^ -(codes & 1)
+    points = codes.reshape(-1, 2)
+    points[0] += offset
+    return np.cumsum(points, axis=0) / scale
+
+
+def load_source(path):
+    """Read a GeoJSON FeatureCollection, or an ECharts map script wrapping one."""
+    with open(path, encoding='utf-8') as file:
+        text = file.read()
+    start = text.index('{"type"') if not text.lstrip().startswith('{') else 0
+    collection, _ = json.JSONDecoder().raw_decode(text[start:])
+    if not collection.get('UTF8Encoding'):
+        return collection
+
+    scale = collection.get('UTF8Scale', 1024)
+    for feature in collection['features']:
+        geometry = feature['geometry']
+        offsets = geometry.pop('encodeOffsets')
+        if geometry['type'] == 'Polygon':
+            geometry['coordinates'] = [
+                _decode_ring(ring, offset, scale).tolist()
+                for ring, offset in zip(geometry['coordinates'], offsets)
+            ]
+        else:
+            geometry['coordinates'] = [
+                [_decode_ring(ring, offset, scale).tolist() for ring, offset in zip(polygon, polygon_offsets)]
+                for polygon, polygon_offsets in zip(geometry['coordinates'], offsets)
+            ]
+    del collection['UTF8Encoding']
+    return collection
+
+
+def simplify_ring(ring, tolerance):
+    """Douglas-Peucker simplification of a closed ring (N x 2 array).
+
+    Iterative, with the distances of each span computed in one vectorized
+    step. Returns None when fewer than four points would remain.
+    """
+    ring = np.asarray(ring, dtype=float)
+    if tolerance <= 0 or len(ring) <= 4:
+        return ring if len(ring) >= 4 else None
+
+    keep = np.zeros(len(ring), dtype=bool)
+    keep[0] = keep[-1] = True
+    # A closed ring starts and ends on the same point, so split it at the
+    # point farthest from the start first
+    far = int(np.argmax(np.hypot(*(ring - ring[0]).T)))
+    keep[far] = True
+    stack = [(0, far), (far, len(ring) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = ring[start + 1:end]
+        a, b = ring[start], ring[end]
+        direction = b - a
+        length = np.hypot(*direction)
+        if length == 0:
+            distances = np.hypot(*(segment - a).T)
+        else:
+            offset = segment - a
+            distances = np.abs(direction[0] * offset[:, 1] - direction[1] * offset[:, 0]) / length
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance:
+            split = start + 1 + index
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    simplified = ring[keep]
+    return simplified if len(simplified) >= 4 else None
+
+
+def _signed_area(ring):
+    x, y = ring[:, 0], ring[:, 1]
+    return 0.5 * float(np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1]))
+
+
+def _polygon(rings, tolerance, digits):
+    # Choroplethmapbox fills with mapbox-gl, which tells a polygon's holes from
+    # the next polygon's exterior by winding only, so exteriors are wound one
+    # way (clockwise) and holes the other, whatever the source file used
+    result = []
+    for position, ring in enumerate(rings):
+        ring = simplify_ring(ring, tolerance)
+        if ring is None:
+            if position == 0:
+                return None
+            continue
+        clockwise = _signed_area(ring) < 0
+        if clockwise != (position == 0):
+            ring = ring[::-1]
+        result.append(np.round(ring, digits).tolist())
+    return result
+
+
+def simplify_geometry(geometry, tolerance, digits=4):
+    polygons = [geometry['coordinates']] if geometry['type'] == 'Polygon' else geometry['coordinates']
+    simplified = [_polygon(polygon, tolerance, digits) for polygon in polygons]
+    kept = [polygon for polygon in simplified if polygon]
+    if not kept:
+        # Never drop a region entirely: keep its largest polygon unsimplified
+        largest = max(polygons, key=lambda polygon: abs(_signed_area(np.asarray(polygon[0], dtype=float))))
+        kept = [_polygon(largest, 0.0, digits)]
+    return {'type': 'MultiPolygon', 'coordinates': kept}
+
+
+def boundary_path(level='state', resolution='medium'):
+    return os.path.join(GEO_DIR, f"india_{level}_{resolution}.geojson")
+
+
+def build(source_path, level='state', out_dir=GEO_DIR, name_property='name'):
+    """Write one simplified GeoJSON per resolution; returns {resolution: bytes}."""
+    source = load_source(source_path)
+    os.makedirs(out_dir, exist_ok=True)
+    sizes = {}
+    for resolution, tolerance in RESOLUTIONS.items():
+        features = [
+            {
+                'type': 'Feature',
+                'id': normalize_name(feature['properties'][name_property]),
+                'properties': {'name': feature['properties'][name_property]},
+                'geometry': simplify_geometry(feature['geometry'], tolerance),
+            }
+            for feature in source['features']
+        ]
+        path = os.path.join(out_dir, f"india_{level}_{resolution}.geojson")
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({'type': 'FeatureCollection', 'features': features}, file, separators=(',', ':'))
+        sizes[resolution] = os.path.getsize(path)
+    return sizes
+
+
+@functools.lru_cache(maxsize=None)
+def load_boundaries(level='state', resolution='medium'):
+    with open(boundary_path(level, resolution), encoding='utf-8') as file:
+        return json.load(file)
+
+
+@functools.lru_cache(maxsize=None)
+def region_index(level='state'):
+    """Normalized region name -> feature id of the bundled boundaries."""
+    # Feature ids are normalized names; any resolution has the same features
+    return {feature['id']: feature['id'] for feature in load_boundaries(level, 'low')['features']}
+
+
+def match_regions(names, level='state'):
+    """Feature id for each region name, or None when it has no boundary."""
+    index = region_index(level)
+    return [index.get(normalize_name(name)) for name in names]
+
+
+@functools.lru_cache(maxsize=None)
+def district_states():
+    """Normalized district name -> state feature id, from the bundled
+    geo/india_district_states.csv, for placing district data where only
+    state boundaries are available."""
+    with open(DISTRICT_STATES, encoding='utf-8', newline='') as file:
+        return {normalize_name(row['district']): normalize_name(row['state']) for row in csv.DictReader(file)}
+
+
+def match_states(names):
+    """State feature id for each district name, or None when it is unknown."""
+    index = district_states()
+    return [index.get(normalize_name(name)) for name in names]
+
+
+def _bounds(geojson):
+    points = np.concatenate([
+        np.asarray(ring) for feature in geojson['features']
+        for polygon in feature['geometry']['coordinates'] for ring in polygon
+    ])
+    return points.min(axis=0), points.max(axis=0)
+
+
+@functools.lru_cache(maxsize=None)
+def _template(level, resolution):
+    # A mapbox trace on the blank 'white-bg' style draws the boundaries
+    # without fetching tiles or a world basemap, so the map works offline
+    geojson = load_boundaries(level, resolution)
+    low, high = _bounds(geojson)
+    span = float(max(high - low))
+    locations = [feature['id'] for feature in geojson['features']]
+    names = [feature['properties']['name'] for feature in geojson['features']]
+    figure = go.Figure()
+    # Grey base layer so regions without a value are still drawn
+    figure.add_trace(go.Choroplethmapbox(
+        geojson=geojson, featureidkey='id', locations=locations, text=names,
+        z=np.zeros(len(locations)), colorscale=[[0, '#d9d9d9'], [1, '#d9d9d9']],
+        showscale=False, marker_line_width=0.5, marker_line_color='white',
+        hovertemplate="%{text}<br>No data<extra></extra>",
+    ))
+    figure.add_trace(go.Choroplethmapbox(
+        name='values', geojson=geojson, featureidkey='id', locations=locations, text=names,
+        marker_line_width=0.5, marker_line_color='white',
+    ))
+    figure.update_layout(
+        mapbox=dict(
+            style='white-bg',
+            center=dict(lon=float(low[0] + high[0]) / 2, lat=float(low[1] + high[1]) / 2),
+            zoom=float(np.log2(360 / span)) - 0.3,
+        ),
+        margin=dict(l=0, r=0, t=50, b=0),
+        height=650,
+    )
+    return figure.to_dict()
+
+
+def choropleth(values, color_scale='Viridis', title=None, level='state', resolution='medium',
+               colorbar_title=None, hover=None, hover_format=':,.2f'):
+    """Choropleth of `values` (a Series indexed by region name).
+
+    The geometry, locations and layout come from a template built once per
+    level and resolution; each call only fills in the color array. Regions
+    without a value are drawn in grey. `hover` is an optional frame, indexed
+    like `values`, of extra columns to show on hover.
+    """
+    template = _template(level, resolution)
+    locations = template['data'][1]['locations']
+    ids = match_regions(values.index, level)
+    position = {location: i for i, location in enumerate(locations)}
+    rows = [(position[region_id], i) for i, region_id in enumerate(ids) if region_id in position]
+    z = np.full(len(locations), np.nan)
+    z[[row for row, _ in rows]] = values.to_numpy(dtype=float)[[i for _, i in rows]]
+
+    hovertemplate = f"%{{text}}<br>{values.name or 'Value'}: %{{z{hover_format}}}"
+    customdata = None
+    if hover is not None:
+        customdata = np.full((len(locations), hover.shape[1]), None, dtype=object)
+        customdata[[row for row, _ in rows]] = hover.to_numpy(dtype=object)[[i for _, i in rows]]
+        for j, column in enumerate(hover.columns):
+            hovertemplate += f"<br>{column}: %{{customdata[{j}]{hover_format}}}"
+
+    figure = go.Figure(template, skip_invalid=True)
+    figure.update_traces(
+        selector=dict(name='values'),
+        z=z,
+        customdata=customdata,
+        colorscale=color_scale,
+        colorbar_title=colorbar_title,
+        hovertemplate=hovertemplate + "<extra></extra>",
+    )
+    if title:
+        figure.update_layout(title=title)
+    return figure
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the bundled India boundary files.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build_parser = subparsers.add_parser('build', help="simplify a source GeoJSON into geo/")
+    build_parser.add_argument('source')
+    build_parser.add_argument('--level', default='state', choices=['state', 'district'])
+    build_parser.add_argument('--name-property', default='name')
+    args = parser.parse_args()
+
+    sizes = build(args.source, args.level, name_property=args.name_property)
+    for resolution, size in sizes.items():
+        print(f"india_{args.level}_{resolution}.geojson: {size / 1024:,.0f} KB")
+
+
+if __name__ == '__main__':
+    main()
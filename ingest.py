@@ -0,0 +1,132 @@
+"""Bulk-load the PMAY / sanitation CSV exports into the local SQLite database.
+
+    python ingest.py pmay Pradhan_Mantri_Awas_Urban_24-11-2021.csv
+    python ingest.py sanitation Progress_Under_Low_Cost_Sanitation.csv
+
+Files are streamed in chunks, headers are normalized to data_schema.yaml,
+and rows breaking the schema's `range` / `allow_null` rules are written to
+the `ingest_quarantine` table instead of the target table. The whole file
+is loaded in a single transaction, after which the completion metrics are
+refreshed and a snapshot of them is appended to the history (snapshots.py).
+"""
+import argparse
+import datetime
+import json
+import time
+
+import pandas as pd
+
+from database import DB_PATH, bump_load_version, connect, create_table
+from metrics_store import METRICS, refresh_from_source
+from query_cache import probe_table_version
+from schema import SCHEMA_PATH, load_schemas
+
+
+def ensure_quarantine(conn):
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS ingest_quarantine ("
+        "dataset TEXT, source_file TEXT, line_number INTEGER, reason TEXT, "
+        "raw_row TEXT, ingested_at TEXT)"
+    )
+
+
+def _records(frame):
+    columns = []
+    for name in frame:
+        column = frame[name]
+        if column.dtype == float:
+            # SQLite stores NaN as NULL
+            columns.append(column.tolist())
+        else:
+            columns.append(column.astype(object).where(column.notna(), None).tolist())
+    return zip(*columns)
+
+
+def ingest_csv(dataset, csv_path, db_path=DB_PATH, schema_path=SCHEMA_PATH,
+               chunksize=100000, replace=True):
+    """Load `csv_path` into the table for `dataset`; returns a summary dict."""
+    schema = load_schemas(schema_path)[dataset]
+    table = schema.table
+    columns = schema.columns
+    insert = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    ingested_at = datetime.datetime.now().isoformat(timespec='seconds')
+
+    started = time.perf_counter()
+    loaded = quarantined = 0
+    conn = connect(db_path)
+    try:
+        create_table(conn, table, schema.fields)
+        ensure_quarantine(conn)
+        conn.execute("BEGIN")
+        if replace:
+            conn.execute(f"DELETE FROM {table}")
+
+        # Types are inferred per chunk; columns that fail to parse as numbers
+        # come through as text and are coerced in CompiledSchema.validate
+        reader = pd.read_csv(csv_path, chunksize=chunksize, encoding='utf-8-sig',
+                             skipinitialspace=True, low_memory=False)
+        for chunk in reader:
+            schema.normalize_columns(chunk)
+            coerced, valid, reasons = schema.validate(chunk)
+
+            conn.executemany(insert, _records(coerced.loc[valid, columns]))
+            loaded += int(valid.sum())
+
+            rejected = chunk[~valid]
+            rejected = rejected.astype(object).where(rejected.notna(), None)
+            if not rejected.empty:
+                conn.executemany(
+                    "INSERT INTO ingest_quarantine VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (dataset, str(csv_path), int(line) + 2, reasons[line],
+                         json.dumps(row), ingested_at)
+                        for line, row in zip(rejected.index, rejected.to_dict('records'))
+                    ]
+                )
+                quarantined += len(rejected)
+        bump_load_version(conn, table)
+        conn.commit()
+
+        # Materialize the metrics for the new data, which also records a
+        # snapshot in the history
+        if dataset in METRICS:
+            refresh_from_source(conn, dataset, probe_table_version(conn, table, "sqlite"))
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - started
+    return {
+        'dataset': dataset,
+        'table': table,
+        'loaded': loaded,
+        'quarantined': quarantined,
+        'seconds': elapsed,
+        'rows_per_sec': (loaded + quarantined) / elapsed if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load a PMAY or sanitation CSV into SQLite.")
+    tables = sorted(name for name, schema in load_schemas().items() if schema.table)
+    parser.add_argument('dataset', choices=tables)
+    parser.add_argument('csv_path')
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--schema', default=SCHEMA_PATH)
+    parser.add_argument('--chunksize', type=int, default=100000)
+    parser.add_argument('--append', action='store_true', help="keep existing rows instead of replacing them")
+    args = parser.parse_args()
+
+    summary = ingest_csv(args.dataset, args.csv_path, args.db, args.schema,
+                         args.chunksize, replace=not args.append)
+    print(
+        f"Loaded {summary['loaded']:,} rows into {summary['table']} "
+        f"({summary['quarantined']:,} quarantined) in {summary['seconds']:.2f}s "
+        f"- {summary['rows_per_sec']:,.0f} rows/sec"
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+"""Timing spans for dashboard reruns.
+
+    with span('pmay.fetch', table='pmay_data'):
+        ...
+
+    @traced('forecast.fit')
+    def fit(...):
+        ...
+
+Spans nest per thread (each Streamlit session reruns in its own thread),
+and a rerun is the root span opened by `start_run(section)` and closed by
+`end_run()`. Finished spans go into a fixed-size ring buffer shared by
+every session. `section_stats` gives p50/p95 rerun times per section,
+`run_spans` gives the tree of one rerun for a flame graph, and `export`
+appends the buffer to a JSON lines file. `debug_panel` renders all three
+in a page when it is opened with `?debug=1` (or DASHBOARD_DEBUG=1).
+"""
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from lazy_imports import lazy_import
+
+st = lazy_import('streamlit')
+go = lazy_import('plotly.graph_objects')
+
+SPANS_PATH = os.getenv(
+    "DASHBOARD_SPANS_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "spans.jsonl")
+)
+
+# How far back the debug panel's flame graph can go per section
+RECENT_RUNS = 20
+
+SPAN_COLUMNS = ['run', 'section', 'id', 'parent', 'name', 'depth', 'time', 'start', 'duration', 'attrs']
+
+
+class SpanBuffer:
+    """The last `max_spans` finished spans, oldest first out."""
+
+    def __init__(self, max_spans=20000):
+        self._spans = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        self._exported = 0
+        self._recorded = 0
+
+    def append(self, record):
+        with self._lock:
+            self._spans.append(record)
+            self._recorded += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self._spans)
+
+    def export(self, path=SPANS_PATH):
+        """Append the spans recorded since the last export to `path` as JSON
+        lines; returns how many were written."""
+        with self._lock:
+            pending = min(self._recorded - self._exported, len(self._spans))
+            records = list(itertools.islice(self._spans, len(self._spans) - pending, None))
+            self._exported = self._recorded
+        with open(path, 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, default=str) + "\n")
+        return len(records)
+
+    def stats(self):
+        with self._lock:
+            return {'recorded': self._recorded, 'buffered': len(self._spans), 'exported': self._exported}
+
+
+buffer = SpanBuffer(int(os.getenv("DASHBOARD_SPANS_BUFFER", "20000")))
+_local = threading.local()
+_ids = itertools.count(1)
+
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+@contextmanager
+def span(name, **attrs):
+    """Time the block as span `name`, a child of the innermost open span."""
+    stack = _stack()
+    parent = stack[-1] if stack else None
+    record = {
+        'run': parent['run'] if parent else None,
+        'section': parent['section'] if parent else None,
+        'id': next(_ids),
+        'parent': parent['id'] if parent else None,
+        'name': name,
+        'depth': len(stack),
+        'time': time.time(),
+        'start': time.perf_counter(),
+        'attrs': attrs,
+    }
+    stack.append(record)
+    try:
+        yield record
+    finally:
+        stack.pop()
+        record['duration'] = time.perf_counter() - record['start']
+        buffer.append(record)
+
+
+def traced(name=None):
+    """Decorator running the function inside a span (default: its qualified name)."""
+    def decorate(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def start_run(section, **attrs):
+    """Open the root span of a rerun of `section`; returns the run id."""
+    end_run()
+    run = uuid.uuid4().hex[:12]
+    manager = span(section, **attrs)
+    record = manager.__enter__()
+    record['run'], record['section'] = run, section
+    _local.run = manager
+    return run
+
+
+def end_run():
+    """Close the current rerun's root span, if one is open."""
+    manager = getattr(_local, 'run', None)
+    if manager is not None:
+        _local.run = None
+        _local.section = _stack()[0]['section']
+        # Spans a stopped rerun left open are closed with it
+        stack = _stack()
+        del stack[1:]
+        manager.__exit__(None, None, None)
+
+
+def frame(spans=None):
+    """Spans as a DataFrame, start times relative to their run's start."""
+    records = buffer.snapshot() if spans is None else spans
+    spans = pd.DataFrame.from_records(records, columns=SPAN_COLUMNS)
+    if not spans.empty:
+        spans['start'] = spans['start'] - spans.groupby('run')['start'].transform('min')
+    return spans
+
+
+def section_stats(spans=None):
+    """Rerun count and p50/p95 rerun time in milliseconds per section."""
+    spans = frame(spans)
+    runs = spans[spans['parent'].isna() & spans['run'].notna()]
+    if runs.empty:
+        return pd.DataFrame(columns=['reruns', 'p50 (ms)', 'p95 (ms)'])
+    grouped = runs.groupby('section')['duration']
+    return pd.DataFrame({
+        'reruns': grouped.size(),
+        'p50 (ms)': grouped.quantile(0.5) * 1000,
+        'p95 (ms)': grouped.quantile(0.95) * 1000,
+    }).round(2)
+
+
+def run_spans(run, spans=None):
+    """Spans of one rerun, ordered by start."""
+    spans = frame(spans)
+    return spans[spans['run'] == run].sort_values(['start', 'depth'], ignore_index=True)
+
+
+def self_times(spans):
+    """Total and self (excluding children) milliseconds per span name."""
+    if spans.empty:
+        return pd.DataFrame(columns=['calls', 'total (ms)', 'self (ms)'])
+    children = spans.groupby('parent')['duration'].sum()
+    own = spans['duration'] - spans['id'].map(children).fillna(0.0)
+    grouped = spans.assign(own=np.maximum(own, 0.0)).groupby('name')
+    return pd.DataFrame({
+        'calls': grouped.size(),
+        'total (ms)': grouped['duration'].sum() * 1000,
+        'self (ms)': grouped['own'].sum() * 1000,
+    }).sort_values('self (ms)', ascending=False).round(2)
+
+
+def export(path=SPANS_PATH):
+    return buffer.export(path)
+
+
+def flame_figure(spans):
+    """One bar per span of a rerun: depth down the y axis, time along x."""
+    fig = go.Figure(go.Bar(
+        y=spans['depth'],
+        x=spans['duration'] * 1000,
+        base=spans['start'] * 1000,
+        orientation='h',
+        text=spans['name'],
+        textposition='inside',
+        insidetextanchor='start',
+        customdata=spans['attrs'].map(lambda attrs: json.dumps(attrs, default=str)),
+        hovertemplate="%{text}<br>%{x:.2f} ms from %{base:.2f} ms<br>%{customdata}<extra></extra>",
+    ))
+    fig.update_yaxes(autorange='reversed', title='Depth', dtick=1)
+    fig.update_xaxes(title='Milliseconds since rerun start')
+    fig.update_layout(title="Rerun Flame Graph", height=120 + 40 * (int(spans['depth'].max()) + 1), bargap=0.05)
+    return fig
+
+
+def debug_enabled():
+    return os.getenv("DASHBOARD_DEBUG") == "1" or st.query_params.get('debug') == '1'
+
+
+def debug_panel():
+    """Per-section p50/p95, the latest reruns as flame graphs with self
+    times, and JSON lines export; only rendered when debug_enabled()."""
+    if not debug_enabled():
+        return
+    with st.expander("🛠️ Debug: Rerun Timings"):
+        spans = frame()
+        st.subheader("Rerun Time per Section")
+        st.dataframe(section_stats(buffer.snapshot()))
+
+        runs = spans[spans['parent'].isna() & spans['run'].notna()].sort_values('time', ascending=False)
+        if not runs.empty:
+            # Reruns of the section this session just ran, counted back from
+            # it, so the widget keeps its state while every rerun adds a run
+            section = getattr(_local, 'section', None)
+            if section in set(runs['section']):
+                runs = runs[runs['section'] == section]
+            back = st.number_input("Reruns back from the latest", 0, RECENT_RUNS - 1, 0, key='debug_back')
+            row = runs.iloc[min(back, len(runs) - 1)]
+            st.caption(f"{row['section']} at {pd.Timestamp(row['time'], unit='s'):%H:%M:%S} ({row['duration'] * 1000:.0f} ms)")
+            selected = run_spans(row['run'], buffer.snapshot())
+            st.plotly_chart(flame_figure(selected), use_container_width=True)
+            st.dataframe(self_times(selected))
+
+        st.json(buffer.stats())
+        if st.button("Export spans"):
+            st.success(f"Appended {export():,} spans to {SPANS_PATH}")
@@ -0,0 +1,61 @@
+"""Heavy modules imported on first use instead of at startup.
+
+    px = lazy_import('plotly.express')
+
+binds a placeholder that imports `plotly.express` the first time one of its
+attributes is read, so a page or section that never draws a chart never
+pays for the import. The first use is timed; `stats()` reports which lazy
+modules have been loaded and what each cost.
+"""
+import importlib
+import sys
+import threading
+import time
+import types
+
+_lock = threading.Lock()
+_load_seconds = {}
+
+
+class LazyModule(types.ModuleType):
+    """Stands in for module `name` until an attribute is first read."""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            # Streamlit runs sessions in threads; only one of them imports
+            with _lock:
+                module = self.__dict__['_module']
+                if module is None:
+                    started = time.perf_counter()
+                    module = importlib.import_module(self.__name__)
+                    _load_seconds[self.__name__] = time.perf_counter() - started
+                    self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name):
+    """Module `name`, or a LazyModule for it if it is not imported yet."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
+
+
+def stats():
+    with _lock:
+        return {name: round(seconds, 4) for name, seconds in _load_seconds.items()}
@@ -0,0 +1,160 @@
+// Map page generated by build_map.py. Boundaries load once; marker tiles
+// are fetched only when they enter the viewport.
+(function () {
+    var container = document.getElementById('map');
+    var version = container.getAttribute('data-version');
+    var dataUrl = function (path) { return 'map/data/' + path + '?v=' + version; };
+
+    var map = L.map('map', { center: [22.5, 80.0], zoom: 5, preferCanvas: true });
+
+    // No tiles by default so the map works offline; OpenStreetMap can be
+    // switched on from the layer control when online
+    var blank = L.layerGroup().addTo(map);
+    var osm = L.tileLayer('https://tile.openstreetmap.org/{z}/{x}/{y}.png', {
+        maxZoom: 19,
+        attribution: '&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors'
+    });
+
+    var colors = ['#440154', '#3b528b', '#21918c', '#5ec962', '#fde725'];
+    var color = function (rate) {
+        if (rate === undefined) { return '#d9d9d9'; }
+        return colors[Math.min(colors.length - 1, Math.floor(rate / (100 / colors.length)))];
+    };
+    var format = function (value) { return Number(value).toLocaleString(); };
+
+    var regions = L.geoJSON(null, {
+        style: function (feature) {
+            return { color: 'white', weight: 1, fillColor: color(feature.properties.rate), fillOpacity: 0.75 };
+        },
+        onEachFeature: function (feature, layer) {
+            var p = feature.properties;
+            layer.bindTooltip(p.rate === undefined ? p.name + '<br>No data'
+                : p.name + '<br>Sanitation completion: ' + p.rate + '%');
+        }
+    }).addTo(map);
+
+    var markers = L.layerGroup().addTo(map);
+    L.control.layers({ 'No basemap': blank, 'OpenStreetMap': osm },
+                     { 'Sanitation completion': regions, 'Regions': markers }).addTo(map);
+
+    var legend = L.control({ position: 'bottomright' });
+    legend.onAdd = function () {
+        var div = L.DomUtil.create('div', 'legend');
+        var step = 100 / colors.length;
+        div.innerHTML = '<b>Completion (%)</b><br>' + colors.map(function (c, i) {
+            return '<i style="background:' + c + '"></i>' + (i * step) + '&ndash;' + ((i + 1) * step);
+        }).join('<br>');
+        return div;
+    };
+    legend.addTo(map);
+
+    // Boundaries come at several resolutions, coarsest first, each with the
+    // deepest zoom it still looks exact at; the layer is swapped as the zoom
+    // crosses them, and each file is fetched once
+    var resolutions = [];
+    var shown = null;
+    var boundaries = {};
+
+    function resolutionFor(zoom) {
+        for (var i = 0; i < resolutions.length; i++) {
+            if (resolutions[i].max_zoom === null || zoom <= resolutions[i].max_zoom) {
+                return resolutions[i].resolution;
+            }
+        }
+        return resolutions[resolutions.length - 1].resolution;
+    }
+
+    function showBoundaries(resolution) {
+        shown = resolution;
+        if (!boundaries[resolution]) {
+            boundaries[resolution] = fetch(dataUrl('regions_' + resolution + '.geojson'))
+                .then(function (response) { return response.json(); });
+        }
+        return boundaries[resolution].then(function (data) {
+            // A later zoom may have asked for another resolution meanwhile
+            if (shown !== resolution) { return; }
+            regions.clearLayers();
+            regions.addData(data);
+        });
+    }
+
+    fetch(dataUrl('regions.json'))
+        .then(function (response) { return response.json(); })
+        .then(function (index) {
+            resolutions = index;
+            // Fitting India first sets the zoom the resolution is picked for
+            return showBoundaries(resolutions[0].resolution).then(function () {
+                map.fitBounds(regions.getBounds());
+                map.on('zoomend', function () {
+                    var resolution = resolutionFor(map.getZoom());
+                    if (resolution !== shown) { showBoundaries(resolution); }
+                });
+                var resolution = resolutionFor(map.getZoom());
+                if (resolution !== shown) { showBoundaries(resolution); }
+            });
+        });
+
+    var tileDegrees = null;
+    var available = {};
+    var requested = {};
+
+    // [name, dataset, completed, total, rate, districts]
+    var describe = function (row) {
+        return '<b>' + row[0] + '</b> (' + row[1] + ')' +
+            (row[5] ? '<br>Sum of ' + row[5] + ' district' + (row[5] > 1 ? 's' : '') : '') +
+            '<br>Completed: ' + format(row[2]) + '<br>Total: ' + format(row[3]) + '<br>Completion: ' + row[4] + '%';
+    };
+
+    function addMarkers(rows) {
+        rows.forEach(function (row) {
+            // [lat, lon, ...] followed by the fields describe() reads; the
+            // larger ring of a state's districts stays clickable around
+            // the state's own marker
+            L.circleMarker([row[0], row[1]], {
+                radius: row[7] ? 10 : 6, weight: 1, color: '#333', fillColor: color(row[6]), fillOpacity: 0.9
+            }).bindPopup(describe(row.slice(2))).addTo(markers);
+        });
+    }
+
+    function loadVisibleTiles() {
+        if (tileDegrees === null) { return; }
+        var bounds = map.getBounds();
+        var rowMin = Math.floor(bounds.getSouth() / tileDegrees), rowMax = Math.floor(bounds.getNorth() / tileDegrees);
+        var colMin = Math.floor(bounds.getWest() / tileDegrees), colMax = Math.floor(bounds.getEast() / tileDegrees);
+        for (var row = rowMin; row <= rowMax; row++) {
+            for (var col = colMin; col <= colMax; col++) {
+                var key = row + '_' + col;
+                if (available[key] && !requested[key]) {
+                    requested[key] = true;
+                    fetch(dataUrl('markers/' + key + '.json'))
+                        .then(function (response) { return response.json(); })
+                        .then(addMarkers);
+                }
+            }
+        }
+    }
+
+    // Regions with no boundary to place them on, listed rather than dropped
+    fetch(dataUrl('unplaced.json'))
+        .then(function (response) { return response.json(); })
+        .then(function (rows) {
+            if (!rows.length) { return; }
+            var list = L.control({ position: 'topright' });
+            list.onAdd = function () {
+                var div = L.DomUtil.create('div', 'legend unplaced');
+                div.innerHTML = '<b>Not on the map (' + rows.length + ')</b><br>' + rows.map(describe).join('<hr>');
+                L.DomEvent.disableScrollPropagation(div);
+                return div;
+            };
+            list.addTo(map);
+        });
+
+    fetch(dataUrl('markers/index.json'))
+        .then(function (response) { return response.json(); })
+        .then(function (index) {
+            tileDegrees = index.tile_degrees;
+            index.tiles.forEach(function (key) { available[key] = true; });
+            loadVisibleTiles();
+        });
+    map.on('moveend', loadVisibleTiles);
+})();
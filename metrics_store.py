@@ -0,0 +1,216 @@
+import datetime
+import os
+import sqlite3
+
+import pandas as pd
+
+import snapshots
+from arrow_fetch import fetch_frame
+from database import bump_load_version
+from datasets import ratio_percent
+from instrumentation import traced
+
+LOCAL_DB = os.getenv(
+    "DASHBOARD_SQLITE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "housing_sanitation.db")
+)
+SDG_TARGET = 100
+
+# Sources of completion metrics. `region`, `completed` and `total` name the
+# columns of the input frame; `table` is the materialized metrics table,
+# `source_table` is set for warehouse tables the metrics can be rebuilt from
+# directly, and `stages` lists the construction stage columns (earliest
+# first) recorded in the snapshot history.
+METRICS = {
+    'pmay': {
+        'table': 'pmay_metrics',
+        'source_table': 'pmay_data',
+        'region': 'district',
+        'completed': 'completed',
+        'total': 'beneficiary_selection',
+        'stages': ['unstarted', 'foundation', 'lintel', 'roof'],
+    },
+    'sanitation': {
+        'table': 'sanitation_metrics',
+        'source_table': 'sanitation_data',
+        'region': 'state',
+        'completed': 'completed',
+        'total': 'sanctioned',
+    },
+    # State-level frames used by dashboard.py and dashboard2.py, computed in
+    # memory by local_metrics rather than materialized
+    'dashboard_pmay': {
+        'region': 'State',
+        'completed': 'Houses_Completed',
+        'total': 'Houses_Sanctioned',
+    },
+    'dashboard2_pmay': {
+        'region': 'State',
+        'completed': 'Houses_Completed',
+        'total': 'Houses_Sanctioned',
+    },
+}
+
+METRIC_COLUMNS = ['region', 'completed', 'total', 'completion_rate', 'gap_to_target']
+
+_PLACEHOLDERS = {'qmark': '?', 'pyformat': '%s', 'format': '%s'}
+
+
+def source_for_table(table):
+    for source, spec in METRICS.items():
+        if spec.get('table') == table:
+            return source
+    return None
+
+
+@traced('metrics.compute')
+def compute_metrics(frame, source, sdg_target=SDG_TARGET):
+    """Completion rate and SDG gap per region, with a hash of the inputs."""
+    spec = METRICS[source]
+    grouped = frame.groupby(spec['region'], sort=False, observed=True)[[spec['completed'], spec['total']]].sum()
+    metrics = pd.DataFrame({
+        'completed': grouped[spec['completed']].astype(float),
+        'total': grouped[spec['total']].astype(float),
+    })
+    metrics['completion_rate'] = ratio_percent(metrics['completed'], metrics['total'])
+    metrics['gap_to_target'] = sdg_target - metrics['completion_rate']
+    metrics['input_hash'] = pd.util.hash_pandas_object(
+        metrics[['completed', 'total']].assign(target=float(sdg_target)), index=True
+    ).astype(str)
+    metrics.index.name = 'region'
+    return metrics
+
+
+def ensure_tables(conn, source):
+    cursor = conn.cursor()
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {METRICS[source]['table']} ("
+        "region TEXT, completed REAL, total REAL, completion_rate REAL, "
+        "gap_to_target REAL, input_hash TEXT, data_version TEXT, updated_at TEXT)"
+    )
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS metrics_versions ("
+        "source TEXT, data_version TEXT, refreshed_at TEXT)"
+    )
+    cursor.close()
+
+
+def stored_version(conn, source, paramstyle='qmark'):
+    p = _PLACEHOLDERS[paramstyle]
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT data_version FROM metrics_versions WHERE source = {p}", (source,))
+    row = cursor.fetchone()
+    cursor.close()
+    return row[0] if row else None
+
+
+def stage_counts(frame, source):
+    """Construction stage counts per region, or None for sources without stages."""
+    spec = METRICS[source]
+    stages = spec.get('stages')
+    if not stages or not set(stages).issubset(frame.columns):
+        return None
+    counts = frame.groupby(spec['region'], sort=False, observed=True)[stages].sum().astype(float)
+    counts.index.name = 'region'
+    return counts
+
+
+def _seed_history(conn, source, data_version):
+    # Metrics materialized before the snapshot history (or its stage counts)
+    # existed start it off
+    spec = METRICS[source]
+    seed_stages = bool(spec.get('stages')) and 'source_table' in spec and not snapshots.has_stages(source)
+    if snapshots.latest(source) is None or seed_stages:
+        stages = None
+        if seed_stages:
+            columns = [spec['region']] + spec['stages']
+            stages = stage_counts(
+                fetch_frame(conn.cursor(), f"SELECT {', '.join(columns)} FROM {spec['source_table']}", columns),
+                source
+            )
+        snapshots.record(source, read(conn, source).set_index('region'), data_version, stages=stages)
+
+
+def refresh(conn, source, frame, data_version, paramstyle='qmark', sdg_target=SDG_TARGET):
+    """Bring the materialized metrics for `source` up to `data_version`.
+
+    Only regions whose inputs changed (or that disappeared) are rewritten,
+    and the full set is appended to the snapshot history (snapshots.py).
+    Returns the number of regions touched; 0 when already up to date.
+    """
+    ensure_tables(conn, source)
+    data_version = str(data_version)
+    if stored_version(conn, source, paramstyle) == data_version:
+        _seed_history(conn, source, data_version)
+        return 0
+
+    table = METRICS[source]['table']
+    p = _PLACEHOLDERS[paramstyle]
+    metrics = compute_metrics(frame, source, sdg_target)
+
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT region, input_hash FROM {table}")
+    existing = pd.Series(dict(cursor.fetchall()), dtype=object)
+    changed = metrics[metrics['input_hash'] != existing.reindex(metrics.index)]
+    removed = existing.index.difference(metrics.index)
+
+    stale = [(region,) for region in changed.index.append(removed)]
+    if stale:
+        cursor.executemany(f"DELETE FROM {table} WHERE region = {p}", stale)
+    if not changed.empty:
+        now = datetime.datetime.now().isoformat(timespec='seconds')
+        rows = changed.reset_index()[METRIC_COLUMNS + ['input_hash']]
+        cursor.executemany(
+            f"INSERT INTO {table} ({', '.join(METRIC_COLUMNS)}, input_hash, data_version, updated_at) "
+            f"VALUES ({', '.join([p] * (len(METRIC_COLUMNS) + 3))})",
+            [tuple(row) + (data_version, now) for row in rows.itertuples(index=False)]
+        )
+
+    cursor.execute(f"DELETE FROM metrics_versions WHERE source = {p}", (source,))
+    cursor.execute(
+        f"INSERT INTO metrics_versions (source, data_version, refreshed_at) VALUES ({p}, {p}, {p})",
+        (source, data_version, datetime.datetime.now().isoformat(timespec='seconds'))
+    )
+    cursor.close()
+    if stale and isinstance(conn, sqlite3.Connection):
+        # Reinserted rows can take the deleted rows' rowids, so the query
+        # cache's version probe needs the load version advanced
+        # (query_cache.probe_table_version)
+        bump_load_version(conn, table)
+    conn.commit()
+    # Every materialized version is also kept in the history
+    snapshots.record(source, metrics, data_version, stages=stage_counts(frame, source))
+    return len(stale)
+
+
+def refresh_from_source(conn, source, data_version, paramstyle='qmark'):
+    """Refresh from the warehouse table the source is derived from."""
+    ensure_tables(conn, source)
+    if stored_version(conn, source, paramstyle) == str(data_version):
+        _seed_history(conn, source, data_version)
+        return 0
+    spec = METRICS[source]
+    columns = [spec['region'], spec['completed'], spec['total']] + spec.get('stages', [])
+    frame = fetch_frame(conn.cursor(), f"SELECT {', '.join(columns)} FROM {spec['source_table']}", columns)
+    return refresh(conn, source, frame, data_version, paramstyle)
+
+
+def read(conn, source):
+    query = f"SELECT {', '.join(METRIC_COLUMNS)} FROM {METRICS[source]['table']}"
+    return fetch_frame(conn.cursor(), query, METRIC_COLUMNS, ['string'] + ['float64'] * 4)
+
+
+def local_metrics(source, frame, record=False):
+    """Completion metrics for an in-memory frame, indexed by region.
+
+    Nothing is written to a shared table, so sessions with different
+    uploads never read each other's metrics. With `record`, meant for bundled
+    data rather than uploads, the metrics are added to the snapshot history
+    whenever they differ from the last ones recorded.
+    """
+    metrics = compute_metrics(frame, source)
+    if record:
+        data_version = str(pd.util.hash_pandas_object(metrics['input_hash'], index=True).sum())
+        if snapshots.latest_version(source) != data_version:
+            snapshots.record(source, metrics, data_version)
+    return metrics[METRIC_COLUMNS[1:]]
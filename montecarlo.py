@@ -0,0 +1,190 @@
+"""Monte Carlo scenarios for reaching the SDG target.
+
+Each district closes its gap at a baseline velocity (percentage points a
+year). A trial scales that velocity by a lognormal draw per district and by
+one national funding draw shared by every district, and projects the
+completion rate at the horizon. Trials run in fixed-size chunks, each with
+its own child of one SeedSequence, so a scenario gives the same result for
+any number of workers; a chunk's outcomes are binned into per-district
+histograms, which merge in any order and yield percentile bands as soon as
+the first chunk is back.
+"""
+import datetime
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import traced
+from metrics_store import SDG_TARGET
+
+# PMAY-Urban launch; the average pace since then is the baseline velocity
+SCHEME_START = os.getenv("DASHBOARD_SCHEME_START", "2015-06-25")
+
+# UN SDG deadline, the default horizon
+SDG_DEADLINE = '2030-12-31'
+
+# Trials per chunk: the unit of work, seeding and progress
+CHUNK_TRIALS = 5000
+
+# Histogram resolution of the completion rate, in percentage points
+BIN_WIDTH = 0.1
+BINS = int(round(100 / BIN_WIDTH)) + 1
+
+
+def years_between(start, end=None):
+    end = pd.Timestamp(end) if end is not None else pd.Timestamp(datetime.date.today())
+    return max((end - pd.Timestamp(start)).days / 365.25, 0.0)
+
+
+def baseline_velocity(completion_rate, as_of=None):
+    """Average percentage points a year since SCHEME_START."""
+    years = years_between(SCHEME_START, as_of)
+    return np.asarray(completion_rate, dtype=float) / max(years, 1.0)
+
+
+def simulate_chunk(current, velocity, horizon, velocity_cv, funding_cv, target, trials, seed):
+    """Histogram counts (districts x BINS) and target hits of `trials` trials."""
+    rng = np.random.default_rng(seed)
+    districts = len(current)
+    # Lognormal multipliers with mean 1 and the given coefficient of
+    # variation; float32 halves the memory traffic of the trials matrix
+    sigma_v = np.sqrt(np.log1p(velocity_cv ** 2))
+    sigma_f = np.sqrt(np.log1p(funding_cv ** 2))
+    log_speed = rng.standard_normal((trials, districts), dtype=np.float32)
+    log_speed *= np.float32(sigma_v)
+    log_speed += (sigma_f * rng.standard_normal((trials, 1)) - (sigma_v ** 2 + sigma_f ** 2) / 2).astype(np.float32)
+    outcome = np.exp(log_speed, out=log_speed)
+    outcome *= (velocity * horizon).astype(np.float32)
+    outcome += current.astype(np.float32)
+    np.clip(outcome, 0, 100, out=outcome)
+
+    hits = (outcome >= target).sum(axis=0)
+    outcome *= np.float32(1 / BIN_WIDTH)
+    outcome += np.float32(0.5)
+    bins = outcome.astype(np.int32)
+    bins += np.arange(districts, dtype=np.int32) * BINS
+    counts = np.bincount(bins.ravel(), minlength=districts * BINS).reshape(districts, BINS)
+    return counts, hits
+
+
+class ScenarioResult:
+    """Merged outcome histograms of the chunks run so far."""
+
+    def __init__(self, regions, current, chunks):
+        self.regions = pd.Index(regions, name='region')
+        self.current = np.asarray(current, dtype=float)
+        self.chunks = chunks
+        self.done = 0
+        self.trials = 0
+        self._counts = np.zeros((len(self.regions), BINS), dtype=np.int64)
+        self._hits = np.zeros(len(self.regions), dtype=np.int64)
+
+    @property
+    def complete(self):
+        return self.done == self.chunks
+
+    def add(self, counts, hits):
+        self._counts += counts
+        self._hits += hits
+        self.trials += int(counts[0].sum()) if len(counts) else 0
+        self.done += 1
+
+    def summary(self, percentiles=(10, 50, 90)):
+        """Per district: current rate, percentile bands at the horizon and the
+        probability of reaching the target."""
+        frame = pd.DataFrame({'current': self.current}, index=self.regions)
+        cumulative = self._counts.cumsum(axis=1)
+        for q in percentiles:
+            # First bin holding the q-th percentile trial
+            rank = np.ceil(q / 100 * max(self.trials, 1))
+            frame[f"p{q}"] = (cumulative < rank).sum(axis=1) * BIN_WIDTH
+        frame['probability'] = self._hits / max(self.trials, 1)
+        return frame
+
+
+@traced('montecarlo.run')
+def run(regions, current, velocity, horizon, trials=100_000, velocity_cv=0.3, funding_cv=0.2,
+        target=SDG_TARGET, seed=0, executor=None, on_progress=None):
+    """Run a scenario and return its ScenarioResult.
+
+    With an `executor`, chunks run in its worker processes and
+    `on_progress(result)` is called after each one is merged; without one
+    they run in this process. Pending chunks are cancelled if the caller is
+    interrupted.
+    """
+    current = np.asarray(current, dtype=float)
+    velocity = np.asarray(velocity, dtype=float)
+    sizes = [CHUNK_TRIALS] * (trials // CHUNK_TRIALS)
+    if trials % CHUNK_TRIALS:
+        sizes.append(trials % CHUNK_TRIALS)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    result = ScenarioResult(regions, current, len(sizes))
+    args = (current, velocity, horizon, velocity_cv, funding_cv, target)
+
+    if executor is None:
+        for size, child in zip(sizes, seeds):
+            result.add(*simulate_chunk(*args, size, child))
+            if on_progress is not None:
+                on_progress(result)
+        return result
+
+    pending = {executor.submit(simulate_chunk, *args, size, child) for size, child in zip(sizes, seeds)}
+    try:
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                result.add(*future.result())
+            if on_progress is not None:
+                on_progress(result)
+    finally:
+        for future in pending:
+            future.cancel()
+    return result
+
+
+def create_executor(workers=None):
+    """Worker processes for `run`, or None when there is only one to use.
+    Workers are spawned rather than forked, since the dashboard's server
+    process is multi-threaded."""
+    workers = workers or int(os.getenv("DASHBOARD_SIM_WORKERS", "0")) or os.cpu_count() or 1
+    if workers < 2:
+        return None
+    return ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'))
+
+
+class ScenarioCache:
+    """Finished scenario results keyed on their parameters, least recently
+    used first out."""
+
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key):
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return result
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self._hits, 'misses': self._misses, 'entries': len(self._entries)}
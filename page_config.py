@@ -0,0 +1,33 @@
+"""Page config shared by streamlit_app.py and the pages it serves.
+
+Kept apart from resources.py so the entry point does not import the
+connection pool and caches before it has picked a page.
+"""
+import streamlit as st
+
+PAGE_CONFIG = {
+    'page_title': "India Housing & Sanitation Dashboard",
+    'layout': "wide",
+    'initial_sidebar_state': "expanded",
+}
+
+# Session state flag set by streamlit_app.py
+_MULTIPAGE = '_multipage_app'
+
+
+def in_multipage_app():
+    """Whether this session runs under streamlit_app.py, whose st.navigation
+    registers the pages that st.page_link and st.switch_page can go to."""
+    return bool(st.session_state.get(_MULTIPAGE))
+
+
+def set_page_config(page_icon="🏠", multipage=False):
+    """Apply PAGE_CONFIG. streamlit_app.py applies it once for all pages;
+    each page calls it as well so it keeps the wide layout when run on its
+    own (`streamlit run dashboard.py`), and the call does nothing under the
+    multipage app."""
+    if multipage:
+        st.session_state[_MULTIPAGE] = True
+    elif in_multipage_app():
+        return
+    st.set_page_config(page_icon=page_icon, **PAGE_CONFIG)
@@ -0,0 +1,29 @@
+import pandas as pd
+
+# Sanitation scores plotted on the dashboard2.py radar chart
+RADAR_CATEGORIES = ['Toilet_Coverage', 'ODF_Villages', 'Water_Connection', 'Waste_Management_Score']
+
+# PMAY columns used by the cost and efficiency scatter
+COST_COLUMNS = ['Average_Construction_Time_Days', 'Cost_Per_Unit_Lakhs', 'Houses_Completed']
+
+
+def performance_table(pmay_data, sanitation_data, completion_rate):
+    """Per-state performance metrics for dashboard2.py, indexed by State.
+
+    Both frames are indexed once and every metric is computed column-wise,
+    so a selection is a single `reindex` instead of a boolean mask per state.
+    As before, the first row of a state is used when it appears twice.
+    """
+    pmay = pmay_data.drop_duplicates('State').set_index('State')
+    sanitation = sanitation_data.drop_duplicates('State').set_index('State')
+
+    table = pd.DataFrame(index=pmay.index)
+    table['Implementation_Efficiency'] = completion_rate.reindex(pmay.index)
+    table['Fund_Utilization_Rate'] = pmay['Fund_Utilized_Cr'] / pmay['Houses_Sanctioned'] * 100
+    table[COST_COLUMNS] = pmay[COST_COLUMNS]
+    return table.join(sanitation[RADAR_CATEGORIES], how='outer')
+
+
+def select_states(table, states):
+    """Rows of `performance_table` for `states`, in selection order."""
+    return table.reindex(pd.Index(states, name='State'))
@@ -0,0 +1,116 @@
+import time
+
+from arrow_fetch import column_dtypes
+from database import sql_name
+from datasets import DATASETS
+
+_PLACEHOLDERS = {
+    'qmark': '?',
+    'pyformat': '%s',
+    'format': '%s',
+}
+
+
+class Query:
+    """Small builder for the aggregate queries the dashboard sections need.
+
+    Queries are rendered as parameterized SQL (`to_sql`) so only the result
+    rows leave the warehouse.
+    """
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self._columns = []
+        self._ratios = []
+        self._filters = []
+        self._order = None
+        self._limit = None
+        self._distinct = False
+
+    def select(self, *columns):
+        self._columns.extend(columns)
+        return self
+
+    def ratio(self, name):
+        """Add one of the dataset's derived ratio columns, e.g. 'Completion Rate (%)'."""
+        self._ratios.append(name)
+        return self
+
+    def where_in(self, column, values):
+        self._filters.append((column, list(values)))
+        return self
+
+    def order_by(self, column, ascending=True):
+        self._order = (column, ascending)
+        return self
+
+    def limit(self, n):
+        self._limit = int(n)
+        return self
+
+    def top(self, n, by, ascending=False):
+        return self.order_by(by, ascending).limit(n)
+
+    def distinct(self):
+        self._distinct = True
+        return self
+
+    @property
+    def output_columns(self):
+        names = DATASETS[self.dataset]['columns']
+        return [names[column] for column in self._columns] + list(self._ratios)
+
+    def _sql_alias(self, column):
+        # Display names of ratios are not valid identifiers
+        return sql_name(column) if column in self._ratios else column
+
+    def _tiebreak(self):
+        # Deterministic ordering of ties, so a Top-N is stable across runs
+        key = self._order[0]
+        return [column for column in self._columns if column != key][:1]
+
+    def to_sql(self, paramstyle='qmark'):
+        """Render as (sql, params) for a DB-API connection with `paramstyle`."""
+        placeholder = _PLACEHOLDERS[paramstyle]
+        derived = DATASETS[self.dataset]['derived']
+        params = []
+
+        select = list(self._columns)
+        for name in self._ratios:
+            numerator, denominator = derived[name]
+            select.append(
+                f"COALESCE(100.0 * {numerator} / NULLIF({denominator}, 0), 0) AS {sql_name(name)}")
+        sql = f"SELECT {'DISTINCT ' if self._distinct else ''}{', '.join(select)} FROM {DATASETS[self.dataset]['table']}"
+
+        clauses = []
+        for column, values in self._filters:
+            if values:
+                clauses.append(f"{column} IN ({', '.join([placeholder] * len(values))})")
+                params.extend(values)
+            else:
+                clauses.append("1 = 0")
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+
+        if self._order is not None:
+            column, ascending = self._order
+            keys = [f"{self._sql_alias(column)} {'ASC' if ascending else 'DESC'}"]
+            keys += [f"{column} ASC" for column in self._tiebreak()]
+            sql += " ORDER BY " + ", ".join(keys)
+
+        if self._limit is not None:
+            sql += f" LIMIT {placeholder}"
+            params.append(self._limit)
+        return sql, tuple(params)
+
+    def dtypes(self):
+        return column_dtypes(self._columns, self.dataset) + ['float64'] * len(self._ratios)
+
+    def run(self, run_query, paramstyle='qmark', timings=None):
+        """Execute through `run_query(query, table, columns, dtypes, params)`."""
+        sql, params = self.to_sql(paramstyle)
+        started = time.perf_counter()
+        frame = run_query(sql, DATASETS[self.dataset]['table'], self.output_columns, self.dtypes(), params)
+        if timings is not None:
+            timings[f"{self.dataset}.query"] = timings.get(f"{self.dataset}.query", 0.0) + time.perf_counter() - started
+        return frame
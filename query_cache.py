@@ -0,0 +1,124 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from database import load_version
+
+_QUOTED = re.compile(r"('(?:[^']|'')*')")
+
+
+def normalize_sql(sql):
+    """Canonical form of a query used as the cache key.
+
+    Whitespace is collapsed, trailing semicolons dropped and everything
+    outside string literals lower-cased, so cosmetic edits to a query do not
+    defeat the cache.
+    """
+    parts = _QUOTED.split(sql.strip().rstrip(';').strip())
+    parts = [part if i % 2 else ' '.join(part.split()).lower() for i, part in enumerate(parts)]
+    return ''.join(parts)
+
+
+def probe_table_version(conn, table, backend):
+    # Cheap metadata lookup that changes whenever the table is reloaded. On
+    # SQLite that is the load version ingest.py advances on every load, as a
+    # same-size reload hands out the same rowids again; COUNT(*) and
+    # MAX(rowid) only stand in for tables never loaded through ingest.py
+    if backend != "snowflake":
+        version = load_version(conn, table)
+        if version is not None:
+            return ('load', str(version))
+    cursor = conn.cursor()
+    try:
+        if backend == "snowflake":
+            cursor.execute(
+                "SELECT row_count, last_altered FROM information_schema.tables "
+                "WHERE table_schema = CURRENT_SCHEMA() AND table_name = %s",
+                (table.upper(),)
+            )
+        else:
+            cursor.execute(f"SELECT COUNT(*), MAX(rowid) FROM {table}")
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+    return tuple(str(value) for value in row) if row else ()
+
+
+class QueryCache:
+    """LRU + TTL cache of query results keyed on SQL text and table version.
+
+    Entries expire after `ttl` seconds and the least recently used entry is
+    evicted once more than `max_entries` are stored. Table versions are
+    re-probed at most every `probe_interval` seconds.
+    """
+
+    def __init__(self, ttl=3600.0, max_entries=32, probe_interval=60.0):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.probe_interval = probe_interval
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'expired': 0,
+            'evictions': 0,
+            'probes': 0,
+            'saved_seconds': 0.0,
+        }
+
+    def table_version(self, conn, table, backend):
+        now = time.monotonic()
+        with self._lock:
+            cached = self._versions.get(table)
+            if cached is not None and now - cached[1] < self.probe_interval:
+                return cached[0]
+        version = probe_table_version(conn, table, backend)
+        with self._lock:
+            self._stats['probes'] += 1
+            self._versions[table] = (version, now)
+        return version
+
+    def get_or_load(self, sql, version, loader, params=None):
+        """Return the cached result for `sql` at `version`, or call `loader`."""
+        key = (normalize_sql(sql), repr(params), version)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at, elapsed = entry
+                if now - stored_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    self._stats['saved_seconds'] += elapsed
+                    return value
+                del self._entries[key]
+                self._stats['expired'] += 1
+            self._stats['misses'] += 1
+
+        started = time.perf_counter()
+        value = loader()
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self._entries[key] = (value, now, elapsed)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,205 @@
+"""Render the graph.py charts to files, headless and in parallel.
+
+    python reports.py                                  # PNG into reports/
+    python reports.py --formats png svg pdf --workers 4 --out reports/2026-10
+    python reports.py --force                          # re-render everything
+
+A job is one chart for one scope: India, which is what graph.py shows, and
+every state in the sanitation history for the time-series charts. (The PMAY
+district data has no state column, so the allocation charts are India-wide
+only.) Jobs render with the Agg backend in a pool of worker processes, and
+each worker keeps one figure per chart, clearing it for the next job instead
+of creating a new one. A manifest in the output directory records the hash
+of the data every file was drawn from, so a rerun only renders the charts
+whose inputs changed.
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import graph  # noqa: E402
+import snapshots  # noqa: E402
+from database import sql_name  # noqa: E402
+from metrics_store import LOCAL_DB  # noqa: E402
+
+REPORTS_DIR = os.getenv(
+    "DASHBOARD_REPORTS_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "reports")
+)
+
+MANIFEST = 'manifest.json'
+
+# Part of every input hash; bump it when a draw function changes so the
+# charts drawn by the old code are rendered again
+RENDER_VERSION = 1
+
+NATIONAL = 'India'
+
+# Figures kept by this process for reuse, one per chart
+_templates = {}
+
+
+def jobs(allocation, history):
+    """(chart, scope, data) for every chart and scope with data to draw."""
+    inputs = {'allocation': allocation, 'history': history}
+    result = []
+    for chart, (_, _, source) in graph.CHARTS.items():
+        data = inputs[source]
+        if data.empty:
+            continue
+        result.append((chart, NATIONAL, data))
+        if source == 'history':
+            for region, group in data.groupby('region', sort=True):
+                result.append((chart, region, group))
+    return result
+
+
+def input_hash(chart, scope, data):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((RENDER_VERSION, chart, scope, list(data.columns))).encode())
+    digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def output_path(chart, scope, fmt):
+    return os.path.join(sql_name(scope), f"{chart}.{fmt}")
+
+
+def _template(chart):
+    """This process's figure and axes for `chart`, cleared for a new drawing."""
+    template = _templates.get(chart)
+    if template is None:
+        fig, ax = plt.subplots(figsize=graph.CHARTS[chart][0])
+        template = _templates[chart] = (fig, ax, ax.get_subplotspec())
+    fig, ax, spec = template
+    # Drop axes a previous drawing added, such as the heatmap's colorbar,
+    # and give back the room they took from the chart
+    for extra in fig.axes:
+        if extra is not ax:
+            extra.remove()
+    ax.set_subplotspec(spec)
+    ax.clear()
+    return fig, ax
+
+
+def render(chart, scope, data, paths):
+    """Draw `chart` for `scope` and save it to each of `paths`."""
+    fig, ax = _template(chart)
+    graph.CHARTS[chart][1](ax, data)
+    if scope != NATIONAL:
+        ax.set_title(f"{ax.get_title()} ({scope})")
+    for path in paths:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fig.savefig(path, bbox_inches='tight')
+    return chart, scope
+
+
+def load_manifest(out):
+    path = os.path.join(out, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(out, manifest):
+    # Written to a temporary file first so an interrupted run keeps the old one
+    path = os.path.join(out, MANIFEST)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def render_all(report_jobs, out=REPORTS_DIR, formats=('png',), workers=None, force=False, on_done=None):
+    """Render the jobs whose inputs changed since the last run into `out`.
+
+    Returns a summary dict. With fewer than two `workers` the jobs render in
+    this process. `on_done(chart, scope)` is called as each job finishes.
+    """
+    os.makedirs(out, exist_ok=True)
+    manifest = {} if force else load_manifest(out)
+    started = time.perf_counter()
+
+    pending, skipped = [], 0
+    for chart, scope, data in report_jobs:
+        digest = input_hash(chart, scope, data)
+        stale = [
+            output_path(chart, scope, fmt) for fmt in formats
+            if manifest.get(output_path(chart, scope, fmt)) != digest
+            or not os.path.exists(os.path.join(out, output_path(chart, scope, fmt)))
+        ]
+        if stale:
+            pending.append((chart, scope, data, stale, digest))
+        else:
+            skipped += 1
+
+    def finished(stale, digest, chart, scope):
+        for path in stale:
+            manifest[path] = digest
+        if on_done is not None:
+            on_done(chart, scope)
+
+    workers = workers or int(os.getenv("DASHBOARD_REPORT_WORKERS", "0")) or os.cpu_count() or 1
+    try:
+        if workers < 2 or len(pending) < 2:
+            for chart, scope, data, stale, digest in pending:
+                render(chart, scope, data, [os.path.join(out, path) for path in stale])
+                finished(stale, digest, chart, scope)
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as executor:
+                futures = {
+                    executor.submit(render, chart, scope, data, [os.path.join(out, path) for path in stale]):
+                        (stale, digest)
+                    for chart, scope, data, stale, digest in pending
+                }
+                for future in as_completed(futures):
+                    finished(*futures[future], *future.result())
+    finally:
+        # Keep what did render, so a rerun after a failure resumes from there
+        save_manifest(out, manifest)
+
+    return {
+        'rendered': len(pending),
+        'files': sum(len(stale) for _, _, _, stale, _ in pending),
+        'skipped': skipped,
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--out', default=REPORTS_DIR)
+    parser.add_argument('--formats', nargs='+', default=['png'], choices=['png', 'svg', 'pdf'])
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument('--force', action='store_true', help="render every chart even if its data is unchanged")
+    parser.add_argument('--db', default=LOCAL_DB)
+    parser.add_argument('--snapshots', default=snapshots.SNAPSHOT_DB)
+    args = parser.parse_args()
+
+    try:
+        allocation = graph.load_allocation(args.db)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    history = graph.load_history(args.snapshots)
+    if history.empty:
+        print("No sanitation snapshots recorded yet; the time-series charts are left out.")
+
+    summary = render_all(jobs(allocation, history), args.out, args.formats, args.workers, args.force)
+    print(
+        f"Rendered {summary['rendered']:,} charts ({summary['files']:,} files), "
+        f"skipped {summary['skipped']:,} unchanged, in {summary['seconds']:.2f}s -> {args.out}"
+    )
+
+
+if __name__ == '__main__':
+    main()
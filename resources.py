@@ -0,0 +1,35 @@
+"""Streamlit resources shared by every page of streamlit_app.py.
+
+They are defined once here rather than in each page script, so whichever
+page runs first creates them and the others reuse the same warm
+connections and caches.
+"""
+import os
+
+import streamlit as st
+
+from connection_pool import create_pool_from_env
+from figure_factory import FigureFactory
+from query_cache import QueryCache
+
+
+# Connections are pooled across reruns and sessions so a widget change does not
+# pay for a fresh Snowflake login handshake
+@st.cache_resource
+def get_connection_pool():
+    return create_pool_from_env()
+
+
+# Query results are shared across reruns; the tables change at most daily
+@st.cache_resource
+def get_query_cache():
+    return QueryCache(
+        ttl=float(os.getenv("DASHBOARD_CACHE_TTL", "3600")),
+        max_entries=int(os.getenv("DASHBOARD_CACHE_ENTRIES", "32"))
+    )
+
+
+# Finished figures shared across reruns and pages, keyed on their data and options
+@st.cache_resource
+def get_figure_factory():
+    return FigureFactory(max_entries=int(os.getenv("DASHBOARD_FIGURE_ENTRIES", "64")))
@@ -0,0 +1,158 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from database import load_schema, sql_name
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_schema.yaml")
+
+# Mapping of schema types to pandas dtypes. Integers use the nullable Int64 so
+# a stray NULL (e.g. a totals row) does not fail the cast.
+DTYPES = {
+    'integer': 'Int64',
+    'numeric': 'float64',
+    'string': 'string',
+}
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+class CompiledSchema:
+    """One dataset section of data_schema.yaml, compiled for validation.
+
+    Range, integer and null rules are turned into NumPy arrays once, so
+    `validate` checks every numeric column of a frame in a few vectorized
+    operations instead of looping over rows.
+    """
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.table = spec.get('table')
+        self.fields = spec['fields']
+        self.columns = [sql_name(field) for field in self.fields]
+        self.field_names = dict(zip(self.columns, self.fields))
+        self.types = {sql_name(field): props['type'] for field, props in self.fields.items()}
+        self.dtypes = {column: DTYPES[kind] for column, kind in self.types.items()}
+        self.nullable = {sql_name(field): props.get('allow_null', True) for field, props in self.fields.items()}
+        self.required = [column for column in self.columns if not self.nullable[column]]
+        self.aggregates = {
+            sql_name(field): props.get('aggregate', 'max' if props['type'] == 'string' else 'sum')
+            for field, props in self.fields.items()
+        }
+        self.aliases = {
+            sql_name(alias): sql_name(field)
+            for field, props in self.fields.items() for alias in props.get('aliases', [])
+        }
+
+        self.numeric = [column for column in self.columns if self.types[column] != 'string']
+        self.strings = [column for column in self.columns if self.types[column] == 'string']
+        ranges = [self.fields[self.field_names[column]].get('range', [-np.inf, np.inf]) for column in self.numeric]
+        self._low = np.array([low for low, _ in ranges], dtype=float)
+        self._high = np.array([high for _, high in ranges], dtype=float)
+        self._integer = np.array([self.types[column] == 'integer' for column in self.numeric], dtype=bool)
+        self._numeric_nullable = np.array([self.nullable[column] for column in self.numeric], dtype=bool)
+
+    def normalize_header(self, header):
+        name = sql_name(str(header).replace('\ufeff', ''))
+        return self.aliases.get(name, name)
+
+    def normalize_columns(self, frame):
+        frame.columns = [self.normalize_header(column) for column in frame.columns]
+        return frame
+
+    def missing_columns(self, columns):
+        """Required schema fields absent from (normalized) `columns`."""
+        present = {self.normalize_header(column) for column in columns}
+        return [self.field_names[column] for column in self.required if column not in present]
+
+    def with_field_names(self, frame):
+        return frame.rename(columns=self.field_names)
+
+    def _numeric_matrix(self, frame, index):
+        matrix = np.empty((len(index), len(self.numeric)), dtype=float)
+        bad_type = np.zeros(matrix.shape, dtype=bool)
+        for j, column in enumerate(self.numeric):
+            if column not in frame:
+                matrix[:, j] = np.nan
+                continue
+            raw = frame[column]
+            if pd.api.types.is_numeric_dtype(raw):
+                # The CSV parser already produced numbers
+                matrix[:, j] = raw.to_numpy(dtype=float, na_value=np.nan)
+            else:
+                text = raw.astype('string').str.strip()
+                present = (text.notna() & (text != '')).to_numpy(dtype=bool, na_value=False)
+                values = pd.to_numeric(text.where(present), errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+                matrix[:, j] = values
+                bad_type[:, j] = present & np.isnan(values)
+        return matrix, bad_type
+
+    def validate(self, frame):
+        """Coerce `frame` (normalized column names) to the schema.
+
+        Returns (coerced frame, boolean valid mask, reasons Series); reasons
+        are '' for valid rows.
+        """
+        index = frame.index
+        n = len(index)
+        reasons = np.full(n, '', dtype=object)
+
+        matrix, bad_type = self._numeric_matrix(frame, index)
+        null = np.isnan(matrix) & ~bad_type
+        checks = [
+            (bad_type, "not a number"),
+            (null & ~self._numeric_nullable, "null"),
+            (~np.isnan(matrix) & self._integer & (matrix != np.round(matrix)), "not an integer"),
+            (~np.isnan(matrix) & ((matrix < self._low) | (matrix > self._high)), None),
+        ]
+        invalid = np.zeros(n, dtype=bool)
+        for mask, message in checks:
+            for j in np.flatnonzero(mask.any(axis=0)):
+                rows = mask[:, j]
+                column = self.numeric[j]
+                text = message or f"outside [{self._low[j]:g}, {self._high[j]:g}]"
+                reasons[rows] += f"{column}: {text}; "
+                invalid |= rows
+
+        coerced = {}
+        for column in self.strings:
+            if column in frame:
+                values = frame[column].astype('string').str.strip()
+                values = values.where(values != '')
+            else:
+                values = pd.Series(pd.NA, index=index, dtype='string')
+            if not self.nullable[column]:
+                rows = values.isna().to_numpy()
+                reasons[rows] += f"{column}: null; "
+                invalid |= rows
+            coerced[column] = values
+
+        for j, column in enumerate(self.numeric):
+            values = matrix[:, j]
+            if self._integer[j]:
+                values = np.where(np.isnan(values), np.nan, np.round(values))
+            coerced[column] = pd.Series(values, index=index).astype(self.dtypes[column])
+
+        coerced = pd.DataFrame(coerced, index=index)[self.columns]
+        return coerced, ~invalid, pd.Series(reasons, index=index).str.rstrip('; ')
+
+
+def load_schemas(path=SCHEMA_PATH):
+    """Compiled schemas by dataset name, re-parsed only when the file changes."""
+    mtime = os.stat(path).st_mtime_ns
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+    raw = load_schema(path)
+    schemas = {name: CompiledSchema(name, spec) for name, spec in raw['datasets'].items()}
+    with _cache_lock:
+        _cache[path] = (mtime, schemas)
+    return schemas
+
+
+def get_schema(name, path=SCHEMA_PATH):
+    return load_schemas(path)[name]
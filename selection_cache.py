@@ -0,0 +1,73 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class Selection:
+    """Filtered views of the registered frames for one sidebar selection.
+
+    Each view is computed on first access and then shared: callers get the
+    same frame object every time, so they must not modify it in place.
+    """
+
+    def __init__(self, cache, values):
+        self._cache = cache
+        self.values = values
+        self._views = {}
+
+    def __getitem__(self, name):
+        view = self._views.get(name)
+        if view is None:
+            view = self._views[name] = self._cache._filter(name, self.values)
+        return view
+
+
+class SelectionCache:
+    """LRU of `Selection`s keyed on the tuple of selected values.
+
+    Row positions of every value are grouped once per frame, so building a
+    view is a single `take` instead of an `isin` scan, and flipping back to
+    a recent selection returns the views already built.
+    """
+
+    def __init__(self, frames, max_entries=8):
+        # frames: {name: (frame, column)}; column None filters on the index
+        self.frames = {name: frame for name, (frame, _) in frames.items()}
+        self._positions = {
+            name: (frame.groupby(level=0, sort=False) if column is None
+                   else frame.groupby(column, sort=False)).indices
+            for name, (frame, column) in frames.items()
+        }
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def _filter(self, name, values):
+        positions = self._positions[name]
+        found = [positions[value] for value in dict.fromkeys(values) if value in positions]
+        # Keep the frame's own row order, as `isin` would
+        rows = np.sort(np.concatenate(found)) if found else np.array([], dtype=np.intp)
+        return self.frames[name].take(rows)
+
+    def select(self, values):
+        key = tuple(values)
+        with self._lock:
+            selection = self._entries.get(key)
+            if selection is not None:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return selection
+            self._stats['misses'] += 1
+            selection = self._entries[key] = Selection(self, key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+        return selection
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        return stats
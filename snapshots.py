@@ -0,0 +1,206 @@
+"""Append-only history of the per-region completion metrics.
+
+Every time metrics_store materializes a new data version of a source, the
+full cross-section (completed, total, completion rate per region) is
+appended here with its timestamp. Rows are clustered on
+(dataset, region, taken_at), so a range query for a few regions reads only
+those rows, and month / quarter / year rollups are maintained on write, so
+a downsampled series never scans the raw history. Sources with
+construction stages also keep each region's stage counts per snapshot.
+"""
+import datetime
+import os
+import sqlite3
+
+import pandas as pd
+
+SNAPSHOT_DB = os.getenv(
+    "DASHBOARD_SNAPSHOT_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots.db")
+)
+
+VALUE_COLUMNS = ['completed', 'total', 'completion_rate']
+
+# Rollup grains; a period is keyed on its first day and holds the last
+# snapshot taken within it (the metrics are cumulative counts)
+GRAINS = ('month', 'quarter', 'year')
+
+
+def period_start(timestamps, grain):
+    """First day of the `grain` period of each timestamp, as ISO dates."""
+    timestamps = pd.DatetimeIndex(pd.to_datetime(timestamps))
+    month = {'month': timestamps.month, 'quarter': (timestamps.month - 1) // 3 * 3 + 1, 'year': 1}[grain]
+    starts = pd.to_datetime(pd.DataFrame({'year': timestamps.year, 'month': month, 'day': 1}))
+    return starts.dt.strftime('%Y-%m-%d').tolist()
+
+
+def connect(path=SNAPSHOT_DB):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    values = ", ".join(f"{column} REAL" for column in VALUE_COLUMNS)
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS snapshots (dataset TEXT, region TEXT, taken_at TEXT, {values}, "
+        "PRIMARY KEY (dataset, region, taken_at)) WITHOUT ROWID"
+    )
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS snapshot_rollups (dataset TEXT, grain TEXT, region TEXT, "
+        f"period TEXT, taken_at TEXT, {values}, "
+        "PRIMARY KEY (dataset, grain, region, period)) WITHOUT ROWID"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS stage_snapshots (dataset TEXT, region TEXT, taken_at TEXT, "
+        "stage TEXT, count REAL, PRIMARY KEY (dataset, region, taken_at, stage)) WITHOUT ROWID"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS snapshot_log (dataset TEXT, taken_at TEXT, regions INTEGER, "
+        "data_version TEXT, PRIMARY KEY (dataset, taken_at)) WITHOUT ROWID"
+    )
+    return conn
+
+
+def record(dataset, metrics, data_version=None, taken_at=None, stages=None, path=SNAPSHOT_DB):
+    """Append `metrics` (indexed by region, with VALUE_COLUMNS) as one snapshot.
+
+    `stages`, indexed by region with one column of counts per stage, is
+    recorded with it. Returns the snapshot's timestamp.
+    """
+    taken_at = taken_at or datetime.datetime.now().isoformat(timespec='seconds')
+    values = [
+        (str(region),) + tuple(float(value) for value in row)
+        for region, row in zip(metrics.index, metrics[VALUE_COLUMNS].itertuples(index=False))
+    ]
+    placeholders = ", ".join("?" * len(VALUE_COLUMNS))
+    updates = ", ".join(f"{column} = excluded.{column}" for column in ['taken_at'] + VALUE_COLUMNS)
+    conn = connect(path)
+    try:
+        with conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, {placeholders})",
+                [(dataset, region, taken_at) + tuple(row) for region, *row in values]
+            )
+            for grain in GRAINS:
+                period = period_start([taken_at], grain)[0]
+                conn.executemany(
+                    f"INSERT INTO snapshot_rollups VALUES (?, ?, ?, ?, ?, {placeholders}) "
+                    f"ON CONFLICT (dataset, grain, region, period) DO UPDATE SET {updates} "
+                    "WHERE excluded.taken_at >= snapshot_rollups.taken_at",
+                    [(dataset, grain, region, period, taken_at) + tuple(row) for region, *row in values]
+                )
+            if stages is not None:
+                long = stages.rename_axis('region').reset_index().melt('region', var_name='stage', value_name='count')
+                conn.executemany(
+                    "INSERT OR REPLACE INTO stage_snapshots VALUES (?, ?, ?, ?, ?)",
+                    [(dataset, str(region), taken_at, stage, float(count))
+                     for region, stage, count in long.itertuples(index=False)]
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO snapshot_log VALUES (?, ?, ?, ?)",
+                (dataset, taken_at, len(values), None if data_version is None else str(data_version))
+            )
+    finally:
+        conn.close()
+    return taken_at
+
+
+def latest(dataset, path=SNAPSHOT_DB):
+    """(taken_at, regions) of the newest snapshot of `dataset`, or None."""
+    conn = connect(path)
+    try:
+        return conn.execute(
+            "SELECT taken_at, regions FROM snapshot_log WHERE dataset = ? ORDER BY taken_at DESC LIMIT 1",
+            (dataset,)
+        ).fetchone()
+    finally:
+        conn.close()
+
+
+def latest_version(dataset, path=SNAPSHOT_DB):
+    """data_version of the newest snapshot of `dataset`, or None."""
+    conn = connect(path)
+    try:
+        row = conn.execute(
+            "SELECT data_version FROM snapshot_log WHERE dataset = ? ORDER BY taken_at DESC LIMIT 1",
+            (dataset,)
+        ).fetchone()
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+
+def has_stages(dataset, path=SNAPSHOT_DB):
+    """Whether any stage counts of `dataset` have been recorded."""
+    conn = connect(path)
+    try:
+        return conn.execute("SELECT 1 FROM stage_snapshots WHERE dataset = ? LIMIT 1", (dataset,)).fetchone() is not None
+    finally:
+        conn.close()
+
+
+def series(dataset, regions=None, start=None, end=None, grain=None, path=SNAPSHOT_DB):
+    """History of `dataset` as a long frame (region, date, completed, total,
+    completion_rate), sorted by region and date.
+
+    `regions` limits the result to those regions; `start` / `end` bound the
+    dates (inclusive, ISO strings or datetimes). With a `grain` from GRAINS,
+    each region has one row per period, dated on the period's first day.
+    """
+    if grain is None:
+        table, date, clauses, params = 'snapshots', 'taken_at', ['dataset = ?'], [dataset]
+    elif grain in GRAINS:
+        table, date, clauses, params = 'snapshot_rollups', 'period', ['dataset = ?', 'grain = ?'], [dataset, grain]
+    else:
+        raise ValueError(f"unknown grain {grain!r}; expected one of {', '.join(GRAINS)}")
+
+    if regions is not None:
+        regions = [str(region) for region in regions]
+        if not regions:
+            return pd.DataFrame(columns=['region', 'date'] + VALUE_COLUMNS)
+        clauses.append(f"region IN ({', '.join('?' * len(regions))})")
+        params.extend(regions)
+    if start is not None:
+        clauses.append(f"{date} >= ?")
+        params.append(pd.Timestamp(start).isoformat() if grain is None else period_start([start], grain)[0])
+    if end is not None:
+        if grain is None:
+            # Whole days: every snapshot taken on the end date is included
+            clauses.append("taken_at < ?")
+            params.append((pd.Timestamp(end).normalize() + pd.Timedelta(days=1)).isoformat())
+        else:
+            clauses.append("period <= ?")
+            params.append(period_start([end], grain)[0])
+
+    conn = connect(path)
+    try:
+        frame = pd.read_sql_query(
+            f"SELECT region, {date} AS date, {', '.join(VALUE_COLUMNS)} FROM {table} "
+            f"WHERE {' AND '.join(clauses)} ORDER BY region, {date}",
+            conn, params=params
+        )
+    finally:
+        conn.close()
+    frame['date'] = pd.to_datetime(frame['date'])
+    return frame
+
+
+def stage_series(dataset, regions=None, path=SNAPSHOT_DB):
+    """Stage counts of `dataset` with the completed count, one row per region
+    and snapshot (region, date, completed, then one column per stage)."""
+    clauses, params = ['s.dataset = ?'], [dataset]
+    if regions is not None:
+        regions = [str(region) for region in regions]
+        clauses.append(f"s.region IN ({', '.join('?' * len(regions))})")
+        params.extend(regions)
+    conn = connect(path)
+    try:
+        long = pd.read_sql_query(
+            "SELECT s.region, s.taken_at AS date, h.completed, s.stage, s.count FROM stage_snapshots s "
+            "JOIN snapshots h ON h.dataset = s.dataset AND h.region = s.region AND h.taken_at = s.taken_at "
+            f"WHERE {' AND '.join(clauses)}",
+            conn, params=params
+        )
+    finally:
+        conn.close()
+    frame = long.pivot(index=['region', 'date', 'completed'], columns='stage', values='count')
+    frame = frame.reset_index().rename_axis(columns=None).sort_values(['region', 'date'], ignore_index=True)
+    frame['date'] = pd.to_datetime(frame['date'])
+    return frame
@@ -0,0 +1,108 @@
+"""Construction stages as a pipeline: unstarted -> foundation -> lintel ->
+roof -> completed.
+
+Houses move one stage at a time, so between two snapshots of a district the
+houses that left each stage follow from the counts by conservation: those
+leaving the roof stage are the newly completed ones, those leaving the
+lintel stage are the roof stage's growth plus its outflow, and so on up the
+line. Over the years between a district's first and last snapshot this
+gives each stage's throughput (houses a year) and its Markov transition
+rate (throughput over the stage's mean occupancy). Treating the stages as a
+fluid tandem line, clearing every house takes the maximum over stages of
+the houses at or before that stage over its throughput; the stage attaining
+it is the district's bottleneck. Everything is computed for all districts
+at once.
+"""
+import numpy as np
+import pandas as pd
+
+import snapshots
+from instrumentation import traced
+from metrics_store import METRICS
+
+DAYS_PER_YEAR = 365.25
+
+# Projections further out than this get no completion date
+MAX_PROJECTION_YEARS = 100
+
+
+class StageFlow:
+    """Per-district stage throughput, bottleneck and projected completion.
+
+    `history` is a stage history frame as returned by
+    `snapshots.stage_series`; `stages` names its stage columns, earliest
+    first. Districts with a single snapshot have no throughput and no
+    projection.
+    """
+
+    def __init__(self, history, stages):
+        self.stages = list(stages)
+        history = history.reindex(columns=['region', 'date', 'completed'] + self.stages)
+        history = history.sort_values(['region', 'date'])
+        first = history.drop_duplicates('region', keep='first').set_index('region')
+        last = history.drop_duplicates('region', keep='last').set_index('region')
+        first = first.reindex(last.index)
+        self.regions = last.index
+        self.as_of = last['date']
+
+        columns = self.stages + ['completed']
+        years = ((last['date'] - first['date']).dt.total_seconds() / (DAYS_PER_YEAR * 86400)).to_numpy()
+        delta = last[columns].to_numpy(dtype=float) - first[columns].to_numpy(dtype=float)
+        # Houses leaving stage k: the growth of every stage after it
+        downstream = np.cumsum(delta[:, ::-1], axis=1)[:, ::-1]
+        outflow = np.clip(downstream[:, 1:], 0, None)
+        counts = last[self.stages].to_numpy(dtype=float)
+        occupancy = (first[self.stages].to_numpy(dtype=float) + counts) / 2
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            throughput = np.where(years[:, None] > 0, outflow / years[:, None], np.nan)
+            rate = np.where(occupancy > 0, throughput / occupancy, np.nan)
+            # Time for stage k to pass every house now at or before it
+            queued = np.cumsum(counts, axis=1)
+            clearing = np.where(queued > 0, queued / throughput, 0.0)
+        clearing[np.isnan(throughput)] = np.nan
+
+        self.counts = pd.DataFrame(counts, index=self.regions, columns=self.stages)
+        self.throughput = pd.DataFrame(throughput, index=self.regions, columns=self.stages)
+        self.transition_rate = pd.DataFrame(rate, index=self.regions, columns=self.stages)
+
+        estimated = ~np.isnan(clearing).any(axis=1)
+        busiest = np.argmax(np.where(np.isnan(clearing), -np.inf, clearing), axis=1)
+        self.years_to_clear = pd.Series(np.where(estimated, clearing.max(axis=1, initial=0.0), np.nan),
+                                        index=self.regions)
+        self.bottleneck = pd.Series(
+            np.where(estimated & (queued[:, -1] > 0), np.array(self.stages, dtype=object)[busiest], None),
+            index=self.regions, dtype=object
+        )
+        years_to_clear = self.years_to_clear.to_numpy()
+        dated = np.isfinite(years_to_clear) & (years_to_clear <= MAX_PROJECTION_YEARS)
+        offset = pd.to_timedelta(np.where(dated, years_to_clear * DAYS_PER_YEAR, np.nan), unit='D')
+        self.completion_date = pd.Series(self.as_of.to_numpy() + offset, index=self.regions)
+
+    @property
+    def estimated(self):
+        """Number of districts with a throughput estimate."""
+        return int(self.years_to_clear.notna().sum())
+
+    def ranking(self):
+        """Districts by projected completion date, soonest first; districts
+        that never clear at the current throughput, then those without an
+        estimate, last."""
+        bottleneck_throughput = self.throughput.to_numpy()[
+            np.arange(len(self.regions)),
+            pd.Categorical(self.bottleneck, categories=self.stages).codes.clip(0)
+        ]
+        frame = pd.DataFrame({
+            'completion_date': self.completion_date,
+            'years_to_clear': self.years_to_clear,
+            'bottleneck': self.bottleneck,
+            'bottleneck_throughput': np.where(self.bottleneck.notna(), bottleneck_throughput, np.nan),
+            'in_pipeline': self.counts.sum(axis=1),
+        })
+        return frame.sort_values(['years_to_clear', 'in_pipeline'], ascending=[True, False], na_position='last')
+
+
+@traced('stage_flow.load')
+def load(dataset='pmay'):
+    """StageFlow of `dataset` from its recorded stage history."""
+    return StageFlow(snapshots.stage_series(dataset), METRICS[dataset]['stages'])
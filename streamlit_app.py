@@ -0,0 +1,22 @@
+import streamlit as st
+from dotenv import load_dotenv
+
+from page_config import set_page_config
+
+# Entry point for all three dashboards as one multipage app:
+#
+#     streamlit run streamlit_app.py
+#
+# Pages run in this process and session, so switching between them reuses
+# the cached frames, figures and pooled connections instead of starting a
+# new server.
+load_dotenv()
+
+set_page_config(multipage=True)
+
+pages = st.navigation([
+    st.Page("dashboard.py", title="India Overview", icon="🏠", default=True),
+    st.Page("dashboard2.py", title="State Analysis", icon="🏘️"),
+    st.Page("app.py", title="District Analysis", icon="📊"),
+])
+pages.run()
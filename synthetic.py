@@ -0,0 +1,118 @@
+"""Synthetic PMAY and sanitation data at any size.
+
+    pmay = synthetic.generate('pmay', 1_000_000)
+    synthetic.write_csv('sanitation', 10_000, 'sanitation.csv')
+
+Columns are the dataset's fields in data_schema.yaml, in schema order, and
+every row passes its rules (CompiledSchema.validate). Counts are consistent
+the way the real exports are: a district's Completed, Foundation, Lintel,
+Roof and Unstarted houses add up to its Beneficiary_Selection. Region names
+come from `region_names` for every dataset, so merges across datasets match
+rows the way district and state names do in the Combined Insights section.
+"""
+import numpy as np
+import pandas as pd
+
+from schema import SCHEMA_PATH, load_schemas
+
+
+def region_names(count):
+    width = len(str(max(count - 1, 0)))
+    return ('Region ' + pd.RangeIndex(count).astype(str).str.zfill(width)).to_numpy(dtype=object)
+
+
+def _regions(rng, rows, regions):
+    # One row per region unless fewer regions are asked for, as with the
+    # state-level exports listing a state once per year
+    names = region_names(regions or rows)
+    if regions is None or regions >= rows:
+        return names[:rows]
+    return names[rng.integers(0, regions, rows)]
+
+
+def _pmay(rng, rows, regions):
+    sanctioned = rng.integers(100, 50_000, rows)
+    # Completed, Foundation, Lintel, Roof; Unstarted is the rest
+    shares = rng.random((rows, 5))
+    shares /= shares.sum(axis=1, keepdims=True)
+    stages = np.floor(shares[:, :4] * sanctioned[:, None]).astype(np.int64)
+    completed, foundation, lintel, roof = stages.T
+    return {
+        'Sl.No': np.arange(rows) % 10_000 + 1,
+        'District': _regions(rng, rows, regions),
+        'Beneficiary_Selection': sanctioned,
+        'Completed': completed,
+        'Foundation': foundation,
+        'Lintel': lintel,
+        'Roof': roof,
+        'Progress_Total': foundation + lintel + roof,
+        'Unstarted': sanctioned - stages.sum(axis=1),
+    }
+
+
+def _sanitation(rng, rows, regions):
+    sanctioned = rng.integers(10, 100_000, rows)
+    completed = np.floor(sanctioned * rng.random(rows)).astype(np.int64)
+    return {
+        'State': _regions(rng, rows, regions),
+        'Sanctioned': sanctioned,
+        'Completed': completed,
+        'In_Progress': np.floor((sanctioned - completed) * rng.random(rows)).astype(np.int64),
+    }
+
+
+def _target_dates(rng, rows):
+    days = rng.integers(0, 6 * 365, rows)
+    return (pd.Timestamp('2024-01-01') + pd.to_timedelta(days, unit='D')).strftime('%Y-%m-%d').to_numpy(dtype=object)
+
+
+def _pmay_state(rng, rows, regions):
+    sanctioned = rng.integers(1_000, 2_000_000, rows)
+    return {
+        'State': _regions(rng, rows, regions),
+        'Houses_Sanctioned': sanctioned,
+        'Houses_Completed': np.floor(sanctioned * rng.random(rows)).astype(np.int64),
+        'Fund_Utilized_Cr': np.round(rng.uniform(100, 30_000, rows), 2),
+        'Year': rng.integers(2015, 2025, rows),
+        'Target_Completion_Date': _target_dates(rng, rows),
+    }
+
+
+def _sanitation_state(rng, rows, regions):
+    return {
+        'State': _regions(rng, rows, regions),
+        'Toilets_Built': rng.integers(1_000, 5_000_000, rows),
+        'ODF_Villages': rng.integers(10, 50_000, rows),
+        'Coverage_Percentage': np.round(rng.uniform(40, 100, rows), 1),
+        'Year': rng.integers(2015, 2025, rows),
+        'Water_Connection_Percentage': np.round(rng.uniform(30, 100, rows), 1),
+    }
+
+
+GENERATORS = {
+    'pmay': _pmay,
+    'sanitation': _sanitation,
+    'pmay_state': _pmay_state,
+    'sanitation_state': _sanitation_state,
+}
+
+
+def generate(dataset, rows, seed=0, regions=None, schema_path=SCHEMA_PATH):
+    """`rows` rows of `dataset` named by its schema fields.
+
+    Rows are one region each unless `regions` caps the number of distinct
+    regions. The same `seed` gives the same frame.
+    """
+    fields = list(load_schemas(schema_path)[dataset].fields)
+    columns = GENERATORS[dataset](np.random.default_rng(seed), rows, regions)
+    if set(columns) != set(fields):
+        raise ValueError(
+            f"synthetic {dataset} columns {sorted(columns)} do not match the schema fields {sorted(fields)}")
+    return pd.DataFrame({field: columns[field] for field in fields})
+
+
+def write_csv(dataset, rows, path, seed=0, regions=None, schema_path=SCHEMA_PATH):
+    """Write `generate(...)` as a CSV export that ingest.py can load."""
+    frame = generate(dataset, rows, seed, regions, schema_path)
+    frame.to_csv(path, index=False)
+    return frame
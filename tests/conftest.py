@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Snapshots recorded by the code under test go to a scratch database, not the
+# app's; set before snapshots.py is imported
+os.environ['DASHBOARD_SNAPSHOT_DB'] = os.path.join(tempfile.mkdtemp(prefix='dashboard-tests-'), 'snapshots.db')
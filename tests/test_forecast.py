@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from forecast import fit, to_period
+
+
+@pytest.mark.parametrize('months', [6, 12, 36])
+def test_clean_linear_series_recovers_slope(months):
+    # Monthly snapshots as fractional years, the way snapshot_history
+    # converts them: a one-year history has sxx of only about 0.1
+    periods = to_period(pd.date_range('2023-01-01', periods=months, freq='MS'))
+    history = pd.DataFrame({
+        'region': ['Bagalkot'] * months + ['Yadgiri'] * months,
+        'period': np.concatenate([periods, periods]),
+        'value': np.concatenate([20 + 6.0 * (periods - 2023), 80 - 1.5 * (periods - 2023)]),
+    })
+    slopes = fit(history).coefficients['slope']
+    assert slopes['Bagalkot'] == pytest.approx(6.0, rel=0.01)
+    assert slopes['Yadgiri'] == pytest.approx(-1.5, rel=0.01)
+
+
+def test_slope_does_not_depend_on_the_period_unit():
+    history = pd.DataFrame({'region': ['Bagalkot'] * 3, 'period': [0.0, 1.0, 2.0], 'value': [10.0, 14.0, 18.0]})
+    in_months = fit(history).coefficients['slope'].iloc[0]
+    in_years = fit(history.assign(period=history['period'] / 12)).coefficients['slope'].iloc[0]
+    assert in_years == pytest.approx(in_months * 12)
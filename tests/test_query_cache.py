@@ -0,0 +1,39 @@
+import os
+
+from conftest import ROOT
+from database import connect
+from ingest import ingest_csv
+from query_cache import QueryCache
+
+PMAY_CSV = os.path.join(ROOT, 'Pradhan_Mantri_Awas_Urban_24-11-2021.csv')
+
+
+def test_reingest_changes_cached_metrics(tmp_path):
+    db, csv = str(tmp_path / 'housing.db'), tmp_path / 'pmay.csv'
+    with open(PMAY_CSV, encoding='utf-8-sig') as f:
+        original = f.read()
+    changed = original.replace("31,Yadgiri,1702,997,", "31,Yadgiri,1702,1000,").replace(
+        ",Total,349164,36475,", ",Total,349164,36478,")
+    assert ",Yadgiri,1702,1000," in changed and ",Total,349164,36478," in changed
+
+    cache = QueryCache(probe_interval=0)
+    sql = "SELECT completed FROM pmay_metrics WHERE region = 'Yadgiri'"
+
+    def cached_completed():
+        conn = connect(db)
+        try:
+            version = cache.table_version(conn, 'pmay_metrics', 'sqlite')
+            return cache.get_or_load(sql, version, lambda: conn.execute(sql).fetchone()[0])
+        finally:
+            conn.close()
+
+    csv.write_text(original, encoding='utf-8')
+    ingest_csv('pmay', str(csv), db)
+    assert cached_completed() == 997
+
+    # One district and the total changed: their metrics rows, the last two,
+    # are deleted and reinserted under the same rowids, so the row count and
+    # the largest rowid stay as they were
+    csv.write_text(changed, encoding='utf-8')
+    ingest_csv('pmay', str(csv), db)
+    assert cached_completed() == 1000
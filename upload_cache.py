@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+import threading
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+UPLOAD_CACHE_DIR = os.getenv(
+    "DASHBOARD_UPLOAD_CACHE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".upload_cache")
+)
+UPLOAD_CACHE_MB = int(os.getenv("DASHBOARD_UPLOAD_CACHE_MB", "512"))
+
+_METADATA_KEY = b'dashboard'
+
+
+def file_digest(upload, block_size=1 << 20):
+    """BLAKE2 digest of a file-like object, read in blocks.
+
+    The read position is restored, so the upload can still be parsed.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    position = upload.tell()
+    upload.seek(0)
+    for block in iter(lambda: upload.read(block_size), b''):
+        digest.update(block)
+    upload.seek(position)
+    return digest.hexdigest()
+
+
+class UploadCache:
+    """Parsed uploads stored as Parquet files on local disk.
+
+    Entries are keyed on a content digest, so re-uploading the same file
+    skips CSV parsing entirely and the stored dtypes (categoricals, nullable
+    integers) come back as written. The least recently used files are
+    deleted once the directory holds more than `max_bytes`.
+    """
+
+    def __init__(self, directory=UPLOAD_CACHE_DIR, max_bytes=UPLOAD_CACHE_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.parquet")
+
+    def get(self, key):
+        """Return (frame, metadata) for `key`, or None."""
+        path = self._path(key)
+        try:
+            table = pq.read_table(path)
+            # Touch the file so eviction sees it as recently used
+            os.utime(path)
+        except (FileNotFoundError, pa.ArrowInvalid):
+            with self._lock:
+                self._stats['misses'] += 1
+            return None
+        with self._lock:
+            self._stats['hits'] += 1
+        metadata = json.loads(table.schema.metadata.get(_METADATA_KEY, b'{}'))
+        return table.to_pandas(), metadata
+
+    def put(self, key, frame, metadata=None):
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        table = table.replace_schema_metadata({
+            **table.schema.metadata,
+            _METADATA_KEY: json.dumps(metadata or {}).encode(),
+        })
+        # Write under a temporary name so readers never see a partial file
+        path = self._path(key)
+        partial = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        pq.write_table(table, partial)
+        os.replace(partial, path)
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.directory):
+                if name.endswith('.parquet'):
+                    stat = os.stat(os.path.join(self.directory, name))
+                    entries.append((stat.st_mtime, stat.st_size, name))
+            total = sum(size for _, size, _ in entries)
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+                total -= size
+                self._stats['evictions'] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        sizes = [entry.stat().st_size for entry in os.scandir(self.directory) if entry.name.endswith('.parquet')]
+        stats['entries'] = len(sizes)
+        stats['bytes'] = sum(sizes)
+        return stats
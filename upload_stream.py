@@ -0,0 +1,135 @@
+import os
+
+import pandas as pd
+
+from schema import get_schema
+
+UPLOAD_MEMORY_MB = int(os.getenv("DASHBOARD_UPLOAD_MEMORY_MB", "256"))
+
+# Rejected-row reasons kept for display; the rest are only counted
+MAX_REASONS = 1000
+
+
+class UploadRejected(ValueError):
+    """The upload could not be parsed or lacks required columns."""
+
+
+class StreamedUpload:
+    """Result of `stream_upload`.
+
+    `frame` holds the valid rows with the schema's field names, or one row
+    per region when the upload outgrew the memory cap (`aggregated`).
+    """
+
+    def __init__(self, frame, aggregated, rejected, rejected_count, rows):
+        self.frame = frame
+        self.aggregated = aggregated
+        self.rejected = rejected
+        self.rejected_count = rejected_count
+        self.rows = rows
+
+
+def _upload_size(upload):
+    size = getattr(upload, 'size', None)
+    if size is None:
+        position = upload.tell()
+        size = upload.seek(0, os.SEEK_END)
+        upload.seek(position)
+    return size
+
+
+def _partial_aggregates(frame, region, rules):
+    # Per-chunk partials that can be combined across chunks; means are
+    # carried as (sum, count)
+    grouped = frame.groupby(region, sort=False, observed=True)
+    parts = {}
+    for column, rule in rules.items():
+        if rule == 'mean':
+            parts[(column, 'sum')] = grouped[column].sum()
+            parts[(column, 'count')] = grouped[column].count()
+        else:
+            parts[(column, rule)] = grouped[column].agg(rule)
+    return pd.DataFrame(parts)
+
+
+def _merge_partials(partials):
+    combined = pd.concat(partials)
+    return combined.groupby(level=0, sort=False).agg(
+        {key: 'sum' if key[1] in ('sum', 'count') else key[1] for key in combined.columns})
+
+
+def _combine_aggregates(partials, region, rules, schema):
+    combined = _merge_partials(partials)
+    result = pd.DataFrame(index=combined.index)
+    for column, rule in rules.items():
+        if rule == 'mean':
+            result[column] = combined[(column, 'sum')] / combined[(column, 'count')].where(combined[(column, 'count')] > 0)
+        else:
+            result[column] = combined[(column, rule)]
+    result.index.name = region
+    result = result.reset_index()[schema.columns]
+    return result.astype({column: schema.dtypes[column] for column in schema.columns
+                          if rules.get(column) != 'mean'})
+
+
+def stream_upload(upload, dataset, region='state', chunksize=50000,
+                  max_bytes=UPLOAD_MEMORY_MB * 1024 * 1024, progress=None):
+    """Parse and validate an uploaded CSV in chunks of `chunksize` rows.
+
+    The first chunk's header is checked against the `dataset` schema before
+    anything else is parsed, raising UploadRejected when required columns
+    are missing. Valid rows are kept until they take more than `max_bytes`;
+    past that only the per-`region` aggregates built along the way are
+    returned. `progress(fraction)` is called after each chunk.
+    """
+    schema = get_schema(dataset)
+    rules = {column: rule for column, rule in schema.aggregates.items() if column != region}
+    size = _upload_size(upload) or 1
+    upload.seek(0)
+
+    kept, partials = [], []
+    kept_bytes = rows = rejected_count = 0
+    aggregated = False
+    reasons = []
+    try:
+        reader = pd.read_csv(upload, chunksize=chunksize, encoding='utf-8-sig',
+                             skipinitialspace=True, low_memory=False)
+        for number, chunk in enumerate(reader):
+            schema.normalize_columns(chunk)
+            if number == 0:
+                missing = schema.missing_columns(chunk.columns)
+                if missing:
+                    raise UploadRejected(f"missing required columns: {', '.join(missing)}")
+
+            coerced, valid, chunk_reasons = schema.validate(chunk)
+            rows += len(chunk)
+            if not valid.all():
+                rejected_count += int((~valid).sum())
+                if sum(len(part) for part in reasons) < MAX_REASONS:
+                    reasons.append(chunk_reasons[~valid])
+            coerced = coerced[valid]
+
+            partials.append(_partial_aggregates(coerced, region, rules))
+            if len(partials) >= 32:
+                partials = [_merge_partials(partials)]
+            if not aggregated:
+                kept.append(coerced)
+                kept_bytes += int(coerced.memory_usage(deep=True).sum())
+                if kept_bytes > max_bytes:
+                    # Too big to keep row by row; the aggregates carry on
+                    aggregated = True
+                    kept = []
+            if progress is not None:
+                progress(min(upload.tell() / size, 1.0))
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as exc:
+        raise UploadRejected(f"could not be parsed as CSV: {exc}") from exc
+
+    if aggregated:
+        frame = _combine_aggregates(partials, region, rules, schema)
+    elif kept:
+        frame = pd.concat(kept, ignore_index=True)
+    else:
+        frame = pd.DataFrame({column: pd.Series(dtype=schema.dtypes[column]) for column in schema.columns})
+
+    rejected = pd.concat(reasons).head(MAX_REASONS) if reasons else pd.Series(dtype=object)
+    return StreamedUpload(schema.with_field_names(frame), aggregated, rejected, rejected_count, rows)